@@ -1,5 +1,4 @@
 import os
-from langchain_openai import AzureChatOpenAI
 from langchain_core.messages import AIMessage, HumanMessage
 
 os.environ["AZURE_OPENAI_API_KEY"]="api_key"
@@ -8,6 +7,7 @@ os.environ["AZURE_OPENAI_ENDPOINT"]="endpoint"
 # Standalone invocation of an LLM without being part of a graph
 def invoke_llm_with_messages_list():
     from pprint import pprint
+    from langchain_openai import AzureChatOpenAI
 
     prompts = [AIMessage(content=f"So you said you were researching ocean mammals?", name="Model")]
     prompts.append(HumanMessage(content=f"Yes, that's right.",name="Lance"))
@@ -3,8 +3,14 @@ from langgraph.graph.message import add_messages
 from typing_extensions import TypedDict
 from typing import Annotated
 from langgraph.graph.message import add_messages
-from langchain_openai import AzureChatOpenAI
+from langchain_core.runnables import RunnableLambda
+from llm_clients import get_llm
+import graph_registry
+from graph_registry import register_graph
+from metrics import instrument
+import asyncio
 import os
+import time
 
 class State(TypedDict):
     # Messages have the type "list". The `add_messages` function
@@ -15,45 +21,111 @@ class State(TypedDict):
 os.environ["AZURE_OPENAI_API_KEY"]="api_key"
 os.environ["AZURE_OPENAI_ENDPOINT"]="endpoint"
 
-llm = AzureChatOpenAI(
-    azure_deployment="gpt-4o",
-    api_version="2025-03-01-preview",
-    temperature=0,
-    max_tokens=None,
-    timeout=None,
-    max_retries=2
-)
-
 def chatbot(state: State):
-    print('In chatbot node')
+    # Shared client, built once per process
+    llm = get_llm()
     return {"messages": [llm.invoke(state["messages"])]}
 
-graph_builder = StateGraph(State)
-graph_builder.add_node("chatbot", chatbot)
-graph_builder.add_edge(START, "chatbot")
-graph_builder.add_edge("chatbot", END)
-graph = graph_builder.compile()
+# Async version of the chatbot node, used when the graph runs with ainvoke / astream
+async def achatbot(state: State):
+    llm = get_llm()
+    return {"messages": [await llm.ainvoke(state["messages"])]}
+
+def build_graph(checkpointer=None):
+    graph_builder = StateGraph(State)
+    # The sync node runs under invoke / stream, the async one under ainvoke / astream
+    graph_builder.add_node("chatbot", RunnableLambda(chatbot, afunc=achatbot))
+    graph_builder.add_edge(START, "chatbot")
+    graph_builder.add_edge("chatbot", END)
+    return instrument(graph_builder).compile(checkpointer=checkpointer)
+
+register_graph("chatbot", build_graph)
+
+def get_graph():
+    # Compiled on first use and shared by every caller in the process
+    return graph_registry.get_graph("chatbot")
+
+def __getattr__(name):
+    # Keeps `module.graph` working for code that imports this module
+    if name == "graph":
+        return get_graph()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+# Time to first token and total latency (in seconds) of every turn,
+# so the gain from token streaming can be measured
+turn_latencies = []
 
-def stream_graph_updates(user_input: str):
-    for event in graph.stream({"messages": [{"role": "user", "content": user_input}]}):
+def stream_graph_tokens(user_input: str):
+    # Yields model tokens as they come out of the chatbot node.
+    # The chatbot node still returns the complete message, which is appended to the state as usual.
+    start = time.perf_counter()
+    first_token = None
+    for chunk, metadata in get_graph().stream({"messages": [{"role": "user", "content": user_input}]}, stream_mode="messages"):
+        if metadata["langgraph_node"] == "chatbot" and chunk.content:
+            if first_token is None:
+                first_token = time.perf_counter() - start
+            yield chunk.content
+    total = time.perf_counter() - start
+    turn_latencies.append({"time_to_first_token": total if first_token is None else first_token, "total": total})
+
+def stream_graph_updates(user_input: str, stream_tokens: bool = False):
+    if stream_tokens:
+        print("Assistant: ", end="", flush=True)
+        for token in stream_graph_tokens(user_input):
+            print(token, end="", flush=True)
+        print()
+        return
+
+    # Node updates arrive only once the full llm.invoke response is back,
+    # so the first token is seen together with the whole answer
+    start = time.perf_counter()
+    first_token = None
+    for event in get_graph().stream({"messages": [{"role": "user", "content": user_input}]}):
         for value in event.values():
+            if first_token is None:
+                first_token = time.perf_counter() - start
             print("Assistant:", value["messages"][-1].content)
+    total = time.perf_counter() - start
+    turn_latencies.append({"time_to_first_token": total if first_token is None else first_token, "total": total})
 
-def main_loop():
+def main_loop(stream_tokens: bool = True):
     while True:
         try:
             user_input = input("User: ")
             if user_input.lower() in ["quit", "exit", "q"]:
                 print("Goodbye!")
                 break
-            stream_graph_updates(user_input)
+            stream_graph_updates(user_input, stream_tokens)
+        except:
+            # fallback if input() is not available
+            user_input = "What do you know about LangGraph?"
+            print("User: " + user_input)
+            stream_graph_updates(user_input, stream_tokens)
+            break
+
+async def astream_graph_updates(user_input: str):
+    async for event in get_graph().astream({"messages": [{"role": "user", "content": user_input}]}):
+        for value in event.values():
+            print("Assistant:", value["messages"][-1].content)
+
+async def amain_loop():
+    # Same loop as main_loop, but input() runs in a worker thread so the event loop stays free
+    while True:
+        try:
+            user_input = await asyncio.to_thread(input, "User: ")
+            if user_input.lower() in ["quit", "exit", "q"]:
+                print("Goodbye!")
+                break
+            await astream_graph_updates(user_input)
         except:
             # fallback if input() is not available
             user_input = "What do you know about LangGraph?"
             print("User: " + user_input)
-            stream_graph_updates(user_input)
+            await astream_graph_updates(user_input)
             break
 
 if __name__=='__main__':
     print('Starting')
-    main_loop()
\ No newline at end of file
+    main_loop()
+    for turn in turn_latencies:
+        print(f"time to first token: {turn['time_to_first_token'] * 1000:.0f} ms, total: {turn['total'] * 1000:.0f} ms")
\ No newline at end of file
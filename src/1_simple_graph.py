@@ -1,39 +1,39 @@
 from langgraph.graph import StateGraph, START, END
 from typing_extensions import TypedDict
 import random
-from typing import Literal
+from typing import Literal, Annotated
 import os
-from IPython.display import Image
+from graph_render import render_graph
+import graph_registry
+from graph_registry import register_graph
+from text_state import TextChannel
+from metrics import instrument
 
 os.environ["AZURE_OPENAI_API_KEY"]="openai_key"
 os.environ["AZURE_OPENAI_ENDPOINT"]="endpoint"
 
 def draw_graph(graph):
     try:
-        img = Image(graph.get_graph().draw_mermaid_png())
-        with open("1_simple_graph.png", "wb") as fout:
-            fout.write(img.data)
+        render_graph(graph, "1_simple_graph.png")
     except Exception as e:
         print(e)
 
 # This class holds the graph state
 class State(TypedDict):
     # A single string as the graph state
-    graph_state: str
+    # TextChannel appends what each node returns, so nodes return only the new text
+    graph_state: Annotated[str, TextChannel]
 
 # Nodes
 # Nodes accept the graph state as input and operate on the state
 def node_1(state):
-    print("---Node 1---")
-    return {"graph_state": state['graph_state'] +" I am"}
+    return {"graph_state": " I am"}
 
 def node_2(state):
-    print("---Node 2---")
-    return {"graph_state": state['graph_state'] +" happy!"}
+    return {"graph_state": " happy!"}
 
 def node_3(state):
-    print("---Node 3---")
-    return {"graph_state": state['graph_state'] +" sad!"}
+    return {"graph_state": " sad!"}
 
 # Conditional edge. This function decides which branch to run.
 # Edges also accept the graph state as input and operate on the state to make routing decisions 
@@ -41,8 +41,6 @@ def node_3(state):
 def decide_mood(state) -> Literal["node_2", "node_3"]:
     
     # Often, we will use state to decide on the next node to visit
-    print('In conditional edge')
-    print(state['graph_state'])
     user_input = state['graph_state'] 
 
     # Here, let's just do a random 50 / 50 split between nodes 2, 3
@@ -53,23 +51,40 @@ def decide_mood(state) -> Literal["node_2", "node_3"]:
 
 # Build graph
 # The graph state is passed down the graph between nodes
-builder = StateGraph(State)
-builder.add_node("node_1", node_1)
-builder.add_node("node_2", node_2)
-builder.add_node("node_3", node_3)
-
-# Logic
-builder.add_edge(START, "node_1")
-builder.add_conditional_edges("node_1", decide_mood)
-builder.add_edge("node_2", END)
-builder.add_edge("node_3", END)
-
-# Add
-graph = builder.compile()
-
-# Draw graph
-# draw_graph(graph)
-
-# Invoke
-result = graph.invoke({"graph_state" : "Hi, this is Lance."})
-print(result)
\ No newline at end of file
+def build_graph(checkpointer=None):
+    builder = StateGraph(State)
+    builder.add_node("node_1", node_1)
+    builder.add_node("node_2", node_2)
+    builder.add_node("node_3", node_3)
+
+    # Logic
+    builder.add_edge(START, "node_1")
+    builder.add_conditional_edges("node_1", decide_mood)
+    builder.add_edge("node_2", END)
+    builder.add_edge("node_3", END)
+
+    # Add
+    return instrument(builder).compile(checkpointer=checkpointer)
+
+register_graph("simple_graph", build_graph)
+
+def get_graph():
+    # Compiled on first use and shared by every caller in the process
+    return graph_registry.get_graph("simple_graph")
+
+def __getattr__(name):
+    # Keeps `module.graph` working for code that imports this module
+    if name == "graph":
+        return get_graph()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+if __name__ == '__main__':
+    graph = get_graph()
+
+    # Draw graph
+    # draw_graph(graph)
+
+    # Invoke
+    result = graph.invoke({"graph_state" : "Hi, this is Lance."})
+    print(result)
\ No newline at end of file
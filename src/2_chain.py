@@ -3,10 +3,12 @@ from typing_extensions import TypedDict
 import random
 from typing import Literal
 import os
-from IPython.display import Image
+from graph_render import render_graph
 from typing import Annotated
 from langgraph.graph.message import add_messages
-from langchain_openai import AzureChatOpenAI
+from llm_clients import get_llm_with_tools
+from graph_registry import register_graph
+from metrics import instrument
 from langchain_core.tools import tool
 from langchain_core.messages import AIMessage, HumanMessage
 
@@ -31,37 +33,33 @@ def multiply(a: int, b: int) -> int:
 
 def draw_graph(graph):
     try:
-        img = Image(graph.get_graph().draw_mermaid_png())
-        with open("2_chain.png", "wb") as fout:
-            fout.write(img.data)
+        render_graph(graph, "2_chain.png")
     except Exception as e:
         print(e)
 
 # This is a Node
 # Nodes take current graph state as input and operate on the state
 def tool_calling_llm(state: State):
-    print('At llm with tools node')
-    llm = AzureChatOpenAI(
-        azure_deployment="gpt-4o",
-        api_version="2025-03-01-preview",
-        temperature=0,
-        max_tokens=None,
-        timeout=None,
-        max_retries=2
-    )
-    tools = [multiply]
-    llm_with_tools = llm.bind_tools(tools)
+    # Shared client, built and bound to its tools once per process
+    llm_with_tools = get_llm_with_tools([multiply])
     # Messages are appended instead of overwritten 
     return {"messages": [llm_with_tools.invoke(state["messages"])]}
 
 
-if __name__ == '__main__':
+def build_graph(checkpointer=None):
     # Build graph
     builder = StateGraph(State)
     builder.add_node("tool_calling_llm", tool_calling_llm)
     builder.add_edge(START, "tool_calling_llm")
     builder.add_edge("tool_calling_llm", END)
-    graph = builder.compile()
+    return instrument(builder).compile(checkpointer=checkpointer)
+
+# Shared compiled instance: graph_registry.get_graph("chain")
+register_graph("chain", build_graph)
+
+
+if __name__ == '__main__':
+    graph = build_graph()
 
     # Draw graph
     draw_graph(graph)
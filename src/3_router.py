@@ -1,10 +1,12 @@
 from langgraph.graph import StateGraph, START, END
 from typing_extensions import TypedDict
 import os
-from IPython.display import Image
+from graph_render import render_graph
 from typing import Annotated
 from langgraph.graph.message import add_messages
-from langchain_openai import AzureChatOpenAI
+from llm_clients import get_llm_with_tools
+from graph_registry import register_graph
+from metrics import instrument, track_tool
 from langchain_core.tools import tool
 from langgraph.prebuilt import ToolNode
 from langgraph.prebuilt import tools_condition
@@ -18,6 +20,7 @@ class State(TypedDict):
     # (in this case, it appends messages to the list, rather than overwriting them)
     messages: Annotated[list, add_messages]
 
+@track_tool
 @tool
 def multiply(a: int, b: int) -> int:
     """Multiply a and b.
@@ -30,30 +33,19 @@ def multiply(a: int, b: int) -> int:
 
 def draw_graph(graph):
     try:
-        img = Image(graph.get_graph().draw_mermaid_png())
-        with open("3_router.png", "wb") as fout:
-            fout.write(img.data)
+        render_graph(graph, "3_router.png")
     except Exception as e:
         print(e)
 
 # This is a Node
 # Nodes take current graph state as input and operate on the state
 def tool_calling_llm(state: State):
-    print('At tool_calling_llm node')
-    llm = AzureChatOpenAI(
-        azure_deployment="gpt-4o",
-        api_version="2025-03-01-preview",
-        temperature=0,
-        max_tokens=None,
-        timeout=None,
-        max_retries=2
-    )
-    tools = [multiply]
-    llm_with_tools = llm.bind_tools(tools)
+    # Shared client, built and bound to its tools once per process
+    llm_with_tools = get_llm_with_tools([multiply])
     return {"messages": [llm_with_tools.invoke(state["messages"])]}
 
 
-if __name__ == '__main__':
+def build_graph(checkpointer=None):
     # Build graph
     builder = StateGraph(State)
     builder.add_node("tool_calling_llm", tool_calling_llm)
@@ -66,7 +58,14 @@ if __name__ == '__main__':
         tools_condition,
     )
     builder.add_edge("tools", END)
-    graph = builder.compile()
+    return instrument(builder).compile(checkpointer=checkpointer)
+
+# Shared compiled instance: graph_registry.get_graph("router")
+register_graph("router", build_graph)
+
+
+if __name__ == '__main__':
+    graph = build_graph()
 
     # Draw graph
     # draw_graph(graph)
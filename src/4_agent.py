@@ -1,23 +1,27 @@
 from langgraph.graph import StateGraph, START, END
 from typing_extensions import TypedDict
 import os
-from IPython.display import Image
+from graph_render import render_graph
 from typing import Annotated
 from langgraph.graph.message import add_messages
-from langchain_openai import AzureChatOpenAI
+from graph_registry import register_graph
+from llm_clients import get_llm_with_tools
+from history import HistoryWindow
+from parallel_tools import ParallelToolNode
 from langchain_core.tools import tool
-from langgraph.prebuilt import ToolNode
-from langgraph.prebuilt import tools_condition
+from tool_cache import pure
+from metrics import instrument, track_tool
+from budget import Budget, BudgetGuard, charge_tokens, charge_tool_calls, current_usage
+from speculative_tools import astream_and_speculate, stream_and_speculate
 from langchain_core.messages import HumanMessage, SystemMessage
+from langchain_core.runnables import RunnableLambda
 
 os.environ["AZURE_OPENAI_API_KEY"]="api_key"
 os.environ["AZURE_OPENAI_ENDPOINT"]="endpoint"
 
 def draw_graph(graph):
     try:
-        img = Image(graph.get_graph().draw_mermaid_png())
-        with open("4_agent.png", "wb") as fout:
-            fout.write(img.data)
+        render_graph(graph, "4_agent.png")
     except Exception as e:
         print(e)
 
@@ -26,7 +30,13 @@ class State(TypedDict):
     # in the annotation defines how this state key should be updated
     # (in this case, it appends messages to the list, rather than overwriting them)
     messages: Annotated[list, add_messages]
+    # Rolling summary and window bookkeeping used to keep the prompt under a token budget (see history.py)
+    history: dict
+    # Time, tokens and tool calls used by the current invocation, checked against its budget (see budget.py)
+    budget: dict
 
+@track_tool
+@pure
 @tool
 def multiply(a: int, b: int) -> int:
     """Multiply a and b.
@@ -37,6 +47,8 @@ def multiply(a: int, b: int) -> int:
     """
     return a * b
 
+@track_tool
+@pure
 @tool
 def add(a: int, b: int) -> int:
     """Adds a and b.
@@ -47,6 +59,8 @@ def add(a: int, b: int) -> int:
     """
     return a + b
 
+@track_tool
+@pure
 @tool
 def divide(a: int, b: int) -> float:
     """Divide a and b.
@@ -57,32 +71,74 @@ def divide(a: int, b: int) -> float:
     """
     return a / b
 
+# The tools are pure, so repeated calls are served from the process-wide cache in tool_cache.py
 tools = [add, multiply, divide]
 
-# The Assistant node is just our model with bound tools.
-# Nodes take current graph state as input and operate on the state
-def assistant(state: State):
-    # System message
-    sys_msg = SystemMessage(content="You are a helpful assistant tasked with performing arithmetic on a set of inputs.")
-    llm = AzureChatOpenAI(
-        azure_deployment="gpt-4o",
-        api_version="2025-03-01-preview",
-        temperature=0,
-        max_tokens=None,
-        timeout=None,
-        max_retries=2
-    )
-    llm_with_tools = llm.bind_tools(tools)
-    return {"messages": [llm_with_tools.invoke([sys_msg] + state["messages"])]}
+# System message
+sys_msg = SystemMessage(content="You are a helpful assistant tasked with performing arithmetic on a set of inputs.")
 
+# Runs all tool calls of an assistant turn concurrently, in place of ToolNode(tools)
+tool_node = ParallelToolNode(tools, max_workers=8, timeout=30)
 
-if __name__ == '__main__':
+# SPECULATIVE_TOOLS=1 streams the model and starts each tool call as soon as its arguments are complete,
+# while the rest of the message is still being generated (see speculative_tools.py)
+speculative_tools = os.environ.get("SPECULATIVE_TOOLS") == "1"
+
+# Trims the prompt to the most recent turns and folds older ones into a rolling summary
+history_window = HistoryWindow(max_tokens=3000)
+
+# Ends a request early, with an answer, once it has used up its time, tokens or tool calls.
+# Pass {"configurable": {"budget": Budget(...)}} to invoke to set other limits for one request.
+budget_guard = BudgetGuard(Budget(max_seconds=60, max_prompt_tokens=50_000, max_completion_tokens=5_000, max_tool_calls=20))
+
+# The Assistant node is just our model with bound tools.
+# Nodes take current graph state as input and operate on the state
+def assistant(state: State, config):
+    # Taken first, so the time budget of a new request includes its summarization and first model call
+    usage = current_usage(state)
+    prompt, history, summary = history_window.prepare(sys_msg, state)
+    usage = charge_tokens(usage, summary)
+    # Shared client, built and bound to its tools once per process
+    llm_with_tools = get_llm_with_tools(tools)
+    if speculative_tools:
+        message = stream_and_speculate(llm_with_tools, prompt, tool_node, config)
+    else:
+        message = llm_with_tools.invoke(prompt)
+    return {"messages": [message], "history": history, "budget": charge_tokens(usage, message)}
+
+# Async version of the Assistant node, used when the graph runs with ainvoke / astream.
+# Awaiting the model lets one process serve many conversations while each waits on its LLM call.
+async def aassistant(state: State, config):
+    usage = current_usage(state)
+    prompt, history, summary = await history_window.aprepare(sys_msg, state)
+    usage = charge_tokens(usage, summary)
+    llm_with_tools = get_llm_with_tools(tools)
+    if speculative_tools:
+        message = await astream_and_speculate(llm_with_tools, prompt, tool_node, config)
+    else:
+        message = await llm_with_tools.ainvoke(prompt)
+    return {"messages": [message], "history": history, "budget": charge_tokens(usage, message)}
+
+def run_tools(state: State, config):
+    result = tool_node(state, config)
+    return dict(result, budget=charge_tool_calls(current_usage(state), len(result["messages"])))
+
+async def arun_tools(state: State, config):
+    result = await tool_node.acall(state, config)
+    return dict(result, budget=charge_tool_calls(current_usage(state), len(result["messages"])))
+
+
+def build_graph(checkpointer=None):
     # Graph for a basic ReAct agent
     builder = StateGraph(State)
 
     # Define nodes: these do the work
-    builder.add_node("assistant", assistant)
-    builder.add_node("tools", ToolNode(tools))
+    # The sync node runs under invoke / stream, the async one under ainvoke / astream
+    builder.add_node("assistant", RunnableLambda(assistant, afunc=aassistant))
+    # Several tool calls in one assistant turn run at the same time (see parallel_tools.py)
+    builder.add_node("tools", RunnableLambda(run_tools, afunc=arun_tools))
+    # Gives the answer when a request runs out of budget
+    builder.add_node("budget_exceeded", budget_guard.answer)
 
     # Define edges: these determine how the control flow moves
     builder.add_edge(START, "assistant")
@@ -90,16 +146,26 @@ if __name__ == '__main__':
         "assistant",
         # If the latest message (result) from assistant is a tool call -> tools_condition routes to tools
         # If the latest message (result) from assistant is a not a tool call -> tools_condition routes to END
-        tools_condition,
+        # If the tool calls would go over the request's budget -> the guard routes to budget_exceeded
+        budget_guard.after_assistant,
+        ["tools", "budget_exceeded", END],
     )
     # Add an edge from the tools node back to the LLM, forming a cycle.
     # After the assistant node executes, tools_condition checks if the model's output is a tool call.
     # If it is a tool call, the flow is directed to the tools node.
     # The tools node connects back to assistant.
-    # This loop continues as long as the model decides to call tools.
+    # This loop continues as long as the model decides to call tools, and the budget lasts.
     # If the model response is not a tool call, the flow is directed to END, terminating the process.
-    builder.add_edge("tools", "assistant")
-    react_graph = builder.compile()
+    builder.add_conditional_edges("tools", budget_guard.after_tools, ["assistant", "budget_exceeded"])
+    builder.add_edge("budget_exceeded", END)
+    return instrument(builder).compile(checkpointer=checkpointer)
+
+# Shared compiled instances: graph_registry.get_graph("react_agent", checkpointer=...)
+register_graph("react_agent", build_graph)
+
+
+if __name__ == '__main__':
+    react_graph = build_graph()
 
     # Draw
     draw_graph(react_graph)
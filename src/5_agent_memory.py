@@ -1,24 +1,28 @@
 from langgraph.graph import StateGraph, START, END
 from typing_extensions import TypedDict
 import os
-from IPython.display import Image
+from graph_render import render_graph
 from typing import Annotated
 from langgraph.graph.message import add_messages
-from langchain_openai import AzureChatOpenAI
+from graph_registry import get_graph, register_graph
+from llm_clients import get_llm_with_tools
+from history import HistoryWindow
 from langchain_core.tools import tool
+from tool_cache import pure
+from metrics import instrument, track_tool
 from langgraph.prebuilt import ToolNode
 from langgraph.prebuilt import tools_condition
 from langchain_core.messages import HumanMessage, SystemMessage
-from langgraph.checkpoint.memory import MemorySaver
+from langchain_core.runnables import RunnableLambda
+from bounded_memory import BoundedMemorySaver
+from compact_serde import CompactSerializer
 
 os.environ["AZURE_OPENAI_API_KEY"]="api_key"
 os.environ["AZURE_OPENAI_ENDPOINT"]="endpoint"
 
 def draw_graph(graph):
     try:
-        img = Image(graph.get_graph().draw_mermaid_png())
-        with open("5_agent_memory.png", "wb") as fout:
-            fout.write(img.data)
+        render_graph(graph, "5_agent_memory.png")
     except Exception as e:
         print(e)
 
@@ -27,7 +31,11 @@ class State(TypedDict):
     # in the annotation defines how this state key should be updated
     # (in this case, it appends messages to the list, rather than overwriting them)
     messages: Annotated[list, add_messages]
+    # Rolling summary and window bookkeeping used to keep the prompt under a token budget (see history.py)
+    history: dict
 
+@track_tool
+@pure
 @tool
 def multiply(a: int, b: int) -> int:
     """Multiply a and b.
@@ -38,6 +46,8 @@ def multiply(a: int, b: int) -> int:
     """
     return a * b
 
+@track_tool
+@pure
 @tool
 def add(a: int, b: int) -> int:
     """Adds a and b.
@@ -48,6 +58,8 @@ def add(a: int, b: int) -> int:
     """
     return a + b
 
+@track_tool
+@pure
 @tool
 def divide(a: int, b: int) -> float:
     """Divide a and b.
@@ -58,31 +70,38 @@ def divide(a: int, b: int) -> float:
     """
     return a / b
 
+# The tools are pure, so repeated calls are served from the process-wide cache in tool_cache.py
 tools = [add, multiply, divide]
 
+# System message
+sys_msg = SystemMessage(content="You are a helpful assistant tasked with performing arithmetic on a set of inputs.")
+
+# Trims the prompt to the most recent turns and folds older ones into a rolling summary
+history_window = HistoryWindow(max_tokens=3000)
+
 # The Assistant node is just our model with bound tools.
 # Nodes take current graph state as input and operate on the state
 def assistant(state: State):
-    # System message
-    sys_msg = SystemMessage(content="You are a helpful assistant tasked with performing arithmetic on a set of inputs.")
-    llm = AzureChatOpenAI(
-        azure_deployment="gpt-4o",
-        api_version="2025-03-01-preview",
-        temperature=0,
-        max_tokens=None,
-        timeout=None,
-        max_retries=2
-    )
-    llm_with_tools = llm.bind_tools(tools)
-    return {"messages": [llm_with_tools.invoke([sys_msg] + state["messages"])]}
+    prompt, history, _ = history_window.prepare(sys_msg, state)
+    # Shared client, built and bound to its tools once per process
+    llm_with_tools = get_llm_with_tools(tools)
+    return {"messages": [llm_with_tools.invoke(prompt)], "history": history}
 
+# Async version of the Assistant node, used when the graph runs with ainvoke / astream.
+# Awaiting the model lets one process serve many conversations while each waits on its LLM call.
+async def aassistant(state: State):
+    prompt, history, _ = await history_window.aprepare(sys_msg, state)
+    llm_with_tools = get_llm_with_tools(tools)
+    return {"messages": [await llm_with_tools.ainvoke(prompt)], "history": history}
 
-if __name__ == '__main__':
+
+def build_graph(checkpointer=None):
     # Graph for a basic ReAct agent
     builder = StateGraph(State)
 
     # Define nodes: these do the work
-    builder.add_node("assistant", assistant)
+    # The sync node runs under invoke / stream, the async one under ainvoke / astream
+    builder.add_node("assistant", RunnableLambda(assistant, afunc=aassistant))
     builder.add_node("tools", ToolNode(tools))
 
     # Define edges: these determine how the control flow moves
@@ -100,7 +119,14 @@ if __name__ == '__main__':
     # This loop continues as long as the model decides to call tools.
     # If the model response is not a tool call, the flow is directed to END, terminating the process.
     builder.add_edge("tools", "assistant")
-    react_graph = builder.compile()
+    return instrument(builder).compile(checkpointer=checkpointer)
+
+# Shared compiled instances: graph_registry.get_graph("memory_agent", checkpointer=...)
+register_graph("memory_agent", build_graph)
+
+
+if __name__ == '__main__':
+    react_graph = get_graph("memory_agent")
 
 
     # Let's illustrate the problems due to lack of memory
@@ -124,8 +150,12 @@ if __name__ == '__main__':
     # One of the easiest checkpointers to use is the MemorySaver, an in-memory key-value store for Graph state.
     # Compile the graph with a checkpointer, and our graph has memory!
     # When we use memory, we need to specify a thread_id.
-    memory = MemorySaver()
-    react_graph_memory = builder.compile(checkpointer=memory)
+    # MemorySaver keeps every checkpoint of every thread for the life of the process.
+    # For long-running processes, BoundedMemorySaver is a drop-in replacement that caps threads, checkpoints and bytes.
+    # CompactSerializer writes the message list about 2.5x smaller and faster than the default serializer.
+    memory = BoundedMemorySaver(max_threads=10_000, max_checkpoints_per_thread=20, idle_ttl=3600, serde=CompactSerializer())
+    # The registry compiles one graph per checkpointer and reuses it for every later request
+    react_graph_memory = get_graph("memory_agent", checkpointer=memory)
 
     # Specify a thread
     config = {"configurable": {"thread_id": "1"}}
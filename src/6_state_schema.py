@@ -3,18 +3,20 @@ from typing_extensions import TypedDict
 import random
 from typing import Literal
 import os
-from IPython.display import Image
+from graph_render import render_graph
+from functools import partial
+from graph_registry import get_graph, register_graph
 from dataclasses import dataclass
 from pydantic import BaseModel, field_validator, ValidationError
+from state_validation import StateValidator
+from metrics import instrument
 
 os.environ["AZURE_OPENAI_API_KEY"]="api_key"
 os.environ["AZURE_OPENAI_ENDPOINT"]="endpoint"
 
 def draw_graph(graph):
     try:
-        img = Image(graph.get_graph().draw_mermaid_png())
-        with open("1_simple_graph.png", "wb") as fout:
-            fout.write(img.data)
+        render_graph(graph, "1_simple_graph.png")
     except Exception as e:
         print(e)
 
@@ -50,16 +52,13 @@ class PydanticState(BaseModel):
 # Nodes
 # Nodes accept the graph state as input and operate on the state
 def node_1(state):
-    print("---Node 1---")
     return {"name": state['name'] + " is ... "}
 
 def node_2(state):
-    print("---Node 2---")
     # Update state['mood'] by returning a dict
     return {"mood": "happy"}
 
 def node_3(state):
-    print("---Node 3---")
     # Update state['mood'] by returning a dict
     return {"mood": "sad"}
 
@@ -74,12 +73,16 @@ def decide_mood(state) -> Literal["node_2", "node_3"]:
     # 50% of the time, we return Node 3
     return "node_3"
 
-if __name__=='__main__':
-    # Build graph with TypedDict state
-    builder = StateGraph(State)
-    builder.add_node("node_1", node_1)
-    builder.add_node("node_2", node_2)
-    builder.add_node("node_3", node_3)
+def build_graph(state_schema, checkpointer=None, validation=None):
+    # Build graph with the given state schema.
+    # For a Pydantic schema, validation="updates" or "boundaries" validates only what is written,
+    # instead of the whole state at every step (see state_validation.py)
+    validator = StateValidator(state_schema, mode=validation) if validation else None
+    builder = StateGraph(validator.schema if validator else state_schema)
+    wrap = validator.node if validator else (lambda node: node)
+    builder.add_node("node_1", wrap(node_1))
+    builder.add_node("node_2", wrap(node_2))
+    builder.add_node("node_3", wrap(node_3))
 
     # Logic
     builder.add_edge(START, "node_1")
@@ -88,7 +91,17 @@ if __name__=='__main__':
     builder.add_edge("node_3", END)
 
     # Add
-    graph = builder.compile()
+    graph = instrument(builder).compile(checkpointer=checkpointer)
+    return validator.wrap(graph) if validator else graph
+
+# Shared compiled instances, one per schema: graph_registry.get_graph("schema_typeddict")
+register_graph("schema_typeddict", partial(build_graph, State))
+register_graph("schema_dataclass", partial(build_graph, DataclassState))
+register_graph("schema_pydantic", partial(build_graph, PydanticState))
+
+if __name__=='__main__':
+    # Build graph with TypedDict state
+    graph = get_graph("schema_typeddict")
 
     # Invoke
     result = graph.invoke({"name" : "Lance"})
@@ -103,20 +116,16 @@ if __name__=='__main__':
         print("Validation Error:", e)
 
     # Build graph with PydanticState
-    pydantic_builder = StateGraph(PydanticState)
-    pydantic_builder.add_node("node_1", node_1)
-    pydantic_builder.add_node("node_2", node_2)
-    pydantic_builder.add_node("node_3", node_3)
-
-    # Logic
-    pydantic_builder.add_edge(START, "node_1")
-    pydantic_builder.add_conditional_edges("node_1", decide_mood)
-    pydantic_builder.add_edge("node_2", END)
-    pydantic_builder.add_edge("node_3", END)
-
-    # Add
-    pydantic_graph = pydantic_builder.compile()
+    pydantic_graph = get_graph("schema_pydantic")
 
     # Wrong mood value
     result = graph.invoke(PydanticState(name="Lance",mood="sad"))
-    print(result)
\ No newline at end of file
+    print(result)
+
+    # Validate only the keys each node returns, rather than the whole state at every step
+    fast_graph = get_graph("schema_pydantic", validation="updates")
+    print(fast_graph.invoke({"name": "Lance"}))
+    try:
+        fast_graph.invoke({"name": "Lance", "mood": "mad"})
+    except ValidationError as e:
+        print("Validation Error:", e)
\ No newline at end of file
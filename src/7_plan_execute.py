@@ -0,0 +1,190 @@
+from langgraph.graph import StateGraph, START, END
+from typing_extensions import TypedDict
+import os
+from graph_render import render_graph
+from typing import Annotated, Literal, Union
+from langgraph.graph.message import add_messages
+from graph_registry import register_graph
+from metrics import instrument, track_tool
+from llm_clients import get_llm, get_llm_with_tools
+from langchain_core.tools import tool
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage, ToolMessage
+from pydantic import BaseModel, Field
+
+os.environ["AZURE_OPENAI_API_KEY"]="api_key"
+os.environ["AZURE_OPENAI_ENDPOINT"]="endpoint"
+
+def draw_graph(graph):
+    try:
+        render_graph(graph, "7_plan_execute.png")
+    except Exception as e:
+        print(e)
+
+# The ReAct agent in 4_agent.py calls the LLM once per tool call, plus once for the final answer.
+# For "Add 3 and 4. Multiply the output by 2. Divide the output by 5" that is 4 LLM round trips.
+# In plan-and-execute mode the LLM writes the whole plan up front, a local executor runs it,
+# and the LLM is called again only for the final answer: 2 round trips, however long the chain.
+# If a step fails, the planner is called again with the error to re-plan.
+
+class State(TypedDict):
+    # Messages have the type "list". The `add_messages` function
+    # in the annotation defines how this state key should be updated
+    # (in this case, it appends messages to the list, rather than overwriting them)
+    messages: Annotated[list, add_messages]
+    # The plan written by the planner, a list of {"tool": ..., "args": ...} steps
+    plan: list
+    # Error message of the last failed plan, if any
+    error: str
+    # Number of times the planner was asked to re-plan in the current turn
+    replans: int
+
+@track_tool
+@tool
+def multiply(a: int, b: int) -> int:
+    """Multiply a and b.
+
+    Args:
+        a: first int
+        b: second int
+    """
+    return a * b
+
+@track_tool
+@tool
+def add(a: int, b: int) -> int:
+    """Adds a and b.
+
+    Args:
+        a: first int
+        b: second int
+    """
+    return a + b
+
+@track_tool
+@tool
+def divide(a: int, b: int) -> float:
+    """Divide a and b.
+
+    Args:
+        a: first int
+        b: second int
+    """
+    return a / b
+
+tools = [add, multiply, divide]
+tools_by_name = {t.name: t for t in tools}
+
+# Give up re-planning after this many failed plans and answer with what we have
+MAX_REPLANS = 2
+
+# The planner answers by "calling" this schema.
+# A step argument can be a number or "$N", the result of step N (counting from 0).
+class PlanStep(BaseModel):
+    tool: str = Field(description="Name of the tool to call")
+    args: dict[str, Union[float, str]] = Field(description='Tool arguments. Use "$N" to pass the result of step N (0-based)')
+
+class Plan(BaseModel):
+    """A dependency-ordered list of tool calls that answers the user's request."""
+    steps: list[PlanStep]
+
+tool_descriptions = "\n".join(f"- {t.name}{list(t.args)}: {t.description.splitlines()[0]}" for t in tools)
+
+planner_msg = SystemMessage(content=(
+    "You are a helpful assistant tasked with performing arithmetic on a set of inputs. "
+    "Answer with a Plan: the tool calls needed to answer the latest request, in order. "
+    "Use \"$N\" as an argument to pass the result of step N to a later step. "
+    "If no tool is needed, answer directly.\n"
+    f"Available tools:\n{tool_descriptions}"
+))
+
+answer_msg = SystemMessage(content="You are a helpful assistant tasked with performing arithmetic on a set of inputs. "
+                                   "Answer the latest request using the tool results.")
+
+# The Planner node is the model with the Plan schema bound as its only tool
+def planner(state: State):
+    # A new user message starts a new turn, with no failed plan and a fresh count of re-plans
+    new_turn = isinstance(state["messages"][-1], HumanMessage)
+    error = "" if new_turn else state.get("error")
+    replans = 0 if new_turn else state.get("replans", 0)
+    messages = [planner_msg] + state["messages"]
+    if error:
+        messages.append(SystemMessage(content=f"The previous plan failed: {error}. Write a new plan."))
+    response = get_llm_with_tools([Plan]).invoke(messages)
+    plan_calls = [tc for tc in response.tool_calls if tc["name"] == "Plan"]
+    if not plan_calls:
+        # No tools needed, the model answered directly
+        return {"messages": [response], "plan": [], "error": "", "replans": replans}
+    return {"plan": plan_calls[0]["args"]["steps"], "error": "", "replans": replans + (1 if error else 0)}
+
+def resolve(value, results):
+    # Replace "$N" references with the result of step N
+    if isinstance(value, str) and value.startswith("$"):
+        return results[int(value[1:])]
+    return value
+
+# The Executor node runs the plan locally, feeding each result into the steps that reference it.
+# It records the calls and results as an AIMessage with tool calls followed by ToolMessages,
+# so the history reads exactly as if the model had called the tools itself.
+def executor(state: State):
+    results = []
+    tool_calls = []
+    tool_messages = []
+    error = ""
+    for i, step in enumerate(state["plan"]):
+        call = {"name": step["tool"], "args": step["args"], "id": f"plan_{len(state['messages'])}_{i}", "type": "tool_call"}
+        tool_calls.append(call)
+        try:
+            call["args"] = {k: resolve(v, results) for k, v in step["args"].items()}
+            output = tools_by_name[step["tool"]].invoke(call["args"])
+        except Exception as e:
+            error = f"step {i} ({step['tool']}) failed: {e!r}"
+            tool_messages.append(ToolMessage(content=f"Error: {error}", name=call["name"], tool_call_id=call["id"], status="error"))
+            break
+        results.append(output)
+        tool_messages.append(ToolMessage(content=str(output), name=call["name"], tool_call_id=call["id"]))
+    return {"messages": [AIMessage(content="", tool_calls=tool_calls)] + tool_messages, "error": error}
+
+# The Responder node is the model without tools, writing the final answer from the tool results
+def responder(state: State):
+    return {"messages": [get_llm().invoke([answer_msg] + state["messages"])]}
+
+# After planning: run the plan, or stop if the model answered directly
+def after_planner(state: State) -> Literal["executor", "__end__"]:
+    return "executor" if state["plan"] else END
+
+# After executing: answer, or re-plan if a step failed (up to MAX_REPLANS times)
+def after_executor(state: State) -> Literal["planner", "responder"]:
+    if state.get("error") and state.get("replans", 0) < MAX_REPLANS:
+        return "planner"
+    return "responder"
+
+
+def build_graph(checkpointer=None):
+    # Graph for a plan-and-execute agent
+    builder = StateGraph(State)
+    builder.add_node("planner", planner)
+    builder.add_node("executor", executor)
+    builder.add_node("responder", responder)
+
+    builder.add_edge(START, "planner")
+    builder.add_conditional_edges("planner", after_planner)
+    builder.add_conditional_edges("executor", after_executor)
+    builder.add_edge("responder", END)
+    return instrument(builder).compile(checkpointer=checkpointer)
+
+# Shared compiled instances: graph_registry.get_graph("plan_execute", checkpointer=...)
+register_graph("plan_execute", build_graph)
+
+
+if __name__ == '__main__':
+    plan_graph = build_graph()
+
+    # Draw
+    draw_graph(plan_graph)
+
+    # Invoke graph for input: one LLM call for the plan, one for the answer
+    messages = [HumanMessage(content="Add 3 and 4. Multiply the output by 2. Divide the output by 5")]
+    messages = plan_graph.invoke({"messages": messages})
+
+    for m in messages['messages']:
+        m.pretty_print()
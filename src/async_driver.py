@@ -0,0 +1,74 @@
+import asyncio
+import contextlib
+import time
+from langchain_core.messages import HumanMessage
+
+# Serves many independent conversations from one process on top of ainvoke / astream.
+# Each conversation is a thread_id: turns within a conversation run in order (they share
+# checkpointed history), while different conversations run concurrently. A semaphore caps how
+# many turns are in flight at once, so a burst of sessions can't open unbounded model calls.
+#
+#   driver = SessionDriver(react_graph_memory, max_concurrency=64)
+#   results = asyncio.run(driver.run_sessions({"1": ["Add 3 and 4.", "Multiply that by 2."]}))
+
+
+class SessionDriver:
+    def __init__(self, graph, max_concurrency=32):
+        self.graph = graph
+        self.max_concurrency = max_concurrency
+        self._semaphore = None
+        # thread_id -> [lock, turns holding or waiting for it]; dropped when the count reaches zero,
+        # so a driver that sees millions of thread ids only keeps locks for the ones in flight
+        self._locks = {}
+
+    def _config(self, thread_id):
+        return {"configurable": {"thread_id": thread_id}}
+
+    @contextlib.asynccontextmanager
+    async def _guards(self, thread_id):
+        # The semaphore is created lazily so the driver can be built outside the event loop it runs on
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        entry = self._locks.setdefault(thread_id, [asyncio.Lock(), 0])
+        entry[1] += 1
+        try:
+            async with entry[0], self._semaphore:
+                yield
+        finally:
+            entry[1] -= 1
+            if entry[1] == 0:
+                del self._locks[thread_id]
+
+    async def turn(self, thread_id, user_input):
+        # Run one user turn and return the final state
+        async with self._guards(thread_id):
+            return await self.graph.ainvoke({"messages": [HumanMessage(content=user_input)]}, self._config(thread_id))
+
+    async def stream_turn(self, thread_id, user_input, stream_mode="updates"):
+        # Run one user turn, yielding graph events as they are produced
+        async with self._guards(thread_id):
+            async for event in self.graph.astream(
+                {"messages": [HumanMessage(content=user_input)]}, self._config(thread_id), stream_mode=stream_mode
+            ):
+                yield event
+
+    async def run_session(self, thread_id, user_inputs):
+        results = []
+        for user_input in user_inputs:
+            results.append(await self.turn(thread_id, user_input))
+        return results
+
+    async def run_sessions(self, sessions):
+        # sessions maps thread_id -> list of user inputs; returns thread_id -> list of final states
+        thread_ids = list(sessions)
+        results = await asyncio.gather(*(self.run_session(t, sessions[t]) for t in thread_ids))
+        return dict(zip(thread_ids, results))
+
+
+async def measure_sessions(driver, sessions):
+    # Run the sessions and return (elapsed seconds, turns per second)
+    turns = sum(len(inputs) for inputs in sessions.values())
+    start = time.perf_counter()
+    await driver.run_sessions(sessions)
+    elapsed = time.perf_counter() - start
+    return elapsed, turns / elapsed
@@ -0,0 +1,234 @@
+import argparse
+import asyncio
+import importlib
+import json
+import os
+import sys
+import time
+from async_driver import SessionDriver
+from bounded_memory import BoundedMemorySaver
+from compact_serde import CompactSerializer
+
+os.environ.setdefault("AZURE_OPENAI_API_KEY", "api_key")
+os.environ.setdefault("AZURE_OPENAI_ENDPOINT", "endpoint")
+
+# Runs a JSONL file of prompts through one of the agent graphs.
+#
+#   python batch_runner.py prompts.jsonl results.jsonl --graph 4_agent --concurrency 32 --rate 20
+#
+# Each input line is {"prompt": "...", "id": ..., "thread_id": ...}; only "prompt" is required.
+# With --memory the graph gets a BoundedMemorySaver and lines sharing a thread_id continue the same
+# conversation, in file order. Each output line is
+#   {"line": n, "id": ..., "thread_id": ..., "output": final answer, "latency": seconds}
+# or the same with "error" in place of "output".
+#
+# Memory stays flat however long the input is: lines are read as workers free up (at most
+# 2 x concurrency are buffered), and results are appended and flushed as soon as they finish.
+# The output file doubles as the progress log. Running the same command again after a crash skips
+# every line that already has a successful result and retries the ones that failed.
+# Not with --memory: the conversations lived in the crashed process, so a resumed run would continue them
+# on an empty checkpointer, and a retried line would run after the later lines of its thread that had
+# already succeeded. An output file that already has results is refused with --memory.
+# Results arrive out of order, so settled lines (with a result, or blank) are tracked as "everything
+# below a watermark" plus the few settled lines above it, and the lines that failed in a set of their own
+# to retry, which keeps that bookkeeping small too.
+
+
+class RateLimiter:
+    # Token bucket: at most `rate` acquisitions per second on average, bursts of up to `burst`
+    def __init__(self, rate, burst=None):
+        self.rate = rate
+        self.burst = burst or max(1, int(rate))
+        self._tokens = self.burst
+        self._updated = time.monotonic()
+        self._lock = None
+
+    async def acquire(self):
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+class Progress:
+    # Set of completed line numbers, stored as a watermark (all lines below it are settled) plus the rest.
+    # Failed lines count as settled, so they don't hold the watermark back, and are kept apart to be retried.
+    def __init__(self):
+        self.watermark = 0
+        self.done = set()
+        self.failed = set()
+
+    def add(self, line, failed=False):
+        if failed:
+            self.failed.add(line)
+        else:
+            self.failed.discard(line)
+        if line < self.watermark:
+            return
+        self.done.add(line)
+        while self.watermark in self.done:
+            self.done.remove(self.watermark)
+            self.watermark += 1
+
+    def __contains__(self, line):
+        return (line < self.watermark or line in self.done) and line not in self.failed
+
+
+def load_progress(path, input_path=None):
+    # Reads the completed lines back from a previous run's output.
+    # A crash can leave a partly written last line, which is cut off so appending starts clean.
+    progress = Progress()
+    if not os.path.exists(path):
+        return progress
+    if input_path is not None:
+        # Blank input lines have no result; marked first so the watermark can pass them
+        with open(input_path, encoding="utf-8") as source:
+            for line, raw in enumerate(source):
+                if not raw.strip():
+                    progress.add(line)
+    valid = 0
+    with open(path, "rb") as f:
+        for raw in f:
+            if not raw.endswith(b"\n"):
+                break
+            valid += len(raw)
+            try:
+                record = json.loads(raw)
+            except ValueError:
+                continue
+            progress.add(record["line"], failed="error" in record)
+    if valid != os.path.getsize(path):
+        with open(path, "r+b") as f:
+            f.truncate(valid)
+    return progress
+
+
+class BatchRunner:
+    def __init__(self, graph, concurrency=32, rate=None, burst=None, report_every=10.0, out=sys.stderr):
+        self.driver = SessionDriver(graph, max_concurrency=concurrency)
+        self.concurrency = concurrency
+        self.limiter = RateLimiter(rate, burst) if rate else None
+        self.report_every = report_every
+        self.out = out
+        self.stats = {"done": 0, "errors": 0, "skipped": 0, "latency": 0.0, "max_latency": 0.0}
+
+    async def _run_item(self, line, raw):
+        record = {"line": line}
+        start = time.perf_counter()
+        try:
+            item = json.loads(raw)
+            record["id"] = item.get("id", line)
+            record["thread_id"] = str(item.get("thread_id", f"batch-{line}"))
+            if self.limiter is not None:
+                await self.limiter.acquire()
+            start = time.perf_counter()
+            state = await self.driver.turn(record["thread_id"], item["prompt"])
+            record["output"] = state["messages"][-1].content
+        except Exception as e:
+            record["error"] = repr(e)
+        record["latency"] = round(time.perf_counter() - start, 6)
+        return record
+
+    async def run(self, input_path, output_path):
+        progress = load_progress(output_path, input_path)
+        queue = asyncio.Queue(maxsize=2 * self.concurrency)
+        started = time.perf_counter()
+
+        with open(input_path, encoding="utf-8") as source, open(output_path, "a", encoding="utf-8") as sink:
+            async def worker():
+                while True:
+                    entry = await queue.get()
+                    if entry is None:
+                        return
+                    record = await self._run_item(*entry)
+                    sink.write(json.dumps(record, default=str) + "\n")
+                    sink.flush()
+                    self._count(record)
+
+            async def reporter():
+                while True:
+                    await asyncio.sleep(self.report_every)
+                    self.report(time.perf_counter() - started)
+
+            workers = [asyncio.create_task(worker()) for _ in range(self.concurrency)]
+            report_task = asyncio.create_task(reporter()) if self.report_every else None
+            try:
+                for line, raw in enumerate(source):
+                    if not raw.strip():
+                        continue
+                    if line in progress:
+                        self.stats["skipped"] += 1
+                        continue
+                    await queue.put((line, raw))
+                for _ in workers:
+                    await queue.put(None)
+                await asyncio.gather(*workers)
+            finally:
+                for task in workers:
+                    task.cancel()
+                if report_task is not None:
+                    report_task.cancel()
+        elapsed = time.perf_counter() - started
+        self.report(elapsed)
+        return self.summary(elapsed)
+
+    def _count(self, record):
+        self.stats["done"] += 1
+        if "error" in record:
+            self.stats["errors"] += 1
+        self.stats["latency"] += record["latency"]
+        self.stats["max_latency"] = max(self.stats["max_latency"], record["latency"])
+
+    def summary(self, elapsed):
+        done = self.stats["done"]
+        return {
+            "done": done,
+            "errors": self.stats["errors"],
+            "skipped": self.stats["skipped"],
+            "elapsed": elapsed,
+            "items_per_second": done / elapsed if elapsed else 0.0,
+            "mean_latency": self.stats["latency"] / done if done else 0.0,
+            "max_latency": self.stats["max_latency"],
+        }
+
+    def report(self, elapsed):
+        s = self.summary(elapsed)
+        print(f"[{elapsed:8.1f} s] done={s['done']} errors={s['errors']} skipped={s['skipped']} "
+              f"{s['items_per_second']:.1f} items/s  mean latency={s['mean_latency'] * 1e3:.1f} ms",
+              file=self.out, flush=True)
+
+
+def load_graph(module_name, memory=False):
+    module = importlib.import_module(module_name)
+    if memory:
+        return module.build_graph(checkpointer=BoundedMemorySaver(max_threads=10_000, max_checkpoints_per_thread=20, idle_ttl=3600,
+                                                                  serde=CompactSerializer()))
+    return module.build_graph()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Run a JSONL file of prompts through an agent graph")
+    parser.add_argument("input")
+    parser.add_argument("output")
+    parser.add_argument("--graph", default="4_agent", help="module with a build_graph() factory")
+    parser.add_argument("--memory", action="store_true", help="checkpoint conversations by thread_id")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--rate", type=float, default=None, help="max requests started per second")
+    parser.add_argument("--burst", type=int, default=None)
+    parser.add_argument("--report-every", type=float, default=10.0, help="seconds between progress lines, 0 for none")
+    args = parser.parse_args()
+    if args.memory and os.path.exists(args.output) and os.path.getsize(args.output):
+        parser.error(f"{args.output} already has results: a resumed --memory run would lose the earlier turns "
+                     "of every conversation, write to a new file")
+
+    runner = BatchRunner(load_graph(args.graph, args.memory), concurrency=args.concurrency,
+                         rate=args.rate, burst=args.burst, report_every=args.report_every)
+    summary = asyncio.run(runner.run(args.input, args.output))
+    print(json.dumps(summary))
@@ -0,0 +1,55 @@
+import argparse
+import asyncio
+import contextlib
+import importlib
+import io
+import os
+import time
+from langchain_core.messages import HumanMessage
+from langgraph.checkpoint.memory import MemorySaver
+from async_driver import SessionDriver, measure_sessions
+from fake_llm import use_fake_llm
+
+os.environ.setdefault("AZURE_OPENAI_API_KEY", "api_key")
+os.environ.setdefault("AZURE_OPENAI_ENDPOINT", "endpoint")
+
+# Throughput of the memory agent as the number of concurrent conversations grows.
+# Every session runs the two turns from 5_agent_memory.py against the fake model, which sleeps
+# --latency seconds per call. The sync baseline runs the same sessions one after another with invoke.
+
+TURNS = ["Add 3 and 4.", "Multiply that by 2."]
+
+def make_sessions(n, prefix):
+    return {f"{prefix}-{i}": TURNS for i in range(n)}
+
+def sync_baseline(graph, sessions):
+    start = time.perf_counter()
+    for thread_id, inputs in sessions.items():
+        for user_input in inputs:
+            graph.invoke({"messages": [HumanMessage(content=user_input)]}, {"configurable": {"thread_id": thread_id}})
+    elapsed = time.perf_counter() - start
+    return elapsed, sum(len(i) for i in sessions.values()) / elapsed
+
+async def main(args):
+    with contextlib.redirect_stdout(io.StringIO()):
+        agent = importlib.import_module("5_agent_memory")
+    graph = agent.build_graph(checkpointer=MemorySaver())
+
+    elapsed, tps = sync_baseline(graph, make_sessions(args.baseline_sessions, "sync"))
+    print(f"{'sync invoke':<14} sessions={args.baseline_sessions:<5} {elapsed:7.2f} s  {tps:8.1f} turns/s")
+
+    for n in args.sessions:
+        driver = SessionDriver(graph, max_concurrency=args.max_concurrency)
+        elapsed, tps = await measure_sessions(driver, make_sessions(n, f"async{n}"))
+        print(f"{'async driver':<14} sessions={n:<5} {elapsed:7.2f} s  {tps:8.1f} turns/s")
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Benchmark concurrent sessions on the memory agent")
+    parser.add_argument("--latency", type=float, default=0.05, help="fake model latency in seconds")
+    parser.add_argument("--sessions", type=int, nargs="*", default=[1, 4, 16, 64, 256])
+    parser.add_argument("--baseline-sessions", type=int, default=4)
+    parser.add_argument("--max-concurrency", type=int, default=128)
+    args = parser.parse_args()
+
+    use_fake_llm(latency=args.latency)
+    asyncio.run(main(args))
@@ -0,0 +1,65 @@
+import argparse
+import contextlib
+import importlib
+import io
+import os
+import time
+from statistics import mean
+from langchain_core.messages import HumanMessage
+from langgraph.checkpoint.memory import MemorySaver
+from delta_checkpoint import DeltaMemorySaver
+from fake_llm import use_fake_llm
+
+os.environ.setdefault("AZURE_OPENAI_API_KEY", "api_key")
+os.environ.setdefault("AZURE_OPENAI_ENDPOINT", "endpoint")
+
+# Bytes stored and checkpoint write/read latency of one long memory-agent thread,
+# full snapshots (MemorySaver) against delta-encoded messages (DeltaMemorySaver).
+# Reads are timed on a cold cache: every checkpoint of the thread is loaded with get_tuple,
+# and DeltaMemorySaver's cache of rebuilt lists is cleared before each read.
+
+def timed(fn, samples):
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            samples.append(time.perf_counter() - start)
+    return wrapper
+
+def run(agent, saver, turns):
+    writes = []
+    saver.put = timed(saver.put, writes)
+    graph = agent.build_graph(checkpointer=saver)
+    config = {"configurable": {"thread_id": "bench"}}
+    with contextlib.redirect_stdout(io.StringIO()):
+        graph.invoke({"messages": [HumanMessage(content="Add 3 and 4.")]}, config)
+        for _ in range(turns - 1):
+            graph.invoke({"messages": [HumanMessage(content="Multiply that by 1. Add the output and 1.")]}, config)
+
+    stored = sum(len(b[1]) for b in saver.blobs.values())
+    stored += sum(len(c[1]) + len(m[1]) for ns in saver.storage.values() for cps in ns.values() for c, m, _ in cps.values())
+    checkpoint_ids = [t.config for t in saver.list(config)]
+    reads = []
+    for checkpoint_config in checkpoint_ids:
+        if isinstance(saver, DeltaMemorySaver):
+            saver._materialized.clear()
+        start = time.perf_counter()
+        saver.get_tuple(checkpoint_config)
+        reads.append(time.perf_counter() - start)
+    return stored, mean(writes), mean(reads), len(checkpoint_ids)
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Compare full-snapshot and delta-encoded checkpoints")
+    parser.add_argument("--turns", type=int, nargs="*", default=[10, 50, 100])
+    parser.add_argument("--snapshot-every", type=int, default=16)
+    args = parser.parse_args()
+
+    use_fake_llm()
+    with contextlib.redirect_stdout(io.StringIO()):
+        agent = importlib.import_module("5_agent_memory")
+    for turns in args.turns:
+        for name, saver in [("full", MemorySaver()), ("delta", DeltaMemorySaver(snapshot_every=args.snapshot_every))]:
+            stored, write, read, checkpoints = run(agent, saver, turns)
+            print(f"turns={turns:<4} {name:<6} checkpoints={checkpoints:<5} stored={stored / 1024:9.1f} KiB  "
+                  f"write={write * 1e6:8.1f} us  read={read * 1e6:8.1f} us")
@@ -0,0 +1,44 @@
+import argparse
+import contextlib
+import importlib
+import io
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from statistics import mean
+from langgraph.checkpoint.memory import MemorySaver
+import graph_registry
+
+os.environ.setdefault("AZURE_OPENAI_API_KEY", "api_key")
+os.environ.setdefault("AZURE_OPENAI_ENDPOINT", "endpoint")
+
+# Per-request cost of getting a compiled graph: building and compiling it on every request path,
+# against asking graph_registry for the shared instance. Requests come from --threads threads at once.
+
+def per_request(get, requests, threads):
+    def timed(_):
+        start = time.perf_counter()
+        get()
+        return time.perf_counter() - start
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        return mean(pool.map(timed, range(requests)))
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Benchmark the compiled graph registry")
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--threads", type=int, default=8)
+    args = parser.parse_args()
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        for module in sorted(set(graph_registry.GRAPH_MODULES.values())):
+            importlib.import_module(module)
+    memory = MemorySaver()
+    for name in graph_registry.GRAPH_MODULES:
+        factory = graph_registry._factory(name)
+        checkpointer = memory if name == "memory_agent" else None
+        rebuild = per_request(lambda: factory(checkpointer=checkpointer), args.requests, args.threads)
+        shared = per_request(lambda: graph_registry.get_graph(name, checkpointer=checkpointer), args.requests, args.threads)
+        print(f"{name:<18} rebuild={rebuild * 1e3:8.3f} ms  registry={shared * 1e6:8.2f} us  ({rebuild / shared:8.0f}x)")
+    stats = graph_registry.graph_registry_stats()
+    print(f"compiles={stats['compiles']} hits={stats['hits']} "
+          f"compile time={sum(stats['compile_seconds'].values()) * 1e3:.1f} ms")
@@ -0,0 +1,113 @@
+import argparse
+import importlib
+import json
+import os
+import time
+import tracemalloc
+from collections import defaultdict
+from statistics import mean, median
+from langchain_core.messages import HumanMessage
+from langgraph.checkpoint.memory import MemorySaver
+from fake_llm import use_fake_llm
+
+os.environ.setdefault("AZURE_OPENAI_API_KEY", "api_key")
+os.environ.setdefault("AZURE_OPENAI_ENDPOINT", "endpoint")
+
+# Runs every tutorial graph against the local fake model and reports per-step latency, end-to-end
+# latency, throughput and memory allocated per run. With --latency 0 the numbers are pure framework
+# overhead; raise it to see how much of a run is spent waiting on the model.
+#
+#   python bench_graphs.py --runs 200 --latency 0.05
+
+def messages(text):
+    return lambda i: {"messages": [HumanMessage(content=text)]}
+
+def thread_config(i):
+    return {"configurable": {"thread_id": f"bench-{i}"}}
+
+# name -> (graph factory, input factory, config factory)
+CASES = {
+    "0_simple_agent": (lambda: importlib.import_module("0_simple_agent").build_graph(),
+                       messages("What do you know about LangGraph?"), None),
+    "1_simple_graph": (lambda: importlib.import_module("1_simple_graph").build_graph(),
+                       lambda i: {"graph_state": "Hi, this is Lance."}, None),
+    "2_chain": (lambda: importlib.import_module("2_chain").build_graph(),
+                messages("Multiply 2 and 3"), None),
+    "3_router": (lambda: importlib.import_module("3_router").build_graph(),
+                 messages("Hello, what is 2 multiplied by 2?"), None),
+    "4_agent": (lambda: importlib.import_module("4_agent").build_graph(),
+                messages("Add 3 and 4. Multiply the output by 2. Divide the output by 5"), None),
+    "5_agent_memory": (lambda: importlib.import_module("5_agent_memory").build_graph(checkpointer=MemorySaver()),
+                       messages("Add 3 and 4. Multiply the output by 2. Divide the output by 5"), thread_config),
+    "6_state_schema": (lambda: importlib.import_module("6_state_schema").build_graph(importlib.import_module("6_state_schema").State),
+                       lambda i: {"name": "Lance"}, None),
+    "7_plan_execute": (lambda: importlib.import_module("7_plan_execute").build_graph(),
+                       messages("Add 3 and 4. Multiply the output by 2. Divide the output by 5"), None),
+}
+
+def run_once(graph, inputs, config, step_times):
+    start = last = time.perf_counter()
+    for update in graph.stream(inputs, config, stream_mode="updates"):
+        now = time.perf_counter()
+        for node in update:
+            step_times[node].append(now - last)
+        last = now
+    return time.perf_counter() - start
+
+def bench(name, runs, warmup):
+    make_graph, make_input, make_config = CASES[name]
+    graph = make_graph()
+    config = make_config or (lambda i: None)
+    for i in range(warmup):
+        run_once(graph, make_input(i), config(-i - 1), defaultdict(list))
+
+    step_times = defaultdict(list)
+    totals = []
+    started = time.perf_counter()
+    for i in range(runs):
+        totals.append(run_once(graph, make_input(i), config(i), step_times))
+    elapsed = time.perf_counter() - started
+
+    # Allocations are measured in a separate pass, tracemalloc slows everything down
+    allocated = []
+    tracemalloc.start()
+    for i in range(min(runs, 20)):
+        tracemalloc.reset_peak()
+        before, _ = tracemalloc.get_traced_memory()
+        run_once(graph, make_input(i), config(runs + i), defaultdict(list))
+        _, peak = tracemalloc.get_traced_memory()
+        allocated.append(peak - before)
+    tracemalloc.stop()
+
+    return {
+        "graph": name,
+        "runs": runs,
+        "end_to_end_ms": {"mean": mean(totals) * 1e3, "median": median(totals) * 1e3, "max": max(totals) * 1e3},
+        "steps_ms": {node: {"count": len(t), "mean": mean(t) * 1e3} for node, t in step_times.items()},
+        "throughput_rps": runs / elapsed,
+        "peak_alloc_kib": mean(allocated) / 1024,
+    }
+
+def print_result(r):
+    e2e = r["end_to_end_ms"]
+    print(f"{r['graph']:<28} e2e mean={e2e['mean']:8.2f} ms  median={e2e['median']:8.2f} ms  "
+          f"max={e2e['max']:8.2f} ms  {r['throughput_rps']:9.1f} runs/s  peak alloc={r['peak_alloc_kib']:8.1f} KiB")
+    for node, s in r["steps_ms"].items():
+        print(f"    {node:<24} {s['count'] / r['runs']:4.1f} steps/run  mean={s['mean']:8.3f} ms")
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Benchmark the tutorial graphs against the local fake model")
+    parser.add_argument("--runs", type=int, default=100)
+    parser.add_argument("--warmup", type=int, default=5)
+    parser.add_argument("--latency", type=float, default=0.0, help="artificial model latency in seconds")
+    parser.add_argument("--graphs", nargs="*", default=list(CASES), choices=list(CASES))
+    parser.add_argument("--json", action="store_true", help="print machine-readable results")
+    args = parser.parse_args()
+
+    use_fake_llm(latency=args.latency)
+    results = [bench(name, args.runs, args.warmup) for name in args.graphs]
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        for r in results:
+            print_result(r)
@@ -0,0 +1,85 @@
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+# Cold-start cost of importing each module, measured in fresh interpreters with `python -X importtime`.
+# Reports the module's cumulative import time and its heaviest direct imports.
+# With --budget-ms it exits non-zero when a module takes longer, and with --strict when a module
+# imports one of the LAZY packages up front, so a CI step can catch regressions:
+#
+#   python bench_import_time.py --budget-ms 1500 --strict
+#   python bench_import_time.py 4_agent --top 15
+
+MODULES = ["0_simple_agent", "1_simple_graph", "2_chain", "3_router", "4_agent", "5_agent_memory",
+           "6_state_schema", "7_plan_execute"]
+
+# Importing a module must not need these; they belong to draw_graph() and the Azure client
+LAZY = ["IPython", "langchain_openai", "openai"]
+
+def import_profile(module):
+    # Returns (cumulative ms of the module, [(direct import, cumulative ms)], lazy packages loaded)
+    # for one cold import
+    code = (f"import sys; __import__({module!r}); "
+            f"print(','.join(m for m in {LAZY!r} if m in sys.modules))")
+    env = {**os.environ, "AZURE_OPENAI_API_KEY": "api_key", "AZURE_OPENAI_ENDPOINT": "endpoint"}
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", code], capture_output=True, text=True,
+                          cwd=os.path.dirname(os.path.abspath(__file__)), env=env, check=True)
+    # Lines are "import time: self [us] | cumulative | <2 spaces per nesting level>name", children before parents
+    entries = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative_us, name = line.partition(":")[2].split("|")
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        entries.append((depth, name.strip(), int(cumulative_us) / 1e3))
+    end = max(i for i, (depth, name, _) in enumerate(entries) if depth == 0 and name == module)
+    children = []
+    for depth, name, ms in reversed(entries[:end]):
+        if depth == 0:
+            break
+        if depth == 1:
+            children.append((name, ms))
+    # The module may print while importing, the list of loaded packages is the last line
+    lines = proc.stdout.strip().splitlines()
+    loaded = [m for m in lines[-1].split(",") if m] if lines else []
+    return entries[end][2], sorted(children, key=lambda c: -c[1]), loaded
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Measure cold import time of the tutorial modules")
+    parser.add_argument("modules", nargs="*", default=MODULES)
+    parser.add_argument("--runs", type=int, default=3, help="cold imports per module, the median is reported")
+    parser.add_argument("--top", type=int, default=5, help="heaviest imports to list per module")
+    parser.add_argument("--budget-ms", type=float, default=None, help="fail if a module takes longer than this")
+    parser.add_argument("--strict", action="store_true", help=f"fail if a module imports {', '.join(LAZY)} up front")
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args()
+
+    results = {}
+    for module in args.modules:
+        profiles = [import_profile(module) for _ in range(args.runs)]
+        results[module] = {
+            "import_ms": statistics.median(p[0] for p in profiles),
+            "heaviest": [{"module": name, "ms": ms} for name, ms in profiles[0][1][:args.top]],
+            "eager": profiles[0][2],
+        }
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        for module, r in results.items():
+            eager = f"  eagerly loads: {', '.join(r['eager'])}" if r["eager"] else ""
+            print(f"{module:<16} {r['import_ms']:8.1f} ms{eager}")
+            for h in r["heaviest"]:
+                print(f"    {h['module']:<28} {h['ms']:8.1f} ms")
+
+    over = [m for m, r in results.items() if args.budget_ms is not None and r["import_ms"] > args.budget_ms]
+    eager = [m for m, r in results.items() if args.strict and r["eager"]]
+    if over:
+        print(f"over the {args.budget_ms:.0f} ms budget: {', '.join(over)}", file=sys.stderr)
+    if eager:
+        print(f"eagerly importing {', '.join(LAZY)}: {', '.join(eager)}", file=sys.stderr)
+    if over or eager:
+        sys.exit(1)
@@ -0,0 +1,90 @@
+import os
+import time
+from statistics import mean, median
+from langchain_core.tools import tool
+from langchain_openai import AzureChatOpenAI
+import llm_clients
+
+os.environ.setdefault("AZURE_OPENAI_API_KEY", "api_key")
+os.environ.setdefault("AZURE_OPENAI_ENDPOINT", "https://endpoint")
+
+# Measures the per-step overhead the assistant node pays before it sends anything to the model.
+# "Add 3 and 4. Multiply the output by 2. Divide the output by 5" takes 4 assistant steps
+# (3 tool calls + final answer), so a multi-step run is simulated as RUNS x STEPS node calls.
+# Only client setup and tool binding are timed; no request goes out over the network.
+
+RUNS = 50
+STEPS = 4
+
+@tool
+def multiply(a: int, b: int) -> int:
+    """Multiply a and b.
+
+    Args:
+        a: first int
+        b: second int
+    """
+    return a * b
+
+@tool
+def add(a: int, b: int) -> int:
+    """Adds a and b.
+
+    Args:
+        a: first int
+        b: second int
+    """
+    return a + b
+
+@tool
+def divide(a: int, b: int) -> float:
+    """Divide a and b.
+
+    Args:
+        a: first int
+        b: second int
+    """
+    return a / b
+
+tools = [add, multiply, divide]
+
+# What every node did before: a new client and a new tool binding per call
+def per_call_client():
+    llm = AzureChatOpenAI(
+        azure_deployment="gpt-4o",
+        api_version="2025-03-01-preview",
+        temperature=0,
+        max_tokens=None,
+        timeout=None,
+        max_retries=2
+    )
+    return llm.bind_tools(tools)
+
+# What every node does now: ask the process-wide registry
+def registry_client():
+    return llm_clients.get_llm_with_tools(tools)
+
+def measure(get_client):
+    samples = []
+    for _ in range(RUNS):
+        for _ in range(STEPS):
+            start = time.perf_counter()
+            get_client()
+            samples.append(time.perf_counter() - start)
+    return samples
+
+def report(name, samples):
+    per_run = sum(samples) / RUNS
+    print(f"{name:<12} mean/step={mean(samples) * 1e3:8.3f} ms  "
+          f"median/step={median(samples) * 1e3:8.3f} ms  "
+          f"overhead/run={per_run * 1e3:8.3f} ms")
+
+if __name__ == '__main__':
+    llm_clients.reset_llm_clients()
+    before = measure(per_call_client)
+    after = measure(registry_client)
+    print(f"{RUNS} runs x {STEPS} assistant steps")
+    report("per-call", before)
+    report("registry", after)
+    print(f"speedup: {mean(before) / mean(after):.0f}x")
+    print("registry stats:", llm_clients.llm_client_stats())
@@ -0,0 +1,108 @@
+import argparse
+import asyncio
+import time
+from typing import Annotated
+from typing_extensions import TypedDict
+from langchain_core.messages import HumanMessage
+from langchain_core.runnables import RunnableLambda
+from langchain_core.tools import tool
+from langgraph.graph import StateGraph, START
+from langgraph.graph.message import add_messages
+from langgraph.prebuilt import ToolNode, tools_condition
+from fake_llm import use_fake_llm
+from llm_clients import get_llm_with_tools
+from parallel_tools import ParallelToolNode
+
+# Wall-clock time of a ReAct turn where the model issues four independent tool calls at once,
+# with tools that each sleep --tool-latency seconds. Compares running the calls one at a time,
+# the prebuilt ToolNode, and ParallelToolNode, under invoke and ainvoke.
+
+TOOL_LATENCY = 0.2
+QUESTION = "Add 1 and 2. Multiply 3 and 4. Divide 10 by 5. Add 5 and 6."
+
+class State(TypedDict):
+    messages: Annotated[list, add_messages]
+
+@tool
+def add(a: int, b: int) -> int:
+    """Adds a and b slowly.
+
+    Args:
+        a: first int
+        b: second int
+    """
+    time.sleep(TOOL_LATENCY)
+    return a + b
+
+@tool
+def multiply(a: int, b: int) -> int:
+    """Multiply a and b slowly.
+
+    Args:
+        a: first int
+        b: second int
+    """
+    time.sleep(TOOL_LATENCY)
+    return a * b
+
+@tool
+def divide(a: int, b: int) -> float:
+    """Divide a and b slowly.
+
+    Args:
+        a: first int
+        b: second int
+    """
+    time.sleep(TOOL_LATENCY)
+    return a / b
+
+tools = [add, multiply, divide]
+
+def assistant(state: State):
+    return {"messages": [get_llm_with_tools(tools).invoke(state["messages"])]}
+
+async def aassistant(state: State):
+    return {"messages": [await get_llm_with_tools(tools).ainvoke(state["messages"])]}
+
+def build_graph(tool_node):
+    builder = StateGraph(State)
+    builder.add_node("assistant", RunnableLambda(assistant, afunc=aassistant))
+    builder.add_node("tools", tool_node)
+    builder.add_edge(START, "assistant")
+    builder.add_conditional_edges("assistant", tools_condition)
+    builder.add_edge("tools", "assistant")
+    return builder.compile()
+
+def variants():
+    sequential = ParallelToolNode(tools, max_workers=1, max_concurrency=1)
+    parallel = ParallelToolNode(tools, max_workers=8, timeout=5)
+    return [
+        ("sequential", RunnableLambda(sequential, afunc=sequential.acall)),
+        ("ToolNode", ToolNode(tools)),
+        ("ParallelToolNode", RunnableLambda(parallel, afunc=parallel.acall)),
+    ]
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Benchmark parallel tool execution")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--tool-latency", type=float, default=TOOL_LATENCY)
+    args = parser.parse_args()
+    TOOL_LATENCY = args.tool_latency
+
+    use_fake_llm(parallel_tool_calls=True)
+    for name, node in variants():
+        graph = build_graph(node)
+        inputs = {"messages": [HumanMessage(content=QUESTION)]}
+        start = time.perf_counter()
+        for _ in range(args.runs):
+            result = graph.invoke(inputs)
+        sync_time = (time.perf_counter() - start) / args.runs
+
+        async def arun():
+            for _ in range(args.runs):
+                await graph.ainvoke(inputs)
+        start = time.perf_counter()
+        asyncio.run(arun())
+        async_time = (time.perf_counter() - start) / args.runs
+        print(f"{name:<18} invoke={sync_time * 1e3:7.1f} ms  ainvoke={async_time * 1e3:7.1f} ms  "
+              f"tool results={[m.content for m in result['messages'] if m.type == 'tool']}")
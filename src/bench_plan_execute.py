@@ -0,0 +1,59 @@
+import argparse
+import contextlib
+import importlib
+import io
+import os
+import time
+from statistics import mean
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.messages import HumanMessage
+from fake_llm import use_fake_llm
+
+os.environ.setdefault("AZURE_OPENAI_API_KEY", "api_key")
+os.environ.setdefault("AZURE_OPENAI_ENDPOINT", "endpoint")
+
+# LLM calls and end-to-end latency per request, ReAct (4_agent) against plan-and-execute (7_plan_execute),
+# on the fake model with --latency seconds per LLM call.
+#
+#   python bench_plan_execute.py --runs 5 --latency 0.2
+
+QUESTIONS = [
+    "Add 3 and 4.",
+    "Add 3 and 4. Multiply the output by 2. Divide the output by 5",
+    "Add 3 and 4. Multiply the output by 2. Add the output and 6. Divide the output by 5. Multiply the output by 10",
+]
+
+class LLMCallCounter(BaseCallbackHandler):
+    def __init__(self):
+        self.calls = 0
+
+    def on_chat_model_start(self, serialized, messages, **kwargs):
+        self.calls += 1
+
+def bench(graph, question, runs):
+    counter = LLMCallCounter()
+    latencies = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            result = graph.invoke({"messages": [HumanMessage(content=question)]}, {"callbacks": [counter]})
+        latencies.append(time.perf_counter() - start)
+    return counter.calls / runs, mean(latencies), result["messages"][-1].content
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Compare ReAct and plan-and-execute agents")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--latency", type=float, default=0.2, help="seconds per fake LLM call")
+    args = parser.parse_args()
+
+    use_fake_llm(latency=args.latency)
+    with contextlib.redirect_stdout(io.StringIO()):
+        graphs = {
+            "react": importlib.import_module("4_agent").build_graph(),
+            "plan-execute": importlib.import_module("7_plan_execute").build_graph(),
+        }
+    for question in QUESTIONS:
+        print(question)
+        for name, graph in graphs.items():
+            calls, latency, answer = bench(graph, question, args.runs)
+            print(f"  {name:<13} llm calls={calls:4.1f}  latency={latency * 1e3:8.1f} ms  answer={answer!r}")
@@ -0,0 +1,93 @@
+import argparse
+import asyncio
+import time
+from langchain_core.messages import HumanMessage
+import llm_clients
+from resilience import ResiliencePolicy
+from stub_server import StubLLMServer, stub_llm_factory
+
+# Tail latency and error rate of model calls against a misbehaving backend (stub_server.py), with the
+# client's own retries (max_retries=2, no timeout, like azure_llm_factory) against a ResiliencePolicy.
+# Then a hard outage (every request fails), to show the circuit breaker failing calls fast.
+#
+#   python bench_resilience.py --calls 300 --slow-rate 0.05 --slow-latency 2 --fail-rate 0.05
+
+PROMPT = [HumanMessage(content="Add 3 and 4.")]
+
+def percentile(samples, q):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))] if ordered else float("nan")
+
+def report(name, latencies, errors, elapsed, extra=""):
+    print(f"{name:<22} p50={percentile(latencies, 0.5) * 1e3:7.0f} ms  p95={percentile(latencies, 0.95) * 1e3:7.0f} ms  "
+          f"p99={percentile(latencies, 0.99) * 1e3:7.0f} ms  max={max(latencies, default=0) * 1e3:7.0f} ms  "
+          f"errors={errors:<4} {elapsed:6.1f} s {extra}")
+
+def run_sync(llm, calls):
+    latencies, errors = [], 0
+    started = time.perf_counter()
+    for _ in range(calls):
+        start = time.perf_counter()
+        try:
+            llm.invoke(PROMPT)
+        except Exception:
+            errors += 1
+        latencies.append(time.perf_counter() - start)
+    return latencies, errors, time.perf_counter() - started
+
+async def run_async(llm, calls, concurrency):
+    latencies, errors = [], 0
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one():
+        nonlocal errors
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                await llm.ainvoke(PROMPT)
+            except Exception:
+                errors += 1
+            latencies.append(time.perf_counter() - start)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(calls)))
+    return latencies, errors, time.perf_counter() - started
+
+def configure(url, policy):
+    llm_clients.set_llm_factory(stub_llm_factory(url, max_retries=0 if policy else 2))
+    llm_clients.set_llm_resilience(policy)
+    return llm_clients.get_llm()
+
+def make_policy(args):
+    return ResiliencePolicy(deadline=args.deadline, initial_hedge_delay=0.25, backoff_base=0.05, seed=0)
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Benchmark hedging, retries and the circuit breaker against a stub backend")
+    parser.add_argument("--calls", type=int, default=300)
+    parser.add_argument("--concurrency", type=int, default=16, help="calls in flight in the async runs")
+    parser.add_argument("--latency", type=float, default=0.02)
+    parser.add_argument("--slow-rate", type=float, default=0.03)
+    parser.add_argument("--slow-latency", type=float, default=2.0)
+    parser.add_argument("--fail-rate", type=float, default=0.05)
+    parser.add_argument("--deadline", type=float, default=5.0)
+    args = parser.parse_args()
+
+    with StubLLMServer(latency=args.latency, slow_rate=args.slow_rate, slow_latency=args.slow_latency,
+                       fail_rate=args.fail_rate, seed=0) as server:
+        report("sync client retries", *run_sync(configure(server.url, None), args.calls))
+        policy = make_policy(args)
+        report("sync policy", *run_sync(configure(server.url, policy), args.calls), extra=str(policy.stats))
+        report("async client retries", *asyncio.run(run_async(configure(server.url, None), args.calls, args.concurrency)))
+        policy = make_policy(args)
+        report("async policy", *asyncio.run(run_async(configure(server.url, policy), args.calls, args.concurrency)),
+               extra=str(policy.stats))
+
+    # Outage: the client still retries every call; the breaker stops calling after a few failures
+    with StubLLMServer(latency=args.latency, fail_rate=1.0, seed=0) as server:
+        calls = min(args.calls, 50)
+        report("outage client retries", *run_sync(configure(server.url, None), calls), extra=f"requests={server.stats['requests']}")
+        server.stats["requests"] = 0
+        policy = make_policy(args)
+        report("outage policy", *run_sync(configure(server.url, policy), calls),
+               extra=f"requests={server.stats['requests']} short_circuits={policy.stats['short_circuits']}")
+    llm_clients.set_llm_resilience(None)
@@ -0,0 +1,83 @@
+import argparse
+import contextlib
+import importlib
+import io
+import os
+import time
+from langchain_core.messages import HumanMessage
+from langgraph.checkpoint.memory import MemorySaver
+from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
+from compact_serde import CompactSerializer
+from fake_llm import use_fake_llm
+
+os.environ.setdefault("AZURE_OPENAI_API_KEY", "api_key")
+os.environ.setdefault("AZURE_OPENAI_ENDPOINT", "endpoint")
+
+# Checkpoint encode / decode time and size of the memory agent's message list as the conversation grows,
+# the default JsonPlusSerializer against CompactSerializer (compact_serde.py). The messages come from a real
+# thread of 5_agent_memory.py against the fake model; every length is checked to round-trip exactly.
+# Then whole threads are run with MemorySaver(serde=...) to show the end-to-end effect on the agent.
+#
+#   python bench_serde.py --messages 10 100 1000 --turns 50
+
+SERDES = {"jsonplus": JsonPlusSerializer, "compact": CompactSerializer}
+
+def conversation(agent, turns, checkpointer=None):
+    graph = agent.build_graph(checkpointer=checkpointer or MemorySaver())
+    config = {"configurable": {"thread_id": "bench"}}
+    result = graph.invoke({"messages": [HumanMessage(content="Add 3 and 4.")]}, config)
+    for _ in range(turns - 1):
+        result = graph.invoke({"messages": [HumanMessage(content="Multiply that by 1. Add the output and 1.")]}, config)
+    return result["messages"]
+
+def best_time(fn, rounds, repeat):
+    # Best of `rounds` means, to keep out scheduler noise
+    best = float("inf")
+    for _ in range(rounds):
+        start = time.perf_counter()
+        for _ in range(repeat):
+            fn()
+        best = min(best, (time.perf_counter() - start) / repeat)
+    return best
+
+def per_checkpoint(messages, lengths, rounds):
+    print(f"{'messages':>8}  {'serde':<9} {'encode':>10} {'decode':>10} {'bytes':>9}")
+    for n in lengths:
+        value = messages[:n]
+        results = {}
+        for name, serde_class in SERDES.items():
+            serde = serde_class()
+            blob = serde.dumps_typed(value)
+            decoded = serde.loads_typed(blob)
+            assert decoded == value and [m.model_dump() for m in decoded] == [m.model_dump() for m in value]
+            repeat = max(1, 2000 // max(n, 1))
+            encode = best_time(lambda: serde.dumps_typed(value), rounds, repeat)
+            decode = best_time(lambda: serde.loads_typed(blob), rounds, repeat)
+            results[name] = (encode, decode, len(blob[1]))
+            print(f"{len(value):>8}  {name:<9} {encode * 1e6:8.0f} us {decode * 1e6:8.0f} us {len(blob[1]):>9}")
+        (e0, d0, b0), (e1, d1, b1) = results["jsonplus"], results["compact"]
+        print(f"{'':>8}  {'gain':<9} {e0 / e1:9.1f}x {d0 / d1:9.1f}x {b0 / b1:8.1f}x")
+
+def whole_thread(agent, turns):
+    for name, serde_class in SERDES.items():
+        saver = MemorySaver(serde=serde_class())
+        start = time.perf_counter()
+        conversation(agent, turns, saver)
+        elapsed = time.perf_counter() - start
+        stored = sum(len(b[1]) for b in saver.blobs.values())
+        print(f"thread of {turns} turns  {name:<9} {elapsed:6.2f} s  {stored / 1e6:8.2f} MB stored")
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Compare the default and the compact checkpoint serializers")
+    parser.add_argument("--messages", type=int, nargs="*", default=[10, 50, 200, 1000])
+    parser.add_argument("--turns", type=int, default=50, help="turns of the end-to-end thread")
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+
+    use_fake_llm()
+    with contextlib.redirect_stdout(io.StringIO()):
+        agent = importlib.import_module("5_agent_memory")
+        # Every turn adds four messages: the question, a tool call and its result, the answer
+        messages = conversation(agent, max(args.messages) // 4 + 1)
+    per_checkpoint(messages, args.messages, args.rounds)
+    whole_thread(agent, args.turns)
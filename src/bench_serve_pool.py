@@ -0,0 +1,71 @@
+import argparse
+import concurrent.futures
+import json
+import os
+import signal
+import threading
+import time
+import urllib.request
+from serve_pool import WorkerPool, format_stats, make_server
+
+# Throughput of the multi-process front end (serve_pool.py) against the fake model, and a check that
+# conversations keep their history: every conversation asks "Add 3 and 4." and then "Multiply that by 2.",
+# which only comes out as 14 if the second turn reached the worker holding the first one.
+# With --kill-after, one worker is killed part way through to show the ring rebalancing; conversations
+# that lived on it lose their history, the others don't notice.
+#
+#   LLM_BACKEND=fake FAKE_LLM_LATENCY=0.05 python bench_serve_pool.py --workers 1 2 4 --conversations 400
+
+TURNS = [("Add 3 and 4.", "The result is 7."), ("Multiply that by 2.", "The result is 14.")]
+
+def post(url, payload):
+    request = urllib.request.Request(url + "/turn", data=json.dumps(payload).encode("utf-8"),
+                                     headers={"Content-Type": "application/json"})
+    try:
+        with urllib.request.urlopen(request) as response:
+            return json.loads(response.read())
+    except urllib.error.HTTPError as e:
+        return json.loads(e.read())
+
+def conversation(url, thread_id):
+    # Returns (turns answered, whether every answer was the expected one)
+    answered, correct = 0, True
+    for message, expected in TURNS:
+        result = post(url, {"thread_id": thread_id, "message": message})
+        if result.get("error") is None:
+            answered += 1
+        correct = correct and result.get("output") == expected
+    return answered, correct
+
+def run(workers, conversations, clients, kill_after=None):
+    pool = WorkerPool(workers).start()
+    server = make_server(pool, port=0)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_address[1]}"
+    if kill_after is not None:
+        victim = pool.workers["worker-0"].process.pid
+        threading.Timer(kill_after, lambda: os.kill(victim, signal.SIGKILL)).start()
+    start = time.perf_counter()
+    with concurrent.futures.ThreadPoolExecutor(clients) as executor:
+        results = list(executor.map(lambda i: conversation(url, f"conv-{i}"), range(conversations)))
+    elapsed = time.perf_counter() - start
+    stats = pool.stats()
+    server.shutdown()
+    pool.stop()
+    turns = sum(answered for answered, _ in results)
+    kept = sum(correct for _, correct in results)
+    print(f"workers={workers:<3} {turns / elapsed:8.1f} turns/s  {elapsed:6.2f} s  "
+          f"history kept {kept}/{conversations}")
+    print(f"    {format_stats(stats)}")
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Benchmark multi-process serving with thread_id-sticky routing")
+    parser.add_argument("--workers", type=int, nargs="*", default=[1, 2, 4])
+    parser.add_argument("--conversations", type=int, default=400)
+    parser.add_argument("--clients", type=int, default=32, help="concurrent HTTP clients")
+    parser.add_argument("--kill-after", type=float, default=None, help="seconds after which worker-0 is killed")
+    args = parser.parse_args()
+
+    os.environ.setdefault("LLM_BACKEND", "fake")
+    for workers in args.workers:
+        run(workers, args.conversations, args.clients, args.kill_after)
@@ -0,0 +1,97 @@
+import argparse
+import asyncio
+import concurrent.futures
+import contextlib
+import importlib
+import io
+import os
+import random
+import time
+import llm_clients
+from fake_llm import FakeArithmeticChatModel
+from single_flight import SingleFlight
+
+os.environ.setdefault("AZURE_OPENAI_API_KEY", "api_key")
+os.environ.setdefault("AZURE_OPENAI_ENDPOINT", "endpoint")
+
+# Model calls and latency when many users send 0_simple_agent's canned prompt at the same moment, with and
+# without single-flight coalescing (single_flight.py). Users arrive uniformly over --spread seconds; only the
+# ones that arrive while an identical call is in flight can share it, so the gain shrinks as the spread grows
+# past the model latency.
+#
+#   python bench_single_flight.py --users 200 --latency 0.5 --spread 0 0.5 2
+
+PROMPT = "What do you know about LangGraph?"
+
+def configure(latency, single_flight):
+    models = []
+
+    def factory(deployment):
+        models.append(FakeArithmeticChatModel(latency=latency))
+        return models[-1]
+
+    llm_clients.set_llm_factory(factory)
+    llm_clients.set_llm_single_flight(single_flight)
+    return models
+
+def arrivals(users, spread, seed=0):
+    rng = random.Random(seed)
+    return sorted(rng.uniform(0, spread) for _ in range(users))
+
+def run_sync(graph, users, spread):
+    latencies = []
+    started = time.perf_counter()
+
+    def user(at):
+        time.sleep(max(0.0, started + at - time.perf_counter()))
+        start = time.perf_counter()
+        graph.invoke({"messages": [{"role": "user", "content": PROMPT}]})
+        latencies.append(time.perf_counter() - start)
+
+    with concurrent.futures.ThreadPoolExecutor(users) as executor:
+        list(executor.map(user, arrivals(users, spread)))
+    return latencies, time.perf_counter() - started
+
+async def run_async(graph, users, spread):
+    latencies = []
+    started = time.perf_counter()
+
+    async def user(at):
+        await asyncio.sleep(max(0.0, started + at - time.perf_counter()))
+        start = time.perf_counter()
+        await graph.ainvoke({"messages": [{"role": "user", "content": PROMPT}]})
+        latencies.append(time.perf_counter() - start)
+
+    await asyncio.gather(*(user(at) for at in arrivals(users, spread)))
+    return latencies, time.perf_counter() - started
+
+def percentile(samples, q):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+def report(name, spread, models, latencies, elapsed, single_flight):
+    extra = f"  collapsed={single_flight.stats['collapsed']}" if single_flight else ""
+    print(f"{name:<20} spread={spread:<5g} model calls={sum(m.calls for m in models):<5} "
+          f"p50={percentile(latencies, 0.5) * 1e3:6.0f} ms  p99={percentile(latencies, 0.99) * 1e3:6.0f} ms  "
+          f"{elapsed:6.2f} s{extra}")
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Benchmark single-flight coalescing of identical concurrent model calls")
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--latency", type=float, default=0.5, help="fake model latency in seconds")
+    parser.add_argument("--spread", type=float, nargs="*", default=[0.0, 0.5, 2.0],
+                        help="seconds over which users arrive")
+    args = parser.parse_args()
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        agent = importlib.import_module("0_simple_agent")
+    graph = agent.build_graph()
+    for spread in args.spread:
+        for single_flight in (None, SingleFlight()):
+            name = "single-flight" if single_flight else "every call"
+            models = configure(args.latency, single_flight)
+            report(f"sync {name}", spread, models, *run_sync(graph, args.users, spread), single_flight)
+            single_flight = single_flight and SingleFlight()
+            models = configure(args.latency, single_flight)
+            report(f"async {name}", spread, models, *asyncio.run(run_async(graph, args.users, spread)), single_flight)
+    llm_clients.set_llm_single_flight(None)
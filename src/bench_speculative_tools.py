@@ -0,0 +1,125 @@
+import argparse
+import asyncio
+import contextlib
+import importlib
+import io
+import time
+from langchain_core.messages import HumanMessage
+from langchain_core.tools import tool
+import llm_clients
+from fake_llm import use_fake_llm
+from parallel_tools import ParallelToolNode
+from stub_server import StubLLMServer, stub_llm_factory
+
+# Wall-clock time of 4_agent.py turns where the model asks for several tool calls at once, with the tools
+# started once the whole message is in (invoke) against started while it streams (SPECULATIVE_TOOLS=1,
+# see speculative_tools.py). The model is the local stub endpoint (stub_server.py) through the real Azure
+# client, or with --backend fake the in-process fake model; it sends its first chunk after --latency seconds
+# and one more every --token-latency seconds. The tools sleep --tool-latency seconds.
+# With 8 tool workers the calls of a turn all run at once anyway, so speculation only saves the time between
+# the last call's arguments and the end of the message. With one worker (tools that must run one at a time)
+# each call runs while the next ones are still being generated. Speculative async calls don't wait for
+# max_concurrency, so the one-worker case is measured with invoke only.
+#
+#   python bench_speculative_tools.py --latency 0.1 --token-latency 0.02 --tool-latency 0.1
+
+QUESTIONS = [
+    # One turn with four independent calls
+    "Add 1 and 2. Multiply 3 and 4. Divide 10 by 5. Add 5 and 6.",
+    # A call, then two independent calls that use its result
+    "Add 3 and 4. Multiply that by 2. Multiply 6 and 7. Add 8 and 9.",
+]
+
+TOOL_LATENCY = 0.1
+
+@tool
+def add(a: int, b: int) -> int:
+    """Adds a and b slowly.
+
+    Args:
+        a: first int
+        b: second int
+    """
+    time.sleep(TOOL_LATENCY)
+    return a + b
+
+@tool
+def multiply(a: int, b: int) -> int:
+    """Multiply a and b slowly.
+
+    Args:
+        a: first int
+        b: second int
+    """
+    time.sleep(TOOL_LATENCY)
+    return a * b
+
+@tool
+def divide(a: int, b: int) -> float:
+    """Divide a and b slowly.
+
+    Args:
+        a: first int
+        b: second int
+    """
+    time.sleep(TOOL_LATENCY)
+    return a / b
+
+def run(graph, runs, with_async=True):
+    answers = []
+    start = time.perf_counter()
+    for _ in range(runs):
+        answers = [graph.invoke({"messages": [HumanMessage(content=q)]})["messages"][-1].content for q in QUESTIONS]
+    sync_time = (time.perf_counter() - start) / runs / len(QUESTIONS)
+    if not with_async:
+        return answers, sync_time, float("nan")
+
+    async def arun():
+        for _ in range(runs):
+            for q in QUESTIONS:
+                await graph.ainvoke({"messages": [HumanMessage(content=q)]})
+    start = time.perf_counter()
+    asyncio.run(arun())
+    return answers, sync_time, (time.perf_counter() - start) / runs / len(QUESTIONS)
+
+def ms(seconds):
+    return f"{seconds * 1e3:7.1f} ms" if seconds == seconds else "      -   "
+
+def bench(agent, configure, runs):
+    graph = agent.build_graph()
+    for workers in (8, 1):
+        print(f"tool workers={workers}")
+        results = {}
+        for speculative in (False, True):
+            # A fresh client per run, its async HTTP connections belong to the event loop that opened them
+            configure()
+            agent.speculative_tools = speculative
+            agent.tool_node = ParallelToolNode([add, multiply, divide], max_workers=workers, timeout=30, speculate=True)
+            results[speculative] = run(graph, runs, with_async=workers > 1)
+            answers, sync_time, async_time = results[speculative]
+            name = "speculative" if speculative else "after message"
+            stats = agent.tool_node.stats if speculative else ""
+            print(f"  {name:<14} invoke={ms(sync_time)}  ainvoke={ms(async_time)} per question  {stats}")
+        assert results[False][0] == results[True][0], (results[False][0], results[True][0])
+        gain = results[False][2] / results[True][2]
+        print(f"  {'gain':<14} invoke={results[False][1] / results[True][1]:6.2f}x    "
+              + (f"ainvoke={gain:6.2f}x" if gain == gain else ""))
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Benchmark speculative tool execution on the ReAct agent")
+    parser.add_argument("--backend", choices=["stub", "fake"], default="stub")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--latency", type=float, default=0.1, help="seconds to the model's first chunk")
+    parser.add_argument("--token-latency", type=float, default=0.02, help="seconds between streamed chunks")
+    parser.add_argument("--tool-latency", type=float, default=TOOL_LATENCY)
+    args = parser.parse_args()
+    TOOL_LATENCY = args.tool_latency
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        agent = importlib.import_module("4_agent")
+    if args.backend == "fake":
+        bench(agent, lambda: use_fake_llm(args.latency, args.token_latency, parallel_tool_calls=True), args.runs)
+    else:
+        with StubLLMServer(latency=args.latency, token_latency=args.token_latency) as server:
+            server.model.parallel_tool_calls = True
+            bench(agent, lambda: llm_clients.set_llm_factory(stub_llm_factory(server.url)), args.runs)
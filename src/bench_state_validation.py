@@ -0,0 +1,93 @@
+import argparse
+import time
+from dataclasses import make_dataclass
+from typing_extensions import TypedDict
+from langgraph.graph import StateGraph, START, END
+from pydantic import create_model, field_validator
+from state_validation import StateValidator
+
+# Per-step overhead of the state schema, as the state grows.
+# Each graph is a chain of --steps nodes; every node updates one int field of a state with --fields fields.
+# Compares TypedDict, dataclass and Pydantic state, and Pydantic state under StateValidator's
+# "updates" and "boundaries" modes. The nodes do no work, so the time per step is all framework overhead.
+# Type checks alone are cheap in pydantic-core; --python-validators gives every field a Python
+# field_validator, like PydanticState.validate_mood, which is where validating the whole state hurts.
+#
+#   python bench_state_validation.py --fields 4 32 256 --steps 10 --python-validators
+
+def check_non_negative(cls, value):
+    if value < 0:
+        raise ValueError("must be non-negative")
+    return value
+
+def make_schemas(fields, python_validators=False):
+    annotations = {f"f{i}": int for i in range(fields)}
+    validators = {"check": field_validator("*")(check_non_negative)} if python_validators else {}
+    return {
+        "TypedDict": TypedDict(f"State{fields}", annotations),
+        "dataclass": make_dataclass(f"DataclassState{fields}", list(annotations.items())),
+        "Pydantic": create_model(f"PydanticState{fields}", __validators__=validators,
+                                 **{k: (v, ...) for k, v in annotations.items()}),
+    }
+
+def step(i):
+    key = f"f{i}"
+    def node(state):
+        value = state[key] if isinstance(state, dict) else getattr(state, key)
+        return {key: value + 1}
+    return node
+
+def build(schema, fields, steps, validation=None):
+    validator = StateValidator(schema, mode=validation) if validation else None
+    builder = StateGraph(validator.schema if validator else schema)
+    previous = START
+    for i in range(steps):
+        node = step(i % fields)
+        builder.add_node(f"step_{i}", validator.node(node) if validator else node)
+        builder.add_edge(previous, f"step_{i}")
+        previous = f"step_{i}"
+    builder.add_edge(previous, END)
+    graph = builder.compile()
+    return validator.wrap(graph) if validator else graph
+
+def validation_cost(model, initial, runs=200):
+    # What each mode pays per step, without the rest of the graph: the whole state against one key
+    validator = StateValidator(model)
+    start = time.perf_counter()
+    for _ in range(runs):
+        model.model_validate(initial)
+    full = (time.perf_counter() - start) / runs
+    start = time.perf_counter()
+    for _ in range(runs):
+        validator.validate_update({"f0": 1})
+    return full, (time.perf_counter() - start) / runs
+
+def per_step(graph, inputs, steps, runs):
+    graph.invoke(inputs)
+    start = time.perf_counter()
+    for _ in range(runs):
+        graph.invoke(inputs)
+    return (time.perf_counter() - start) / runs / steps
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Benchmark state schema validation overhead")
+    parser.add_argument("--fields", type=int, nargs="*", default=[4, 32, 256])
+    parser.add_argument("--steps", type=int, default=10)
+    parser.add_argument("--runs", type=int, default=50)
+    parser.add_argument("--python-validators", action="store_true", help="add a Python field validator to every field")
+    args = parser.parse_args()
+
+    for fields in args.fields:
+        schemas = make_schemas(fields, args.python_validators)
+        initial = {f"f{i}": 0 for i in range(fields)}
+        variants = [
+            ("TypedDict", build(schemas["TypedDict"], fields, args.steps)),
+            ("dataclass", build(schemas["dataclass"], fields, args.steps)),
+            ("Pydantic", build(schemas["Pydantic"], fields, args.steps)),
+            ("Pydantic updates", build(schemas["Pydantic"], fields, args.steps, validation="updates")),
+            ("Pydantic boundaries", build(schemas["Pydantic"], fields, args.steps, validation="boundaries")),
+        ]
+        full, one_key = validation_cost(schemas["Pydantic"], initial)
+        print(f"fields={fields}  (validating the whole state: {full * 1e6:.1f} us, one key: {one_key * 1e6:.1f} us)")
+        for name, graph in variants:
+            print(f"  {name:<20} {per_step(graph, initial, args.steps, args.runs) * 1e6:9.1f} us/step")
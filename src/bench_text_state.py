@@ -0,0 +1,74 @@
+import argparse
+import time
+from typing import Annotated
+from typing_extensions import TypedDict
+from langgraph.graph import StateGraph, START, END
+from langgraph.checkpoint.memory import MemorySaver
+from delta_checkpoint import DeltaMemorySaver
+from text_state import TextChannel
+
+# A looping graph that grows its text state by one fragment per step, plain str concatenation
+# (`state["graph_state"] + fragment`, as 1_simple_graph.py used to do) against a TextChannel.
+# Reports time per step without a checkpointer, and time per step and bytes stored with MemorySaver
+# and with DeltaMemorySaver listing graph_state in delta_channels.
+#
+#   python bench_text_state.py --steps 100 1000 --fragment-size 200
+
+class StrState(TypedDict):
+    graph_state: str
+    step: int
+
+class TextState(TypedDict):
+    graph_state: Annotated[str, TextChannel]
+    step: int
+
+def build(schema, steps, fragment, checkpointer=None):
+    if schema is StrState:
+        def write(state):
+            return {"graph_state": state["graph_state"] + fragment, "step": state["step"] + 1}
+    else:
+        def write(state):
+            return {"graph_state": fragment, "step": state["step"] + 1}
+
+    def more(state):
+        return "write" if state["step"] < steps else END
+
+    builder = StateGraph(schema)
+    builder.add_node("write", write)
+    builder.add_edge(START, "write")
+    builder.add_conditional_edges("write", more)
+    return builder.compile(checkpointer=checkpointer)
+
+def stored_bytes(saver):
+    stored = sum(len(b[1]) for b in saver.blobs.values())
+    stored += sum(len(c[1]) + len(m[1]) for ns in saver.storage.values() for cps in ns.values() for c, m, _ in cps.values())
+    stored += sum(len(w[2][1]) for writes in saver.writes.values() for w in writes.values())
+    return stored
+
+def run(schema, steps, fragment, checkpointer=None, runs=1):
+    graph = build(schema, steps, fragment, checkpointer).with_config(recursion_limit=steps + 10)
+    inputs = {"graph_state": "", "step": 0}
+    start = time.perf_counter()
+    for i in range(runs):
+        result = graph.invoke(inputs, {"configurable": {"thread_id": f"bench-{i}"}})
+    elapsed = (time.perf_counter() - start) / runs / steps
+    assert len(result["graph_state"]) == steps * len(fragment)
+    return elapsed
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Compare str concatenation and TextChannel for growing text state")
+    parser.add_argument("--steps", type=int, nargs="*", default=[100, 500, 2000])
+    parser.add_argument("--fragment-size", type=int, default=100)
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    fragment = "x" * args.fragment_size
+    for steps in args.steps:
+        print(f"steps={steps}")
+        for name, schema in [("str", StrState), ("TextChannel", TextState)]:
+            line = f"  {name:<12} none={run(schema, steps, fragment, runs=args.runs) * 1e6:7.1f} us/step"
+            for saver_name, saver in [("MemorySaver", MemorySaver()),
+                                      ("DeltaMemorySaver", DeltaMemorySaver(delta_channels=("graph_state",)))]:
+                per_step = run(schema, steps, fragment, saver)
+                line += f"  {saver_name}={per_step * 1e6:7.1f} us/step {stored_bytes(saver) / 1024:9.1f} KiB"
+            print(line)
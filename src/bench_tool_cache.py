@@ -0,0 +1,98 @@
+import argparse
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Annotated
+from typing_extensions import TypedDict
+from langchain_core.messages import HumanMessage
+from langchain_core.tools import tool
+from langgraph.graph import StateGraph, START
+from langgraph.graph.message import add_messages
+from langgraph.prebuilt import ToolNode, tools_condition
+from fake_llm import use_fake_llm
+from llm_clients import get_llm_with_tools
+from tool_cache import ToolCache, pure
+
+# ReAct sessions on many threads at once, all asking the same questions, with tools that each sleep
+# --tool-latency seconds to stand in for an expensive backend. Compares plain tools against @pure tools.
+
+TOOL_LATENCY = 0.05
+QUESTIONS = [
+    "Add 3 and 4. Multiply the output by 2. Divide the output by 5",
+    "Add 3 and 4. Multiply the output by 3.",
+    "Multiply 6 and 7.",
+]
+
+class State(TypedDict):
+    messages: Annotated[list, add_messages]
+
+def make_tools():
+    @tool
+    def add(a: int, b: int) -> int:
+        """Adds a and b slowly.
+
+        Args:
+            a: first int
+            b: second int
+        """
+        time.sleep(TOOL_LATENCY)
+        return a + b
+
+    @tool
+    def multiply(a: int, b: int) -> int:
+        """Multiply a and b slowly.
+
+        Args:
+            a: first int
+            b: second int
+        """
+        time.sleep(TOOL_LATENCY)
+        return a * b
+
+    @tool
+    def divide(a: int, b: int) -> float:
+        """Divide a and b slowly.
+
+        Args:
+            a: first int
+            b: second int
+        """
+        time.sleep(TOOL_LATENCY)
+        return a / b
+
+    return [add, multiply, divide]
+
+def build_graph(tools):
+    def assistant(state: State):
+        return {"messages": [get_llm_with_tools(tools).invoke(state["messages"])]}
+
+    builder = StateGraph(State)
+    builder.add_node("assistant", assistant)
+    builder.add_node("tools", ToolNode(tools))
+    builder.add_edge(START, "assistant")
+    builder.add_conditional_edges("assistant", tools_condition)
+    builder.add_edge("tools", "assistant")
+    return builder.compile()
+
+def run(graph, sessions, workers):
+    def session(i):
+        return graph.invoke({"messages": [HumanMessage(content=QUESTIONS[i % len(QUESTIONS)])]})
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        list(pool.map(session, range(sessions)))
+    return time.perf_counter() - start
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Benchmark memoized pure tools")
+    parser.add_argument("--sessions", type=int, default=200)
+    parser.add_argument("--workers", type=int, default=16)
+    parser.add_argument("--tool-latency", type=float, default=TOOL_LATENCY)
+    args = parser.parse_args()
+    TOOL_LATENCY = args.tool_latency
+
+    use_fake_llm()
+    cache = ToolCache(max_entries=1024)
+    for name, tools in [("plain", make_tools()), ("pure", [pure(t, cache=cache) for t in make_tools()])]:
+        elapsed = run(build_graph(tools), args.sessions, args.workers)
+        print(f"{name:<6} {args.sessions} sessions in {elapsed:6.2f} s  ({args.sessions / elapsed:7.1f} sessions/s)")
+    for tool_name, stats in cache.tool_stats().items():
+        print(f"  {tool_name:<9} hits={stats['hits']:<5} misses={stats['misses']:<3} hit rate={stats['hit_rate']:.1%}")
@@ -0,0 +1,37 @@
+import argparse
+import contextlib
+import importlib
+import io
+import os
+from statistics import mean
+from fake_llm import use_fake_llm
+
+os.environ.setdefault("AZURE_OPENAI_API_KEY", "api_key")
+os.environ.setdefault("AZURE_OPENAI_ENDPOINT", "endpoint")
+
+# Time to first token of the chatbot in 0_simple_agent.py, with node-update streaming
+# and with token streaming, against the fake model streaming a canned answer.
+
+QUESTION = "What do you know about LangGraph? It is a library for building stateful, multi-actor applications with LLMs."
+
+def run(agent, stream_tokens, turns):
+    agent.turn_latencies.clear()
+    with contextlib.redirect_stdout(io.StringIO()):
+        for _ in range(turns):
+            agent.stream_graph_updates(QUESTION, stream_tokens)
+    ttft = mean(t["time_to_first_token"] for t in agent.turn_latencies)
+    total = mean(t["total"] for t in agent.turn_latencies)
+    return ttft, total
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Compare time to first token with and without token streaming")
+    parser.add_argument("--turns", type=int, default=10)
+    parser.add_argument("--latency", type=float, default=0.2, help="fake model time to first token in seconds")
+    parser.add_argument("--token-latency", type=float, default=0.02, help="fake model seconds per streamed chunk")
+    args = parser.parse_args()
+
+    use_fake_llm(latency=args.latency, token_latency=args.token_latency)
+    agent = importlib.import_module("0_simple_agent")
+    for name, stream_tokens in [("node updates", False), ("token stream", True)]:
+        ttft, total = run(agent, stream_tokens, args.turns)
+        print(f"{name:<14} time to first token={ttft * 1e3:7.1f} ms  total={total * 1e3:7.1f} ms")
@@ -0,0 +1,193 @@
+import threading
+import time
+from collections import OrderedDict, defaultdict
+from langgraph.checkpoint.memory import InMemorySaver
+
+# A drop-in replacement for MemorySaver that can't grow without limit.
+# MemorySaver keeps every checkpoint of every thread_id for the life of the process.
+# BoundedMemorySaver stores the same data, but caps:
+#   - max_threads: number of thread_ids kept; the least recently used thread is evicted first
+#   - max_checkpoints_per_thread: older checkpoints of a thread (and their writes/blobs) are dropped
+#   - max_bytes: total size of the serialized checkpoints, writes and channel blobs
+#   - idle_ttl: threads not read or written for this many seconds are evicted (on the next write or
+#     evict_idle() sweep), and read as empty once expired even before that
+# Any limit left as None is not enforced. Evicted threads simply start over with an empty history.
+#
+# Pruning old checkpoints of a thread is only safe for plain channels, where every checkpoint
+# references a full value. Don't combine max_checkpoints_per_thread with DeltaChannel state
+# (langgraph.channels.delta), whose values are rebuilt from the writes of earlier checkpoints.
+# DeltaMemorySaver (delta_checkpoint.py) is a separate saver with no limits of its own.
+
+
+def _size(typed):
+    # Serialized entries are (type, bytes) pairs
+    return len(typed[1])
+
+
+class BoundedMemorySaver(InMemorySaver):
+    def __init__(self, *, max_threads=None, max_checkpoints_per_thread=None, max_bytes=None, idle_ttl=None, serde=None):
+        super().__init__(serde=serde)
+        self.max_threads = max_threads
+        self.max_checkpoints_per_thread = max_checkpoints_per_thread
+        self.max_bytes = max_bytes
+        self.idle_ttl = idle_ttl
+        self._lock = threading.RLock()
+        # thread_id -> last access time, least recently used first
+        self._last_access = OrderedDict()
+        self._thread_bytes = defaultdict(int)
+        self._resident_bytes = 0
+        # (thread_id, checkpoint ns, checkpoint id) -> channel versions the checkpoint references
+        self._versions = {}
+        self.evictions = {"lru": 0, "idle_ttl": 0, "bytes": 0, "checkpoints": 0}
+
+    def _touch(self, thread_id):
+        self._last_access[thread_id] = time.monotonic()
+        self._last_access.move_to_end(thread_id)
+
+    def _account(self, thread_id, delta):
+        self._thread_bytes[thread_id] += delta
+        self._resident_bytes += delta
+
+    def _expired(self, thread_id):
+        # Drops the thread if it has been idle past idle_ttl, which a sweep may not have done yet
+        last = self._last_access.get(thread_id)
+        if self.idle_ttl is None or last is None or time.monotonic() - last < self.idle_ttl:
+            return False
+        self._drop_thread(thread_id)
+        self.evictions["idle_ttl"] += 1
+        return True
+
+    def get_tuple(self, config):
+        with self._lock:
+            thread_id = config["configurable"]["thread_id"]
+            if self._expired(thread_id):
+                return None
+            if thread_id in self.storage:
+                self._touch(thread_id)
+            return super().get_tuple(config)
+
+    def list(self, config, **kwargs):
+        with self._lock:
+            if config is not None:
+                self._expired(config["configurable"]["thread_id"])
+            # Materialized under the lock, a concurrent eviction could change the dicts being walked
+            return iter(list(super().list(config, **kwargs)))
+
+    def put(self, config, checkpoint, metadata, new_versions):
+        with self._lock:
+            thread_id = config["configurable"]["thread_id"]
+            checkpoint_ns = config["configurable"]["checkpoint_ns"]
+            replaced = [
+                self.blobs[(thread_id, checkpoint_ns, k, v)]
+                for k, v in new_versions.items()
+                if (thread_id, checkpoint_ns, k, v) in self.blobs
+            ]
+            next_config = super().put(config, checkpoint, metadata, new_versions)
+
+            checkpoint_id = checkpoint["id"]
+            saved, saved_metadata, _ = self.storage[thread_id][checkpoint_ns][checkpoint_id]
+            added = _size(saved) + _size(saved_metadata)
+            added += sum(_size(self.blobs[(thread_id, checkpoint_ns, k, v)]) for k, v in new_versions.items())
+            added -= sum(_size(b) for b in replaced)
+            self._account(thread_id, added)
+            self._versions[(thread_id, checkpoint_ns, checkpoint_id)] = dict(checkpoint["channel_versions"])
+
+            self._touch(thread_id)
+            self._prune_checkpoints(thread_id, checkpoint_ns)
+            self._enforce_limits(keep=thread_id)
+            return next_config
+
+    def put_writes(self, config, writes, task_id, task_path=""):
+        with self._lock:
+            thread_id = config["configurable"]["thread_id"]
+            outer_key = (thread_id, config["configurable"].get("checkpoint_ns", ""), config["configurable"]["checkpoint_id"])
+            before = sum(_size(w[2]) for w in self.writes.get(outer_key, {}).values())
+            super().put_writes(config, writes, task_id, task_path)
+            after = sum(_size(w[2]) for w in self.writes.get(outer_key, {}).values())
+            self._account(thread_id, after - before)
+            self._touch(thread_id)
+            self._enforce_limits(keep=thread_id)
+
+    def delete_thread(self, thread_id):
+        with self._lock:
+            self._drop_thread(thread_id)
+
+    def _drop_checkpoint(self, thread_id, checkpoint_ns, checkpoint_id):
+        saved, saved_metadata, _ = self.storage[thread_id][checkpoint_ns].pop(checkpoint_id)
+        freed = _size(saved) + _size(saved_metadata)
+        for write in self.writes.pop((thread_id, checkpoint_ns, checkpoint_id), {}).values():
+            freed += _size(write[2])
+        self._versions.pop((thread_id, checkpoint_ns, checkpoint_id), None)
+        return freed
+
+    def _prune_checkpoints(self, thread_id, checkpoint_ns):
+        if self.max_checkpoints_per_thread is None:
+            return
+        checkpoints = self.storage[thread_id][checkpoint_ns]
+        excess = len(checkpoints) - self.max_checkpoints_per_thread
+        if excess <= 0:
+            return
+        # Checkpoint ids sort by creation time
+        dropped = sorted(checkpoints)[:excess]
+        dropped_versions = [self._versions.get((thread_id, checkpoint_ns, c), {}) for c in dropped]
+        freed = sum(self._drop_checkpoint(thread_id, checkpoint_ns, c) for c in dropped)
+
+        # Blobs are shared between checkpoints, so only drop the ones nothing left references.
+        # The oldest remaining checkpoint lost its parent, so it becomes the new root.
+        in_use = set()
+        for c in checkpoints:
+            in_use.update(self._versions.get((thread_id, checkpoint_ns, c), {}).items())
+        for versions in dropped_versions:
+            for channel_version in versions.items():
+                if channel_version not in in_use:
+                    blob = self.blobs.pop((thread_id, checkpoint_ns, *channel_version), None)
+                    if blob is not None:
+                        freed += _size(blob)
+                        in_use.add(channel_version)
+        oldest = min(checkpoints)
+        saved, saved_metadata, _ = checkpoints[oldest]
+        checkpoints[oldest] = (saved, saved_metadata, None)
+
+        self._account(thread_id, -freed)
+        self.evictions["checkpoints"] += excess
+
+    def _drop_thread(self, thread_id):
+        for checkpoint_ns, checkpoints in self.storage.pop(thread_id, {}).items():
+            for checkpoint_id in checkpoints:
+                self.writes.pop((thread_id, checkpoint_ns, checkpoint_id), None)
+                for channel, version in self._versions.pop((thread_id, checkpoint_ns, checkpoint_id), {}).items():
+                    self.blobs.pop((thread_id, checkpoint_ns, channel, version), None)
+        self._last_access.pop(thread_id, None)
+        self._resident_bytes -= self._thread_bytes.pop(thread_id, 0)
+
+    def _evict_oldest(self, reason):
+        thread_id = next(iter(self._last_access))
+        self._drop_thread(thread_id)
+        self.evictions[reason] += 1
+
+    def _enforce_limits(self, keep=None):
+        # `keep` is the thread being written to; it is never evicted to make room for itself
+        if self.idle_ttl is not None:
+            cutoff = time.monotonic() - self.idle_ttl
+            while self._last_access and next(iter(self._last_access.values())) < cutoff:
+                self._evict_oldest("idle_ttl")
+        if self.max_threads is not None:
+            while len(self._last_access) > self.max_threads and next(iter(self._last_access)) != keep:
+                self._evict_oldest("lru")
+        if self.max_bytes is not None:
+            while self._resident_bytes > self.max_bytes and self._last_access and next(iter(self._last_access)) != keep:
+                self._evict_oldest("bytes")
+
+    def evict_idle(self):
+        # Run TTL eviction without waiting for the next write
+        with self._lock:
+            self._enforce_limits()
+
+    def metrics(self):
+        with self._lock:
+            return {
+                "threads": len(self._last_access),
+                "checkpoints": len(self._versions),
+                "resident_bytes": self._resident_bytes,
+                "evictions": dict(self.evictions),
+            }
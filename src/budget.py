@@ -0,0 +1,135 @@
+import time
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+from langgraph.graph import END
+from langgraph.prebuilt import tools_condition
+from langgraph.types import Send
+from metrics import default_metrics
+
+# Per-invocation budgets for a ReAct loop (assistant -> tools -> assistant -> ...).
+# Without them the loop runs for as long as the model asks for tools, up to the recursion limit.
+# A Budget caps, for one invocation (one user message):
+#   max_seconds            wall-clock time since the invocation started
+#   max_prompt_tokens      prompt tokens summed over the assistant's model calls (summarizing included)
+#   max_completion_tokens  completion tokens summed over the same calls
+#   max_tool_calls         tool calls run
+# None leaves a budget unlimited. The default Budget of the guard can be replaced for one invocation:
+#   graph.invoke(inputs, {"configurable": {"budget": Budget(max_tool_calls=2)}})   # or a dict of the same
+#
+# What has been used lives in state["budget"] (see current_usage / charge_tokens / charge_tool_calls), and is reset
+# by the first assistant step after a HumanMessage, so with a checkpointer every turn gets a fresh budget.
+# BudgetGuard routes the loop: after the assistant (in place of tools_condition) and after the tools, a used up
+# budget goes to its "budget_exceeded" node instead of another round, with the name of the budget that ran out
+# in state["budget"]["exhausted"] (sent along with the state, so it is the one the router saw). That node answers the pending tool calls
+# with a "skipped" ToolMessage, so the history stays valid for the next turn, and ends with a plain answer
+# that gives the latest tool result. Every stop is counted as agent_budget_exhausted_total{budget}.
+# The budgets are checked between steps: a model or tool call that is running is not cut short
+# (resilience.ResiliencePolicy puts a deadline on model calls).
+
+BUDGETS = ("seconds", "prompt_tokens", "completion_tokens", "tool_calls")
+
+
+class Budget:
+    def __init__(self, max_seconds=None, max_prompt_tokens=None, max_completion_tokens=None, max_tool_calls=None):
+        self.max_seconds = max_seconds
+        self.max_prompt_tokens = max_prompt_tokens
+        self.max_completion_tokens = max_completion_tokens
+        self.max_tool_calls = max_tool_calls
+
+    def __repr__(self):
+        limits = ", ".join(f"max_{name}={getattr(self, 'max_' + name)!r}" for name in BUDGETS
+                           if getattr(self, "max_" + name) is not None)
+        return f"Budget({limits})"
+
+    def exhausted(self, usage, pending_tool_calls=0):
+        # Name of the first budget used up, counting tool calls about to run, or None
+        if self.max_seconds is not None and time.time() - usage["started"] >= self.max_seconds:
+            return "seconds"
+        if self.max_prompt_tokens is not None and usage["prompt_tokens"] >= self.max_prompt_tokens:
+            return "prompt_tokens"
+        if self.max_completion_tokens is not None and usage["completion_tokens"] >= self.max_completion_tokens:
+            return "completion_tokens"
+        if self.max_tool_calls is not None and usage["tool_calls"] + pending_tool_calls > self.max_tool_calls:
+            return "tool_calls"
+        return None
+
+    def limit(self, name):
+        return getattr(self, "max_" + name)
+
+
+def new_usage():
+    return {"started": time.time(), "prompt_tokens": 0, "completion_tokens": 0, "tool_calls": 0}
+
+
+def current_usage(state):
+    # What the current invocation has used so far: a fresh count if it starts with this step
+    messages = state["messages"]
+    if not state.get("budget") or (messages and isinstance(messages[-1], HumanMessage)):
+        return new_usage()
+    return state["budget"]
+
+
+def charge_tokens(usage, message):
+    tokens = getattr(message, "usage_metadata", None) or {}
+    return dict(usage, prompt_tokens=usage["prompt_tokens"] + tokens.get("input_tokens", 0),
+                completion_tokens=usage["completion_tokens"] + tokens.get("output_tokens", 0))
+
+
+def charge_tool_calls(usage, count):
+    return dict(usage, tool_calls=usage["tool_calls"] + count)
+
+
+class BudgetGuard:
+    def __init__(self, budget=None, node="budget_exceeded", assistant="assistant", metrics=None):
+        self.budget = budget or Budget()
+        self.node = node
+        self.assistant = assistant
+        self.metrics = default_metrics if metrics is None else metrics
+
+    def budget_for(self, config):
+        budget = ((config or {}).get("configurable") or {}).get("budget")
+        if budget is None:
+            return self.budget
+        return Budget(**budget) if isinstance(budget, dict) else budget
+
+    def exhausted(self, state, config=None):
+        pending = state["messages"][-1].tool_calls if isinstance(state["messages"][-1], AIMessage) else []
+        return self.budget_for(config).exhausted(current_usage(state), len(pending))
+
+    def _stop(self, state, name):
+        # To the budget node, with the reason attached to the state it gets
+        return Send(self.node, dict(state, budget=dict(current_usage(state), exhausted=name)))
+
+    def after_assistant(self, state, config=None):
+        # tools_condition, unless the tool calls asked for would go over budget
+        route = tools_condition(state)
+        if route == END:
+            return route
+        name = self.exhausted(state, config)
+        return route if name is None else self._stop(state, name)
+
+    def after_tools(self, state, config=None):
+        # Back to the assistant, unless the time or tokens ran out
+        name = self.exhausted(state, config)
+        return self.assistant if name is None else self._stop(state, name)
+
+    def answer(self, state, config=None):
+        # The node ending a run that went over budget, for the reason the router stopped it
+        name = (state.get("budget") or {}).get("exhausted") or self.exhausted(state, config)
+        if self.metrics.enabled:
+            self.metrics.inc("agent_budget_exhausted_total", budget=name)
+        messages = state["messages"]
+        pending = messages[-1].tool_calls if isinstance(messages[-1], AIMessage) else []
+        skipped = [ToolMessage(content=f"Skipped: the {name.replace('_', ' ')} budget of this request is used up.",
+                               name=call["name"], tool_call_id=call["id"], status="error") for call in pending]
+        result = None
+        for m in reversed(messages):
+            if isinstance(m, HumanMessage):
+                break
+            if isinstance(m, ToolMessage) and m.status != "error":
+                result = m.content
+                break
+        limit = self.budget_for(config).limit(name)
+        content = f"I had to stop before finishing: this request used up its {name.replace('_', ' ')} budget ({limit:g})."
+        if result is not None:
+            content += f" The latest result was {result}."
+        return {"messages": skipped + [AIMessage(content=content)], "budget": dict(current_usage(state), exhausted=name)}
@@ -0,0 +1,146 @@
+import ormsgpack
+from langchain_core.messages import (
+    AIMessage, AIMessageChunk, ChatMessage, FunctionMessage, HumanMessage, HumanMessageChunk,
+    RemoveMessage, SystemMessage, ToolMessage, ToolMessageChunk,
+)
+from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
+
+try:
+    # Private helpers of the default serializer (langgraph-checkpoint 2.x - 4.x), reused so everything
+    # that isn't a message is encoded exactly like it does
+    from langgraph.checkpoint.serde.jsonplus import _msgpack_default, _option
+except ImportError:
+    _msgpack_default = _option = None
+
+# A compact binary serializer for checkpoints that are mostly chat messages.
+# The default JsonPlusSerializer is msgpack too, but writes every message as a generic pydantic object:
+# its module and class name, every field including the ones left at their defaults (additional_kwargs={},
+# response_metadata={}, name=None, invalid_tool_calls=[], ...) under its full name, and the name of the
+# method to rebuild it with; on read it runs the message's validators again. At every super-step the
+# whole message list is written, so on long threads this is most of the checkpointing CPU time.
+# CompactSerializer writes each message as one msgpack extension holding
+#   [type tag, field, value, field, value, ...]
+# where the type tag is a small int from MESSAGE_TYPES, the fields are small ints from FIELDS (fields
+# missing from FIELDS are written by name), and only fields that differ from their default are written.
+# Tool calls of the usual {"name", "args", "id", "type": "tool_call"} shape are written as [name, args, id].
+# Messages are rebuilt the way model_construct does, without validation, and compare equal to the ones written.
+# Anything else (Send, Interrupt, pydantic models, datetimes, ...) is encoded like the default serializer,
+# and checkpoints it wrote ("msgpack") still load.
+#
+#   MemorySaver(serde=CompactSerializer())
+#
+# The tags and field numbers are part of the stored format: only ever append to MESSAGE_TYPES and FIELDS.
+# It relies on private parts of JsonPlusSerializer (_msgpack_default, _option, _unpack_ext_hook). With a
+# langgraph-checkpoint release that doesn't have them, `compact` is False and CompactSerializer writes what
+# JsonPlusSerializer writes; only reading back "compact" data that holds non-message objects fails.
+
+# Extension type of a message; JsonPlusSerializer uses 0-7
+EXT_MESSAGE = 32
+
+MESSAGE_TYPES = (
+    HumanMessage, AIMessage, ToolMessage, SystemMessage, RemoveMessage, ChatMessage, FunctionMessage,
+    AIMessageChunk, HumanMessageChunk, ToolMessageChunk,
+)
+
+FIELDS = (
+    "content", "additional_kwargs", "response_metadata", "type", "name", "id", "tool_calls",
+    "invalid_tool_calls", "usage_metadata", "tool_call_id", "artifact", "status", "role",
+    "tool_call_chunks", "chunk_position",
+)
+
+TOOL_CALLS = FIELDS.index("tool_calls")
+
+# Stands for the default of required fields (content, tool_call_id), which are always written
+_REQUIRED = object()
+
+
+def _is_plain_tool_call(tool_call):
+    return len(tool_call) == 4 and tool_call.get("type") == "tool_call" and "name" in tool_call \
+        and "args" in tool_call and "id" in tool_call
+
+
+class CompactSerializer(JsonPlusSerializer):
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.compact = _msgpack_default is not None and callable(getattr(self, "_unpack_ext_hook", None))
+        self._tags = {cls: tag for tag, cls in enumerate(MESSAGE_TYPES)}
+        self._field_numbers = {name: number for number, name in enumerate(FIELDS)}
+        # Per message type: (field key, field name, default) of every field, in declaration order
+        self._layouts = {}
+        for cls in MESSAGE_TYPES:
+            layout = []
+            for name, field in cls.model_fields.items():
+                default = field.get_default(call_default_factory=True) if not field.is_required() else _REQUIRED
+                layout.append((self._field_numbers.get(name, name), name, default))
+            self._layouts[cls] = layout
+
+    def _pack(self, obj):
+        return ormsgpack.packb(obj, default=self._default, option=_option)
+
+    def _default(self, obj):
+        tag = self._tags.get(type(obj))
+        if tag is None:
+            return _msgpack_default(obj)
+        items = [tag]
+        values = obj.__dict__
+        for key, name, default in self._layouts[type(obj)]:
+            value = values[name]
+            if value is default or (value == default and type(value) is type(default)):
+                continue
+            if key == TOOL_CALLS and all(_is_plain_tool_call(tc) for tc in value):
+                value = [[tc["name"], tc["args"], tc["id"]] for tc in value]
+            items.append(key)
+            items.append(value)
+        if obj.__pydantic_extra__:
+            for name, value in obj.__pydantic_extra__.items():
+                items.append(name)
+                items.append(value)
+        return ormsgpack.Ext(EXT_MESSAGE, self._pack(items))
+
+    def _ext_hook(self, code, data):
+        if code != EXT_MESSAGE:
+            if not self.compact:
+                raise ValueError(f"can't decode msgpack extension {code} with this langgraph-checkpoint version")
+            return self._unpack_ext_hook(code, data)
+        items = ormsgpack.unpackb(data, ext_hook=self._ext_hook, option=ormsgpack.OPT_NON_STR_KEYS)
+        fields = {}
+        for i in range(1, len(items), 2):
+            key, value = items[i], items[i + 1]
+            if key == TOOL_CALLS and value and isinstance(value[0], list):
+                value = [{"name": name, "args": args, "id": id, "type": "tool_call"} for name, args, id in value]
+            fields[FIELDS[key] if isinstance(key, int) else key] = value
+        return self._construct(MESSAGE_TYPES[items[0]], fields)
+
+    def _construct(self, cls, fields):
+        # What model_construct does, without looking up every default again (pydantic inspects the
+        # signature of each default factory per call, which costs more than the rest of decoding)
+        fields_set = set(fields)
+        values = {}
+        for _, name, default in self._layouts[cls]:
+            if name in fields:
+                values[name] = fields.pop(name)
+            elif type(default) is dict or type(default) is list:
+                values[name] = default.copy()
+            else:
+                values[name] = default
+        message = cls.__new__(cls)
+        object.__setattr__(message, "__dict__", values)
+        object.__setattr__(message, "__pydantic_fields_set__", fields_set)
+        object.__setattr__(message, "__pydantic_extra__", fields)
+        object.__setattr__(message, "__pydantic_private__", None)
+        return message
+
+    def dumps_typed(self, obj):
+        if obj is None or isinstance(obj, (bytes, bytearray)) or not self.compact:
+            return super().dumps_typed(obj)
+        try:
+            return "compact", self._pack(obj)
+        except ormsgpack.MsgpackEncodeError:
+            # Whatever msgpack can't hold takes the default serializer's fallbacks (pickle, if enabled)
+            return super().dumps_typed(obj)
+
+    def loads_typed(self, data):
+        type_, data_ = data
+        if type_ == "compact":
+            return ormsgpack.unpackb(data_, ext_hook=self._ext_hook, option=ormsgpack.OPT_NON_STR_KEYS)
+        return super().loads_typed(data)
@@ -0,0 +1,181 @@
+import copy
+from collections import OrderedDict
+from langgraph.checkpoint.memory import InMemorySaver
+
+# Delta-encoded storage for append-only list channels such as `messages: Annotated[list, add_messages]`.
+# MemorySaver stores the full message list again at every super-step, so a thread with N steps
+# stores O(N^2) messages. DeltaMemorySaver stores, per new channel version, only what changed since
+# the parent checkpoint's version of that channel:
+#   remove:  ids of messages that are gone (RemoveMessage)
+#   replace: [position, message] pairs, for messages updated in place (same id)
+#   append:  messages added at the end
+# Reads rebuild the full list by walking back to the nearest full snapshot and replaying the deltas.
+# Every `snapshot_every`-th version of a channel is stored as a full snapshot, which bounds read cost.
+# Chunk lists (text_state.TextChannel) are stored as the chunks appended since the parent version.
+# Anything that doesn't look like a list update (a new thread, a forked history, a reordered list)
+# is stored as a full snapshot as well.
+# The rebuilt lists are cached privately: they are built from deserialized blobs, never from the
+# graph's own objects, and every read gets a deep copy, so changing a value read from one checkpoint
+# can't change another.
+#
+# langgraph also has DeltaChannel (langgraph.channels.delta, beta), which stores only a sentinel per step
+# and replays writes through the saver's get_delta_channel_history. It needs the state schema to declare
+# the channel with a batch reducer in place of add_messages, and its stored format isn't stable yet.
+# DeltaMemorySaver keeps the graphs' state schemas as they are and only changes how the saver stores them.
+
+DELTA_PREFIX = "delta:"
+
+
+class DeltaMemorySaver(InMemorySaver):
+    def __init__(self, *, delta_channels=("messages",), snapshot_every=16, cache_size=1024, serde=None):
+        super().__init__(serde=serde)
+        self.delta_channels = set(delta_channels)
+        self.snapshot_every = snapshot_every
+        self.cache_size = cache_size
+        # thread_id -> {(checkpoint ns, checkpoint id) -> channel versions of that checkpoint}
+        self._checkpoint_versions = {}
+        # (thread_id, checkpoint ns, channel, version) -> (materialized list, deltas since last snapshot)
+        self._materialized = OrderedDict()
+
+    def _remember(self, key, value, depth):
+        self._materialized[key] = (value, depth)
+        self._materialized.move_to_end(key)
+        if len(self._materialized) > self.cache_size:
+            self._materialized.popitem(last=False)
+
+    def _resolve(self, thread_id, checkpoint_ns, channel, version):
+        # Returns (full list, deltas since last snapshot), or None if the blob is missing
+        key = (thread_id, checkpoint_ns, channel, version)
+        if key in self._materialized:
+            self._materialized.move_to_end(key)
+            return self._materialized[key]
+
+        # Walk back to the nearest snapshot (or cached value), then replay forward
+        chain = []
+        base = None
+        while True:
+            blob = self.blobs.get(key)
+            if blob is None:
+                return None
+            if not blob[0].startswith(DELTA_PREFIX):
+                if blob[0] == "empty":
+                    return None
+                base = (self.serde.loads_typed(blob), 0)
+                break
+            delta = self.serde.loads_typed((blob[0][len(DELTA_PREFIX):], blob[1]))
+            chain.append((key, delta))
+            key = (thread_id, checkpoint_ns, channel, delta["base"])
+            if key in self._materialized:
+                base = self._materialized[key]
+                break
+
+        value, depth = base
+        for key, delta in reversed(chain):
+            value = apply_delta(value, delta)
+            depth += 1
+            self._remember(key, value, depth)
+        if not chain:
+            self._remember(key, value, depth)
+        return value, depth
+
+    def _load_blobs(self, thread_id, checkpoint_ns, versions):
+        result = {}
+        for k, ver in versions.items():
+            kk = (thread_id, checkpoint_ns, k, ver)
+            if kk not in self.blobs:
+                continue
+            vv = self.blobs[kk]
+            if vv[0] == "empty":
+                continue
+            if k in self.delta_channels:
+                resolved = self._resolve(thread_id, checkpoint_ns, k, ver)
+                if resolved is None:
+                    # A base version is gone (the blob was deleted): like a missing blob, the channel is left out
+                    continue
+                # Callers get their own copy, the cached one is shared
+                result[k] = copy.deepcopy(resolved[0])
+            else:
+                result[k] = self.serde.loads_typed(vv)
+        return result
+
+    def put(self, config, checkpoint, metadata, new_versions):
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"]["checkpoint_ns"]
+        parent_versions = self._checkpoint_versions.get(thread_id, {}).get(
+            (checkpoint_ns, config["configurable"].get("checkpoint_id"))
+        ) or {}
+        values = checkpoint["channel_values"]
+
+        # Let InMemorySaver store everything else, then overwrite the delta channel blobs
+        plain_versions = {k: v for k, v in new_versions.items() if k not in self.delta_channels or k not in values}
+        next_config = super().put(config, checkpoint, metadata, plain_versions)
+        for k, v in new_versions.items():
+            if k in plain_versions:
+                continue
+            self.blobs[(thread_id, checkpoint_ns, k, v)] = self._encode(
+                thread_id, checkpoint_ns, k, v, values[k], parent_versions.get(k)
+            )
+        self._checkpoint_versions.setdefault(thread_id, {})[(checkpoint_ns, checkpoint["id"])] = dict(
+            checkpoint["channel_versions"]
+        )
+        return next_config
+
+    def _encode(self, thread_id, checkpoint_ns, channel, version, value, parent_version):
+        key = (thread_id, checkpoint_ns, channel, version)
+        parent = None
+        if parent_version is not None and isinstance(value, list):
+            parent = self._resolve(thread_id, checkpoint_ns, channel, parent_version)
+        if parent is not None and parent[1] + 1 < self.snapshot_every:
+            diff = diff_chunks if value and isinstance(value[0], str) else diff_messages
+            delta = diff(parent[0], value)
+            if delta is not None:
+                delta["base"] = parent_version
+                type_, data = self.serde.dumps_typed(delta)
+                # Cached from what was stored, so the graph's own objects never end up in the cache
+                self._remember(key, apply_delta(parent[0], self.serde.loads_typed((type_, data))), parent[1] + 1)
+                return (DELTA_PREFIX + type_, data)
+        blob = self.serde.dumps_typed(value)
+        if isinstance(value, list):
+            self._remember(key, self.serde.loads_typed(blob), 0)
+        return blob
+
+    def delete_thread(self, thread_id):
+        super().delete_thread(thread_id)
+        self._checkpoint_versions.pop(thread_id, None)
+        for key in [k for k in self._materialized if k[0] == thread_id]:
+            del self._materialized[key]
+
+
+def diff_messages(old, new):
+    # Describe `new` as an add_messages update of `old`, or return None if it isn't one
+    new_ids = {m.id for m in new}
+    if None in new_ids or any(m.id is None for m in old):
+        return None
+    remove = [m.id for m in old if m.id not in new_ids]
+    kept = [m for m in old if m.id in new_ids]
+    if len(kept) > len(new):
+        return None
+    replace = []
+    for i, old_message in enumerate(kept):
+        message = new[i]
+        if message.id != old_message.id:
+            return None
+        if message is not old_message and message != old_message:
+            replace.append([i, message])
+    return {"remove": remove, "replace": replace, "append": new[len(kept):]}
+
+
+def diff_chunks(old, new):
+    # A chunk list only grows at the end; anything else (e.g. an Overwrite) is not a delta
+    if len(new) < len(old) or any(a is not b and a != b for a, b in zip(old, new)):
+        return None
+    return {"remove": [], "replace": [], "append": new[len(old):]}
+
+
+def apply_delta(old, delta):
+    removed = set(delta["remove"])
+    value = [m for m in old if m.id not in removed] if removed else list(old)
+    for i, message in delta["replace"]:
+        value[i] = message
+    value.extend(delta["append"])
+    return value
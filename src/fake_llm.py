@@ -0,0 +1,205 @@
+import asyncio
+import json
+import re
+import time
+from typing import Any, Optional
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, HumanMessage, ToolMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from langchain_core.utils.function_calling import convert_to_openai_tool
+import llm_clients
+
+# A local, deterministic stand-in for AzureChatOpenAI.
+# It reads the latest user message, works out which add / multiply / divide calls the request asks for,
+# and emits them one tool call per turn, exactly like the real model does in the ReAct loop
+# (or, with parallel_tool_calls=True, every independent call of a turn at once).
+# For example "Add 3 and 4. Multiply the output by 2. Divide the output by 5" produces
+# add(3, 4) -> multiply(7, 2) -> divide(14, 5) -> "The result is 2.8."
+# Each call sleeps for `latency` seconds so the graphs can be benchmarked without a live endpoint.
+# When streamed, `latency` is the time to first token and every further chunk takes `token_latency` seconds.
+
+OPERATIONS = {
+    "add": ("add", "plus", "sum"),
+    "multiply": ("multipl", "times"),
+    "divide": ("divide",),
+}
+
+# Words that refer back to the result of the previous tool call
+PREVIOUS_RESULT = ("output", "that", "result", " it")
+
+PREV = object()
+
+
+def parse_plan(text):
+    # Turn a request into a list of (tool name, [a, b]) steps, where PREV stands for the previous result
+    plan = []
+    for sentence in re.split(r"[.?!;\n]+", text.lower()):
+        op = next((name for name, words in OPERATIONS.items() if any(w in sentence for w in words)), None)
+        if op is None:
+            continue
+        numbers = [to_number(n) for n in re.findall(r"-?\d+(?:\.\d+)?", sentence)]
+        if any(w in sentence for w in PREVIOUS_RESULT) and len(numbers) < 2:
+            numbers = [PREV] + numbers
+        if len(numbers) >= 2:
+            plan.append((op, numbers[:2]))
+    return plan
+
+
+def to_number(value):
+    value = float(value)
+    return int(value) if value.is_integer() else value
+
+
+def count_tokens(messages):
+    # Rough, deterministic token estimate: ~4 characters per token
+    return sum(len(str(m.content)) // 4 + 1 for m in messages)
+
+
+class FakeArithmeticChatModel(BaseChatModel):
+    # Seconds to sleep per call, standing in for the model round trip
+    latency: float = 0.0
+    # Seconds between streamed chunks
+    token_latency: float = 0.0
+    # Issue independent steps (ones that don't use the previous result) as several tool calls in one turn
+    parallel_tool_calls: bool = False
+    # Number of calls served, handy for counting LLM round trips in benchmarks
+    calls: int = 0
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-arithmetic"
+
+    def bind_tools(self, tools, **kwargs):
+        # Convert the tools once, just like the real client does, so the bound runnable is comparable
+        return self.bind(tools=[convert_to_openai_tool(t) for t in tools], **kwargs)
+
+    def respond(self, messages, tools=None):
+        bound = {t["function"]["name"] for t in tools or []}
+        last_human = max((i for i, m in enumerate(messages) if isinstance(m, HumanMessage)), default=-1)
+        request = messages[last_human].content if last_human >= 0 else ""
+        results = [m for m in messages[last_human + 1:] if isinstance(m, ToolMessage)]
+        plan = [step for step in parse_plan(str(request)) if step[0] in bound]
+
+        if "Plan" in bound:
+            # Planning mode (7_plan_execute.py): the whole request as one plan, "$N" is the result of step N
+            steps = []
+            for i, (name, args) in enumerate(parse_plan(str(request))):
+                a, b = [(f"${i - 1}" if i else self.previous_result(messages)) if arg is PREV else arg for arg in args]
+                steps.append({"tool": name, "args": {"a": a, "b": b}})
+            if steps:
+                message = AIMessage(
+                    content="",
+                    tool_calls=[{"name": "Plan", "args": {"steps": steps}, "id": f"call_{self.calls}", "type": "tool_call"}],
+                )
+            else:
+                message = AIMessage(content=f"You said: {request}")
+        elif len(results) < len(plan):
+            steps = plan[len(results):len(results) + 1]
+            if self.parallel_tool_calls:
+                # Every following step that doesn't need a previous result can go out in the same turn
+                for step in plan[len(results) + 1:]:
+                    if PREV in step[1]:
+                        break
+                    steps.append(step)
+            previous = self.previous_result(messages)
+            tool_calls = []
+            for name, args in steps:
+                a, b = [previous if arg is PREV else arg for arg in args]
+                tool_calls.append(
+                    {"name": name, "args": {"a": a, "b": b}, "id": f"call_{self.calls}_{len(tool_calls)}", "type": "tool_call"}
+                )
+            message = AIMessage(content="", tool_calls=tool_calls)
+        elif results:
+            message = AIMessage(content=f"The result is {results[-1].content}.")
+        else:
+            message = AIMessage(content=f"You said: {request}")
+
+        input_tokens = count_tokens(messages)
+        output_tokens = count_tokens([message])
+        message.usage_metadata = {
+            "input_tokens": input_tokens,
+            "output_tokens": output_tokens,
+            "total_tokens": input_tokens + output_tokens,
+        }
+        self.calls += 1
+        return message
+
+    def previous_result(self, messages):
+        # The latest tool result, or the number in the latest "The result is ..." answer
+        for m in reversed(messages):
+            if isinstance(m, ToolMessage) and m.status != "error":
+                return to_number(m.content)
+            if isinstance(m, AIMessage) and (found := re.search(r"result is (-?\d+(?:\.\d+)?)", str(m.content))):
+                return to_number(found.group(1))
+        return 0
+
+    def generation_time(self, message):
+        # A non-streamed answer takes as long as streaming all of its chunks
+        if not self.token_latency:
+            return self.latency
+        return self.latency + self.token_latency * (sum(1 for _ in self.chunks(message)) - 1)
+
+    def _generate(self, messages, stop: Optional[list[str]] = None, run_manager=None, **kwargs: Any) -> ChatResult:
+        message = self.respond(messages, kwargs.get("tools"))
+        delay = self.generation_time(message)
+        if delay:
+            time.sleep(delay)
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    async def _agenerate(self, messages, stop: Optional[list[str]] = None, run_manager=None, **kwargs: Any) -> ChatResult:
+        message = self.respond(messages, kwargs.get("tools"))
+        delay = self.generation_time(message)
+        if delay:
+            await asyncio.sleep(delay)
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def chunks(self, message):
+        # Split a full answer into the chunks a streaming model would send:
+        # text word by word, then each tool call's arguments JSON a few characters at a time
+        for piece in re.findall(r"\s*\S+", message.content):
+            yield AIMessageChunk(content=piece)
+        for index, tool_call in enumerate(message.tool_calls):
+            args = json.dumps(tool_call["args"])
+            for start in range(0, len(args), 8):
+                first = start == 0
+                yield AIMessageChunk(content="", tool_call_chunks=[{
+                    "name": tool_call["name"] if first else None,
+                    "args": args[start:start + 8],
+                    "id": tool_call["id"] if first else None,
+                    "index": index,
+                    "type": "tool_call_chunk",
+                }])
+        yield AIMessageChunk(content="", usage_metadata=message.usage_metadata, chunk_position="last")
+
+    def _stream(self, messages, stop: Optional[list[str]] = None, run_manager=None, **kwargs: Any):
+        if self.latency:
+            time.sleep(self.latency)
+        message = self.respond(messages, kwargs.get("tools"))
+        for i, chunk in enumerate(self.chunks(message)):
+            if i and self.token_latency:
+                time.sleep(self.token_latency)
+            generation = ChatGenerationChunk(message=chunk)
+            if run_manager:
+                run_manager.on_llm_new_token(chunk.content, chunk=generation)
+            yield generation
+
+    async def _astream(self, messages, stop: Optional[list[str]] = None, run_manager=None, **kwargs: Any):
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        message = self.respond(messages, kwargs.get("tools"))
+        for i, chunk in enumerate(self.chunks(message)):
+            if i and self.token_latency:
+                await asyncio.sleep(self.token_latency)
+            generation = ChatGenerationChunk(message=chunk)
+            if run_manager:
+                await run_manager.on_llm_new_token(chunk.content, chunk=generation)
+            yield generation
+
+
+def use_fake_llm(latency=0.0, token_latency=0.0, parallel_tool_calls=False):
+    # Route every get_llm() / get_llm_with_tools() call in the process to the fake model
+    llm_clients.set_llm_factory(
+        lambda deployment: FakeArithmeticChatModel(
+            latency=latency, token_latency=token_latency, parallel_tool_calls=parallel_tool_calls
+        )
+    )
@@ -0,0 +1,94 @@
+import importlib
+import threading
+import time
+from collections import OrderedDict
+
+# Process-wide registry of compiled graphs.
+# Building a StateGraph and compiling it validates the whole topology and builds the channel and
+# trigger tables, so doing it per request costs milliseconds of CPU for nothing. Instead, callers ask
+# the registry for a graph by name and get back a shared compiled instance, built once per process
+# for each (name, checkpointer, options) combination, up to MAX_GRAPHS of them (least recently used go
+# first, callers still holding one keep using it). Compiled graphs are safe to share between threads:
+# every invoke / stream keeps its state in its own run, and conversations are kept apart by thread_id.
+#
+#   graph = get_graph("memory_agent", checkpointer=memory)
+#
+# The tutorial modules register their build_graph() under the names below when they are imported.
+# Asking for one of these names imports the module on first use, so callers don't have to.
+
+GRAPH_MODULES = {
+    "chatbot": "0_simple_agent",
+    "simple_graph": "1_simple_graph",
+    "chain": "2_chain",
+    "router": "3_router",
+    "react_agent": "4_agent",
+    "memory_agent": "5_agent_memory",
+    "schema_typeddict": "6_state_schema",
+    "schema_dataclass": "6_state_schema",
+    "schema_pydantic": "6_state_schema",
+    "plan_execute": "7_plan_execute",
+}
+
+MAX_GRAPHS = 256
+
+_lock = threading.RLock()
+_factories = {}    # name -> factory(checkpointer=None, **options) returning a compiled graph
+_graphs = OrderedDict()  # (name, id(checkpointer), options) -> (checkpointer, compiled graph), oldest use first
+_stats = {"compiles": 0, "hits": 0, "evictions": 0}
+_compile_seconds = {}  # name -> total seconds spent building and compiling
+
+
+def register_graph(name, factory):
+    # Registering a name again replaces its factory and drops the graphs compiled with the old one
+    with _lock:
+        _factories[name] = factory
+        for key in [k for k in _graphs if k[0] == name]:
+            del _graphs[key]
+
+
+def _factory(name):
+    factory = _factories.get(name)
+    if factory is None and name in GRAPH_MODULES:
+        importlib.import_module(GRAPH_MODULES[name])
+        factory = _factories.get(name)
+    if factory is None:
+        raise KeyError(f"no graph registered as {name!r}, known graphs: {sorted(set(_factories) | set(GRAPH_MODULES))}")
+    return factory
+
+
+def get_graph(name, checkpointer=None, **options):
+    # The checkpointer is keyed by identity: two MemorySavers are two separate stores.
+    # The entry holds on to it, so its id can't be reused while the graph is registered.
+    # (A weak reference wouldn't do: the compiled graph refers to its checkpointer and would keep it alive.)
+    key = (name, id(checkpointer), tuple(sorted(options.items())))
+    with _lock:
+        if key in _graphs:
+            _graphs.move_to_end(key)
+            _stats["hits"] += 1
+        else:
+            factory = _factory(name)
+            start = time.perf_counter()
+            if checkpointer is not None:
+                graph = factory(checkpointer=checkpointer, **options)
+            else:
+                graph = factory(**options)
+            _compile_seconds[name] = _compile_seconds.get(name, 0.0) + time.perf_counter() - start
+            _stats["compiles"] += 1
+            _graphs[key] = (checkpointer, graph)
+            while len(_graphs) > MAX_GRAPHS:
+                _graphs.popitem(last=False)
+                _stats["evictions"] += 1
+        return _graphs[key][1]
+
+
+def graph_registry_stats():
+    with _lock:
+        return dict(_stats, graphs=len(_graphs), compile_seconds=dict(_compile_seconds))
+
+
+def reset_graphs():
+    with _lock:
+        _graphs.clear()
+        _compile_seconds.clear()
+        for k in _stats:
+            _stats[k] = 0
@@ -0,0 +1,184 @@
+import hashlib
+import html
+import importlib.util
+import json
+import os
+import shutil
+from collections import deque
+
+# Offline graph rendering with an on-disk cache.
+# draw_mermaid_png() sends the graph to the mermaid.ink web service by default, which fails or stalls
+# on hosts without network access and renders the same picture again on every run. render_graph()
+# only uses local backends by default, tried in order:
+#   graphviz: Graph.draw_png(), needs pygraphviz (and the graphviz system package)
+#   svg:      a small built-in layered layout written as SVG, needs nothing
+# A backend that fails for any reason (missing dependency or not) is skipped for the next one.
+# The "mermaid" backend, draw_mermaid_png() in a headless browser (pyppeteer), is opt-in only: the page
+# loads mermaid.js from a CDN and pyppeteer downloads Chromium on first use, so it isn't offline.
+#   render_graph(graph, "4_agent.png", backends=("mermaid", "svg"))
+# The PNG backends write `path` as given; the SVG fallback writes `path` with an .svg suffix (ignored by
+# git) and leaves a PNG already at `path` as it is, so the PNGs in the repo are only brought up to date
+# on a host with pygraphviz.
+#
+# Renders are stored under GRAPH_CACHE_DIR (default .graph_cache) by a hash of the graph topology,
+# i.e. its nodes and edges. As long as those don't change, render_graph() copies the cached file,
+# and leaves `path` untouched if it is already up to date.
+#
+#   render_graph(graph, "4_agent.png")
+
+CACHE_DIR = os.environ.get("GRAPH_CACHE_DIR", ".graph_cache")
+# Bump when the built-in layout changes, so old SVGs aren't served from the cache
+RENDER_VERSION = 1
+
+
+def topology_hash(drawable):
+    topology = {
+        "nodes": sorted(drawable.nodes),
+        "edges": sorted(
+            [e.source, e.target, bool(e.conditional), "" if e.data is None else str(e.data)] for e in drawable.edges
+        ),
+    }
+    encoded = json.dumps(topology, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+def _mermaid_png(drawable):
+    # Checked up front, otherwise the missing module only shows up inside the event loop draw_mermaid_png starts
+    if importlib.util.find_spec("pyppeteer") is None:
+        raise ImportError("pyppeteer is not installed")
+    from langchain_core.runnables.graph import MermaidDrawMethod
+    return drawable.draw_mermaid_png(draw_method=MermaidDrawMethod.PYPPETEER)
+
+
+# name -> (file extension, renderer returning bytes or str)
+BACKENDS = {
+    "graphviz": (".png", lambda drawable: drawable.draw_png()),
+    "mermaid": (".png", _mermaid_png),
+    "svg": (".svg", lambda drawable: draw_svg(drawable)),
+}
+
+
+def render_graph(graph, path, backends=("graphviz", "svg"), cache_dir=None):
+    # Render a compiled graph (or a drawable Graph) to `path`; returns the path actually written
+    drawable = graph.get_graph() if hasattr(graph, "get_graph") else graph
+    cache_dir = cache_dir or CACHE_DIR
+    digest = topology_hash(drawable)
+    errors = []
+    for name in backends:
+        extension, render = BACKENDS[name]
+        output = os.path.splitext(path)[0] + extension
+        cached = os.path.join(cache_dir, f"{digest}-{name}-v{RENDER_VERSION}{extension}")
+        if not os.path.exists(cached):
+            try:
+                data = render(drawable)
+            except Exception as e:
+                errors.append(f"{name}: {e!r}")
+                continue
+            os.makedirs(cache_dir, exist_ok=True)
+            # Write under a temporary name first, so a crash never leaves a truncated file in the cache
+            with open(cached + ".tmp", "wb") as f:
+                f.write(data.encode("utf-8") if isinstance(data, str) else data)
+            os.replace(cached + ".tmp", cached)
+        if not _same_file(cached, output):
+            shutil.copyfile(cached, output)
+        return output
+    raise RuntimeError(f"no graph rendering backend available ({'; '.join(errors)})")
+
+
+def _same_file(a, b):
+    if not os.path.exists(b) or os.path.getsize(a) != os.path.getsize(b):
+        return False
+    with open(a, "rb") as fa, open(b, "rb") as fb:
+        return fa.read() == fb.read()
+
+
+# Built-in SVG layout: nodes are placed in rows by their distance from __start__, in a breadth-first
+# order. Edges to the next row are straight lines, edges skipping rows curve around on the left and
+# edges going back up curve around on the right.
+# Conditional edges are dashed, like in the Mermaid drawing.
+
+NODE_HEIGHT = 36
+ROW_GAP = 60
+COLUMN_GAP = 40
+CHAR_WIDTH = 8
+MARGIN = 20
+
+
+def _layers(drawable):
+    outgoing = {node: [] for node in drawable.nodes}
+    for edge in drawable.edges:
+        outgoing[edge.source].append(edge.target)
+    start = "__start__" if "__start__" in drawable.nodes else next(iter(drawable.nodes))
+    depth = {start: 0}
+    queue = deque([start])
+    while queue:
+        node = queue.popleft()
+        for target in outgoing[node]:
+            if target not in depth:
+                depth[target] = depth[node] + 1
+                queue.append(target)
+    # Unreachable nodes go below everything else, __end__ always goes last
+    bottom = max(depth.values()) + 1
+    for node in drawable.nodes:
+        depth.setdefault(node, bottom)
+    if "__end__" in depth:
+        depth["__end__"] = max(d for n, d in depth.items() if n != "__end__") + 1
+    layers = {}
+    for node in drawable.nodes:
+        layers.setdefault(depth[node], []).append(node)
+    return [layers[d] for d in sorted(layers)]
+
+
+def draw_svg(drawable):
+    layers = _layers(drawable)
+    widths = {node_id: max(80, CHAR_WIDTH * len(node.name) + 24) for node_id, node in drawable.nodes.items()}
+    row_widths = [sum(widths[n] for n in layer) + COLUMN_GAP * (len(layer) - 1) for layer in layers]
+    # Room on both sides for the curved edges
+    width = max(row_widths) + 2 * MARGIN + 120
+    height = len(layers) * NODE_HEIGHT + (len(layers) - 1) * ROW_GAP + 2 * MARGIN
+
+    boxes = {}  # node -> (x, y, width, row)
+    for row, layer in enumerate(layers):
+        x = MARGIN + 60 + (max(row_widths) - row_widths[row]) / 2
+        y = MARGIN + row * (NODE_HEIGHT + ROW_GAP)
+        for node in layer:
+            boxes[node] = (x, y, widths[node], row)
+            x += widths[node] + COLUMN_GAP
+
+    parts = [
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{width:.0f}" height="{height:.0f}" '
+        f'viewBox="0 0 {width:.0f} {height:.0f}" font-family="sans-serif" font-size="13">',
+        '<defs><marker id="arrow" viewBox="0 0 10 10" refX="10" refY="5" markerWidth="8" markerHeight="8" '
+        'orient="auto-start-reverse"><path d="M 0 0 L 10 5 L 0 10 z" fill="#333"/></marker></defs>',
+        f'<rect width="{width:.0f}" height="{height:.0f}" fill="white"/>',
+    ]
+    for edge in drawable.edges:
+        sx, sy, sw, srow = boxes[edge.source]
+        tx, ty, tw, trow = boxes[edge.target]
+        dash = ' stroke-dasharray="5,4"' if edge.conditional else ""
+        if trow == srow + 1:
+            d = f"M {sx + sw / 2:.1f} {sy + NODE_HEIGHT} L {tx + tw / 2:.1f} {ty}"
+        elif trow > srow:
+            # Edge skipping rows: go around the rows in between on the left
+            bend = min(sx, tx) - 40
+            d = (f"M {sx:.1f} {sy + NODE_HEIGHT / 2} C {bend:.1f} {sy + NODE_HEIGHT / 2} "
+                 f"{bend:.1f} {ty + NODE_HEIGHT / 2} {tx:.1f} {ty + NODE_HEIGHT / 2}")
+        else:
+            # Back edge: leave from the right side of the source, come in on the right side of the target
+            bend = max(sx + sw, tx + tw) + 40
+            d = (f"M {sx + sw:.1f} {sy + NODE_HEIGHT / 2} C {bend:.1f} {sy + NODE_HEIGHT / 2} "
+                 f"{bend:.1f} {ty + NODE_HEIGHT / 2} {tx + tw:.1f} {ty + NODE_HEIGHT / 2}")
+        parts.append(f'<path d="{d}" fill="none" stroke="#333" stroke-width="1.5"{dash} marker-end="url(#arrow)"/>')
+        if edge.data is not None:
+            mx, my = (sx + sw / 2 + tx + tw / 2) / 2, (sy + NODE_HEIGHT + ty) / 2
+            parts.append(f'<text x="{mx:.1f}" y="{my:.1f}" text-anchor="middle" fill="#555">{html.escape(str(edge.data))}</text>')
+    for node, (x, y, w, _) in boxes.items():
+        terminal = node in ("__start__", "__end__")
+        fill = "#bfb6fc" if node == "__end__" else "white" if node == "__start__" else "#f2f0ff"
+        radius = NODE_HEIGHT / 2 if terminal else 6
+        parts.append(f'<rect x="{x:.1f}" y="{y}" width="{w}" height="{NODE_HEIGHT}" rx="{radius}" '
+                     f'fill="{fill}" stroke="#7c6fd6" stroke-width="1.5"/>')
+        parts.append(f'<text x="{x + w / 2:.1f}" y="{y + NODE_HEIGHT / 2 + 4}" text-anchor="middle">'
+                     f'{html.escape(str(drawable.nodes[node].name))}</text>')
+    parts.append("</svg>")
+    return "\n".join(parts) + "\n"
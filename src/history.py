@@ -0,0 +1,130 @@
+from collections import OrderedDict
+from langchain_core.messages import HumanMessage, SystemMessage, ToolMessage, get_buffer_string
+from langchain_core.messages.utils import count_tokens_approximately
+from llm_clients import get_llm
+
+# Keeps the assistant's prompt under a token budget on long conversations.
+# The full history stays in state["messages"]; only the prompt is windowed:
+#
+#   [sys_msg] + [summary of older turns] + state["messages"][start:]
+#
+# When the window grows past `max_tokens`, the oldest messages are folded into a rolling summary
+# (one extra LLM call) and the window shrinks to about `keep_tokens`, so summarizing is rare.
+# The window only ever starts at a message that isn't a ToolMessage, so an AIMessage with tool
+# calls always stays together with its ToolMessage results.
+#
+# The summary and the window bookkeeping live in state["history"]:
+#   summary: the rolling summary text
+#   start:   index of the first message still in the window
+#   counted: number of messages whose tokens are included in `tokens`
+#   tokens:  token count of state["messages"][start:counted]
+# so each step only counts the messages appended since the previous step.
+# `summarize` returns the new summary, as a str or as the model's message; prepare() hands that message
+# back so its tokens can be charged (budget.charge_tokens).
+# This relies on messages only being appended to the list, which is what add_messages does here.
+
+SUMMARY_PROMPT = (
+    "You maintain a running summary of a conversation between a user and an arithmetic assistant. "
+    "Fold the new messages into the summary. Keep every number, intermediate result and open question. "
+    "Reply with the updated summary only."
+)
+
+
+def summarize_with_llm(summary, messages):
+    return get_llm().invoke(_summary_request(summary, messages))
+
+
+async def asummarize_with_llm(summary, messages):
+    return await get_llm().ainvoke(_summary_request(summary, messages))
+
+
+def _summary_request(summary, messages):
+    return [
+        SystemMessage(content=SUMMARY_PROMPT),
+        HumanMessage(content=f"Summary so far:\n{summary or '(empty)'}\n\nNew messages:\n{get_buffer_string(messages)}"),
+    ]
+
+
+class HistoryWindow:
+    def __init__(self, max_tokens=3000, keep_tokens=None, token_counter=None,
+                 summarize=summarize_with_llm, asummarize=asummarize_with_llm, cache_size=10_000):
+        self.max_tokens = max_tokens
+        self.keep_tokens = keep_tokens if keep_tokens is not None else max_tokens // 2
+        self.token_counter = token_counter or (lambda message: count_tokens_approximately([message]))
+        self.summarize = summarize
+        self.asummarize = asummarize
+        self.cache_size = cache_size
+        # message id -> token count, so messages leaving the window aren't counted twice
+        self._counts = OrderedDict()
+
+    def count(self, message):
+        if message.id is None:
+            return self.token_counter(message)
+        tokens = self._counts.get(message.id)
+        if tokens is None:
+            tokens = self._counts[message.id] = self.token_counter(message)
+            if len(self._counts) > self.cache_size:
+                self._counts.popitem(last=False)
+        return tokens
+
+    def _advance(self, sys_msg, state):
+        # Count the new messages and, if the budget is exceeded, pick the new window start.
+        # Returns the updated history and the messages that have to be folded into the summary.
+        messages = state["messages"]
+        history = dict(state.get("history") or {"summary": "", "start": 0, "counted": 0, "tokens": 0})
+        history["tokens"] += sum(self.count(m) for m in messages[history["counted"]:])
+        history["counted"] = len(messages)
+
+        fixed = self.count(sys_msg) + (self.token_counter(SystemMessage(content=history["summary"])) if history["summary"] else 0)
+        if fixed + history["tokens"] <= self.max_tokens:
+            return history, []
+
+        start = history["start"]
+        cut = self._cut_point(messages, start, history["tokens"])
+        if cut <= start:
+            return history, []
+        folded = messages[start:cut]
+        history["tokens"] -= sum(self.count(m) for m in folded)
+        history["start"] = cut
+        return history, folded
+
+    def _cut_point(self, messages, start, tokens):
+        # Prefer starting the window at a user turn; fall back to any message that isn't a tool result
+        fallback = None
+        for i in range(start, len(messages)):
+            if tokens <= self.keep_tokens:
+                if isinstance(messages[i], HumanMessage):
+                    return i
+                if fallback is None and not isinstance(messages[i], ToolMessage):
+                    fallback = i
+            tokens -= self.count(messages[i])
+        if fallback is not None:
+            return fallback
+        # Even the latest turn is over budget: keep only its last complete step
+        for i in range(len(messages) - 1, start, -1):
+            if not isinstance(messages[i], ToolMessage):
+                return i
+        return start
+
+    def _prompt(self, sys_msg, messages, history):
+        prompt = [sys_msg]
+        if history["summary"]:
+            prompt.append(SystemMessage(content=f"Summary of the earlier conversation:\n{history['summary']}"))
+        return prompt + messages[history["start"]:]
+
+    def prepare(self, sys_msg, state):
+        # Returns (prompt messages, history state update, the summarizing model's message or None)
+        history, folded = self._advance(sys_msg, state)
+        reply = None
+        if folded:
+            reply = self.summarize(history["summary"], folded)
+            history["summary"] = getattr(reply, "content", reply)
+        return self._prompt(sys_msg, state["messages"], history), history, reply
+
+    async def aprepare(self, sys_msg, state):
+        history, folded = self._advance(sys_msg, state)
+        reply = None
+        if folded:
+            reply = await self.asummarize(history["summary"], folded)
+            history["summary"] = getattr(reply, "content", reply)
+        return self._prompt(sys_msg, state["messages"], history), history, reply
@@ -0,0 +1,213 @@
+import asyncio
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from langchain_core.messages import convert_to_messages, message_to_dict, messages_from_dict
+from langchain_core.runnables import Runnable
+
+# Opt-in response cache for the LLM nodes.
+# Every node here calls the model with temperature=0, so the same (deployment + messages + bound tools)
+# request gets the same answer. The cache stores answers under a normalized hash of that request, in two tiers:
+#   - an in-memory LRU dict, bounded by entry count
+#   - an optional on-disk SQLite table, bounded by entry count, shared between runs and processes
+# Both tiers expire entries after `ttl` seconds. The disk tier is pruned (expired rows, then the least
+# recently used above its cap) every `prune_every` writes rather than on each one, so it can briefly run
+# over its cap by that many rows.
+# A cached answer is a replay, not a model call: it comes back without usage_metadata (so budgets and token
+# metrics only count tokens actually spent) and with fresh tool call ids (so a thread that gets the same
+# answer twice has no duplicate ids). Only invoke / ainvoke are cached, stream / astream always call the model.
+# ainvoke does the cache lookups in a worker thread when there is a disk tier.
+#
+# Enable it for every client handed out by llm_clients:
+#   llm_clients.set_llm_cache(LLMCache(path="llm_cache.sqlite"))
+
+
+def normalize_message(message):
+    # Only what the model sees goes into the key.
+    # Message ids and tool call ids are generated per run, so they are left out,
+    # otherwise no two conversations would ever share a key.
+    data = {"type": message.type, "content": message.content}
+    if getattr(message, "name", None):
+        data["name"] = message.name
+    tool_calls = getattr(message, "tool_calls", None)
+    if tool_calls:
+        data["tool_calls"] = [{"name": tc["name"], "args": tc["args"]} for tc in tool_calls]
+    return data
+
+
+def request_key(messages, tool_schemas=None, deployment=None, options=None):
+    payload = {
+        "messages": [normalize_message(m) for m in convert_to_messages(messages)],
+        "tools": tool_schemas or [],
+    }
+    if deployment is not None:
+        # Two deployments (models) answer the same request differently
+        payload["deployment"] = deployment
+    if options:
+        # Per-call options (stop words, ...) change the answer too
+        payload["options"] = options
+    encoded = json.dumps(payload, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+class LLMCache:
+    def __init__(self, max_entries=1024, ttl=3600.0, path=None, max_disk_entries=100_000, prune_every=100):
+        self.max_entries = max_entries
+        self.path = path
+        self.ttl = ttl
+        self.max_disk_entries = max_disk_entries
+        self.prune_every = prune_every
+        self._writes = 0
+        self.stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "evictions": 0, "expired": 0}
+        self._memory = OrderedDict()  # key -> (stored at, serialized message)
+        self._lock = threading.Lock()
+        self._db = None
+        if path is not None:
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS llm_cache ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, created REAL NOT NULL, accessed REAL NOT NULL)"
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS llm_cache_accessed ON llm_cache (accessed)")
+            self._db.execute("CREATE INDEX IF NOT EXISTS llm_cache_created ON llm_cache (created)")
+            self._db.commit()
+
+    def get(self, key):
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                if now - entry[0] <= self.ttl:
+                    self._memory.move_to_end(key)
+                    self.stats["memory_hits"] += 1
+                    return self._load(entry[1])
+                del self._memory[key]
+                self.stats["expired"] += 1
+
+            if self._db is not None:
+                row = self._db.execute(
+                    "SELECT value, created FROM llm_cache WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None:
+                    value, created = row
+                    if now - created <= self.ttl:
+                        self._db.execute("UPDATE llm_cache SET accessed = ? WHERE key = ?", (now, key))
+                        self._db.commit()
+                        # Promote to the memory tier
+                        self._remember(key, created, value)
+                        self.stats["disk_hits"] += 1
+                        return self._load(value)
+                    self._db.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+                    self._db.commit()
+                    self.stats["expired"] += 1
+
+            self.stats["misses"] += 1
+            return None
+
+    def put(self, key, message):
+        now = time.time()
+        value = json.dumps(message_to_dict(message))
+        with self._lock:
+            self._remember(key, now, value)
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO llm_cache (key, value, created, accessed) VALUES (?, ?, ?, ?)",
+                    (key, value, now, now),
+                )
+                self._writes += 1
+                if self._writes % self.prune_every == 0:
+                    self._prune(now)
+                self._db.commit()
+
+    def _prune(self, now):
+        # Called with the lock held
+        self._db.execute("DELETE FROM llm_cache WHERE created < ?", (now - self.ttl,))
+        # Evict the least recently used rows above the size cap
+        excess = self._db.execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0] - self.max_disk_entries
+        if excess > 0:
+            self._db.execute(
+                "DELETE FROM llm_cache WHERE key IN "
+                "(SELECT key FROM llm_cache ORDER BY accessed LIMIT ?)",
+                (excess,),
+            )
+            self.stats["evictions"] += excess
+
+    def _remember(self, key, created, value):
+        self._memory[key] = (created, value)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+            self.stats["evictions"] += 1
+
+    def _load(self, value):
+        message = messages_from_dict([json.loads(value)])[0]
+        # A fresh id, so add_messages appends the cached answer instead of replacing an earlier one
+        message.id = None
+        if getattr(message, "usage_metadata", None) is not None:
+            message.usage_metadata = None
+        if getattr(message, "tool_calls", None):
+            ids = {}
+            for tc in message.tool_calls:
+                ids[tc["id"]] = tc["id"] = f"call_{uuid.uuid4().hex[:24]}"
+            # The provider's copy of the calls, which the client sends back on the next request
+            for raw in message.additional_kwargs.get("tool_calls") or []:
+                raw["id"] = ids.get(raw.get("id"), raw.get("id"))
+        return message
+
+    def hit_rate(self):
+        hits = self.stats["memory_hits"] + self.stats["disk_hits"]
+        total = hits + self.stats["misses"]
+        return hits / total if total else 0.0
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM llm_cache")
+                self._db.commit()
+
+    def close(self):
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+    def wrap(self, llm, tool_schemas=None, deployment=None):
+        return CachedLLM(llm, self, tool_schemas, deployment)
+
+
+class CachedLLM(Runnable):
+    # Wraps a chat model (or a model with bound tools) and serves repeated requests from the cache
+
+    def __init__(self, llm, cache, tool_schemas=None, deployment=None):
+        self.llm = llm
+        self.cache = cache
+        self.tool_schemas = tool_schemas
+        self.deployment = deployment
+
+    def invoke(self, input, config=None, **kwargs):
+        key = request_key(input, self.tool_schemas, self.deployment, kwargs)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
+        result = self.llm.invoke(input, config, **kwargs)
+        self.cache.put(key, result)
+        return result
+
+    async def ainvoke(self, input, config=None, **kwargs):
+        key = request_key(input, self.tool_schemas, self.deployment, kwargs)
+        cached = await self._offload(self.cache.get, key)
+        if cached is not None:
+            return cached
+        result = await self.llm.ainvoke(input, config, **kwargs)
+        await self._offload(self.cache.put, key, result)
+        return result
+
+    async def _offload(self, fn, *args):
+        # SQLite calls block (and wait for the cache lock), keep them off the event loop
+        if self.cache.path is None:
+            return fn(*args)
+        return await asyncio.to_thread(fn, *args)
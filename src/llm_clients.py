@@ -0,0 +1,182 @@
+import json
+import os
+import threading
+import httpx
+from langchain_core.utils.function_calling import convert_to_openai_tool
+
+# Process-wide registry of chat model clients.
+# Building an AzureChatOpenAI client sets up a new HTTP client, and bind_tools() converts every
+# tool into an OpenAI tool schema. Doing both inside a node means paying for them on every step
+# of the ReAct loop. Instead, nodes ask the registry for a client and get back a shared instance
+# that was built (and bound to its tools) once per process.
+
+DEFAULT_DEPLOYMENT = "gpt-4o"
+API_VERSION = "2025-03-01-preview"
+
+# Keep-alive connection pool shared by every client in the process
+HTTP_LIMITS = httpx.Limits(max_connections=100, max_keepalive_connections=20, keepalive_expiry=30.0)
+
+_lock = threading.RLock()
+_http_client = None
+_models = {}       # deployment -> chat model
+_llms = {}         # deployment -> runnable handed to nodes
+_bound_llms = {}   # (deployment, tool schemas) -> runnable with bound tools handed to nodes
+_tool_keys = {}    # ids of a tool list's items -> (the tools, their schemas as a key)
+_cache = None
+_resilience = None
+_single_flight = None
+_stats = {"llm_builds": 0, "bind_builds": 0, "hits": 0}
+
+
+def shared_http_client():
+    global _http_client
+    with _lock:
+        if _http_client is None:
+            _http_client = httpx.Client(limits=HTTP_LIMITS, timeout=None)
+        return _http_client
+
+
+def azure_llm_factory(deployment):
+    # Imported here, langchain_openai (and openai under it) take most of a cold start to import
+    from langchain_openai import AzureChatOpenAI
+    return AzureChatOpenAI(
+        azure_deployment=deployment,
+        api_version=API_VERSION,
+        temperature=0,
+        max_tokens=None,
+        # A resilience policy does its own retrying, with backoff and under a deadline, and no request may
+        # outlive that deadline (an abandoned sync attempt holds a pool thread until its request returns)
+        timeout=_resilience.deadline if _resilience is not None else None,
+        max_retries=0 if _resilience is not None else 2,
+        # Streamed answers report token usage too (the agent's token budgets count it, see budget.py)
+        stream_usage=True,
+        http_client=shared_http_client(),
+    )
+
+
+def default_llm_factory(deployment):
+    # LLM_BACKEND=fake runs the graphs offline against the local stand-in model (see fake_llm.py)
+    if os.environ.get("LLM_BACKEND") == "fake":
+        from fake_llm import FakeArithmeticChatModel
+        return FakeArithmeticChatModel(
+            latency=float(os.environ.get("FAKE_LLM_LATENCY", "0")),
+            token_latency=float(os.environ.get("FAKE_LLM_TOKEN_LATENCY", "0")),
+        )
+    return azure_llm_factory(deployment)
+
+
+_llm_factory = default_llm_factory
+
+
+def set_llm_factory(factory):
+    # Swap the function used to build chat models, e.g. for a local stand-in model.
+    # The factory takes a deployment name and returns a chat model.
+    global _llm_factory
+    with _lock:
+        _llm_factory = factory
+        _models.clear()
+        _llms.clear()
+        _bound_llms.clear()
+
+
+def set_llm_cache(cache):
+    # Serve repeated requests from an llm_cache.LLMCache, or pass None to turn caching off
+    global _cache
+    with _lock:
+        _cache = cache
+        _llms.clear()
+        _bound_llms.clear()
+
+
+def set_llm_resilience(policy):
+    # Run every model call under a resilience.ResiliencePolicy (deadline, hedging, retries, circuit breaker),
+    # or pass None to turn it off. Models are rebuilt, so the Azure client's own retries follow the setting.
+    global _resilience
+    with _lock:
+        _resilience = policy
+        _models.clear()
+        _llms.clear()
+        _bound_llms.clear()
+
+
+def set_llm_single_flight(single_flight):
+    # Let identical concurrent calls share one model call through a single_flight.SingleFlight, or pass None to turn it off
+    global _single_flight
+    with _lock:
+        _single_flight = single_flight
+        _llms.clear()
+        _bound_llms.clear()
+
+
+def _model(deployment):
+    with _lock:
+        if deployment not in _models:
+            _models[deployment] = _llm_factory(deployment)
+            _stats["llm_builds"] += 1
+        return _models[deployment]
+
+
+def _wrap(llm, deployment, tool_schemas=None):
+    # Optional layers in front of the model, applied once when the runnable is registered.
+    # The cache goes outermost, so a hit skips the deadline and retry machinery altogether.
+    # Single-flight sits between the two: waiters share one resilient call instead of hedging their own.
+    # The deployment is part of the cache and single-flight keys, different models don't share answers.
+    if _resilience is not None:
+        llm = _resilience.wrap(llm, tool_schemas)
+    if _single_flight is not None:
+        llm = _single_flight.wrap(llm, tool_schemas, deployment)
+    if _cache is not None:
+        llm = _cache.wrap(llm, tool_schemas, deployment)
+    return llm
+
+
+def get_llm(deployment=DEFAULT_DEPLOYMENT):
+    with _lock:
+        if deployment in _llms:
+            _stats["hits"] += 1
+        else:
+            _llms[deployment] = _wrap(_model(deployment), deployment)
+        return _llms[deployment]
+
+
+def _tools_key(tools):
+    # Tools (or schema classes) are keyed by the schemas the model is sent, so the same tool set declared in
+    # two modules shares one binding and two different tools that share a name don't. The schemas are worked
+    # out once per tool list, which is looked up by the identity of its items (held on to, so ids aren't reused).
+    ids = tuple(id(t) for t in tools)
+    entry = _tool_keys.get(ids)
+    if entry is None:
+        schemas = json.dumps([convert_to_openai_tool(t) for t in tools], sort_keys=True, default=str)
+        entry = _tool_keys[ids] = (tuple(tools), schemas)
+    return entry[1]
+
+
+def get_llm_with_tools(tools, deployment=DEFAULT_DEPLOYMENT):
+    with _lock:
+        key = (deployment, _tools_key(tools))
+        if key in _bound_llms:
+            _stats["hits"] += 1
+        else:
+            bound = _model(deployment).bind_tools(tools)
+            _bound_llms[key] = _wrap(bound, deployment, getattr(bound, "kwargs", {}).get("tools"))
+            _stats["bind_builds"] += 1
+        return _bound_llms[key]
+
+
+def llm_client_stats():
+    with _lock:
+        return dict(_stats, llms=len(_models), bound_llms=len(_bound_llms))
+
+
+def reset_llm_clients():
+    global _http_client
+    with _lock:
+        _models.clear()
+        _llms.clear()
+        _bound_llms.clear()
+        _tool_keys.clear()
+        for k in _stats:
+            _stats[k] = 0
+        if _http_client is not None:
+            _http_client.close()
+            _http_client = None
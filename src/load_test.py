@@ -0,0 +1,219 @@
+import argparse
+import asyncio
+import contextlib
+import importlib
+import io
+import json
+import os
+import random
+import resource
+import sys
+import time
+from langgraph.checkpoint.memory import MemorySaver
+from async_driver import SessionDriver
+from bounded_memory import BoundedMemorySaver
+from delta_checkpoint import DeltaMemorySaver
+from fake_llm import use_fake_llm
+
+os.environ.setdefault("AZURE_OPENAI_API_KEY", "api_key")
+os.environ.setdefault("AZURE_OPENAI_ENDPOINT", "endpoint")
+
+# Load generator for the memory agent (react_graph_memory in 5_agent_memory.py).
+#
+#   python load_test.py --users 2000 --turns 20 --think-time 1 --latency 0.2 --output load.json
+#
+# Every simulated user is one thread_id and holds one conversation of --turns turns, pausing for a think
+# time (exponentially distributed around --think-time seconds) between turns. Users arrive evenly over
+# --ramp-up seconds. The model is the local fake one, sleeping --latency seconds per call, so the numbers
+# measure the graph, the checkpointer and the event loop rather than a remote service.
+# At most --max-concurrency turns are in flight at once (SessionDriver); latency is measured from when
+# a user sends a turn, so time spent waiting for a slot counts.
+#
+# The output is one JSON document:
+#   config:   the parameters of the run
+#   summary:  turns, errors, elapsed, throughput and latency p50/p95/p99 over the whole run,
+#             plus latency percentiles by turn number, which show how longer histories cost more
+#   timeline: one sample every --sample-every seconds with turns/s and latency percentiles for that
+#             interval, users still active, turns in flight, and the checkpointer's size (threads,
+#             checkpoints, serialized bytes) next to the process RSS, to see memory grow over time
+
+TURNS = [
+    "Add 3 and 4.",
+    "Multiply that by 2.",
+    "Add the output and 1.",
+    "Divide that by 5.",
+]
+
+CHECKPOINTERS = {
+    "memory": MemorySaver,
+    "bounded": lambda: BoundedMemorySaver(max_threads=10_000, max_checkpoints_per_thread=20, idle_ttl=3600),
+    "delta": DeltaMemorySaver,
+}
+
+
+def percentiles(samples):
+    # Nearest-rank p50 / p95 / p99 of a list of seconds
+    if not samples:
+        return {"p50": None, "p95": None, "p99": None}
+    ordered = sorted(samples)
+    pick = lambda q: ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+    return {"p50": pick(0.50), "p95": pick(0.95), "p99": pick(0.99)}
+
+
+def checkpointer_size(saver):
+    # Threads, checkpoints and serialized bytes held by an in-memory checkpointer
+    checkpoints = sum(len(cps) for ns in saver.storage.values() for cps in ns.values())
+    if isinstance(saver, BoundedMemorySaver):
+        stored = saver._resident_bytes
+    else:
+        stored = sum(len(b[1]) for b in saver.blobs.values())
+        stored += sum(len(c[1]) + len(m[1]) for ns in saver.storage.values() for cps in ns.values() for c, m, _ in cps.values())
+        stored += sum(len(w[2][1]) for writes in saver.writes.values() for w in writes.values())
+    return {"threads": len(saver.storage), "checkpoints": checkpoints, "bytes": stored}
+
+
+def rss_bytes():
+    # Current resident set size on Linux, peak RSS elsewhere
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+
+
+class LoadTest:
+    def __init__(self, graph, checkpointer, users=100, turns=10, think_time=1.0, ramp_up=0.0,
+                 max_concurrency=256, sample_every=1.0, seed=0, out=sys.stderr):
+        self.driver = SessionDriver(graph, max_concurrency=max_concurrency)
+        self.checkpointer = checkpointer
+        self.users = users
+        self.turns = turns
+        self.think_time = think_time
+        self.ramp_up = ramp_up
+        self.sample_every = sample_every
+        self.random = random.Random(seed)
+        self.out = out
+        self.latencies = []           # every turn, in completion order
+        self.by_turn = [[] for _ in range(turns)]
+        self.errors = 0
+        self.active = 0
+        self.in_flight = 0
+        self.timeline = []
+
+    def _think(self):
+        return self.random.expovariate(1 / self.think_time) if self.think_time > 0 else 0.0
+
+    async def user(self, index):
+        await asyncio.sleep(self.ramp_up * index / self.users)
+        self.active += 1
+        thread_id = f"user-{index}"
+        try:
+            for turn in range(self.turns):
+                if turn:
+                    await asyncio.sleep(self._think())
+                self.in_flight += 1
+                start = time.perf_counter()
+                try:
+                    await self.driver.turn(thread_id, TURNS[turn % len(TURNS)])
+                except Exception:
+                    self.errors += 1
+                    continue
+                finally:
+                    self.in_flight -= 1
+                latency = time.perf_counter() - start
+                self.latencies.append(latency)
+                self.by_turn[turn].append(latency)
+        finally:
+            self.active -= 1
+
+    def sample(self, elapsed, since, previous):
+        done = len(self.latencies)
+        interval = self.latencies[previous:]
+        point = {
+            "t": round(elapsed, 3),
+            "turns": done,
+            "errors": self.errors,
+            "turns_per_second": len(interval) / (elapsed - since) if elapsed > since else 0.0,
+            "latency": percentiles(interval),
+            "active_users": self.active,
+            "in_flight": self.in_flight,
+            "checkpointer": checkpointer_size(self.checkpointer),
+            "rss_bytes": rss_bytes(),
+        }
+        self.timeline.append(point)
+        if self.out is not None:
+            p95 = point["latency"]["p95"]
+            print(f"[{elapsed:7.1f} s] turns={done} errors={self.errors} {point['turns_per_second']:8.1f} turns/s  "
+                  f"p95={'-' if p95 is None else f'{p95 * 1e3:.0f} ms'}  active={self.active}  "
+                  f"checkpoints={point['checkpointer']['checkpoints']}  "
+                  f"stored={point['checkpointer']['bytes'] / 2**20:.1f} MiB  rss={point['rss_bytes'] / 2**20:.0f} MiB",
+                  file=self.out, flush=True)
+        return done
+
+    async def run(self):
+        started = time.perf_counter()
+
+        async def sampler():
+            since, previous = 0.0, 0
+            while True:
+                await asyncio.sleep(self.sample_every)
+                elapsed = time.perf_counter() - started
+                previous = self.sample(elapsed, since, previous)
+                since = elapsed
+
+        sampler_task = asyncio.create_task(sampler())
+        try:
+            await asyncio.gather(*(self.user(i) for i in range(self.users)))
+        finally:
+            sampler_task.cancel()
+        elapsed = time.perf_counter() - started
+        last = self.timeline[-1] if self.timeline else {"t": 0.0, "turns": 0}
+        self.sample(elapsed, last["t"], last["turns"])
+        return self.summary(elapsed)
+
+    def summary(self, elapsed):
+        done = len(self.latencies)
+        return {
+            "turns": done,
+            "errors": self.errors,
+            "elapsed": elapsed,
+            "turns_per_second": done / elapsed if elapsed else 0.0,
+            "latency": {**percentiles(self.latencies), "mean": sum(self.latencies) / done if done else None,
+                        "max": max(self.latencies, default=None)},
+            "latency_by_turn": [percentiles(samples) for samples in self.by_turn],
+            "checkpointer": checkpointer_size(self.checkpointer),
+            "rss_bytes": rss_bytes(),
+        }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Load-test the memory agent with many concurrent conversations")
+    parser.add_argument("--users", type=int, default=1000, help="simulated users, one thread_id each")
+    parser.add_argument("--turns", type=int, default=10, help="turns per conversation")
+    parser.add_argument("--think-time", type=float, default=1.0, help="mean seconds between a user's turns")
+    parser.add_argument("--ramp-up", type=float, default=10.0, help="seconds over which users arrive")
+    parser.add_argument("--latency", type=float, default=0.1, help="fake model latency in seconds per call")
+    parser.add_argument("--token-latency", type=float, default=0.0, help="fake model latency per streamed token")
+    parser.add_argument("--max-concurrency", type=int, default=256, help="turns in flight at once")
+    parser.add_argument("--checkpointer", choices=sorted(CHECKPOINTERS), default="memory")
+    parser.add_argument("--sample-every", type=float, default=1.0, help="seconds between timeline samples")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default=None, help="write the JSON report here instead of stdout")
+    parser.add_argument("--quiet", action="store_true", help="no progress lines on stderr")
+    args = parser.parse_args()
+
+    use_fake_llm(latency=args.latency, token_latency=args.token_latency)
+    with contextlib.redirect_stdout(io.StringIO()):
+        agent = importlib.import_module("5_agent_memory")
+    checkpointer = CHECKPOINTERS[args.checkpointer]()
+    test = LoadTest(agent.build_graph(checkpointer=checkpointer), checkpointer, users=args.users, turns=args.turns,
+                    think_time=args.think_time, ramp_up=args.ramp_up, max_concurrency=args.max_concurrency,
+                    sample_every=args.sample_every, seed=args.seed, out=None if args.quiet else sys.stderr)
+    summary = asyncio.run(test.run())
+    report = json.dumps({"config": vars(args), "summary": summary, "timeline": test.timeline}, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(report + "\n")
+    else:
+        print(report)
@@ -0,0 +1,398 @@
+import atexit
+import bisect
+import copy
+import functools
+import json
+import os
+import threading
+import time
+from langchain_core.runnables import RunnableLambda
+
+# Per-node metrics for the tutorial graphs.
+# instrument(builder) wraps every node and conditional edge of a StateGraph before it is compiled and records:
+#   graph_node_duration_seconds{node}        latency histogram of each node
+#   graph_node_calls_total{node, status}     invocations, status "ok" or "error"
+#   graph_edge_duration_seconds{edge}        latency histogram of each conditional edge (router function)
+#   graph_edge_calls_total{edge, target}     which way each conditional edge went
+#   llm_tokens_total{node, type}             prompt / completion tokens of the AIMessages a node returns
+# and @track_tool (above @tool) adds:
+#   tool_duration_seconds{tool}              latency histogram of each tool call
+#   tool_calls_total{tool, status}
+# and llm_clients.set_llm_single_flight() (see single_flight.py) adds:
+#   llm_single_flight_total{result}          model calls, result "upstream" or "collapsed"
+# and budget.BudgetGuard (4_agent.py) adds:
+#   agent_budget_exhausted_total{budget}     requests stopped early, by the budget they ran out of
+#
+# Metrics are off unless GRAPH_METRICS=1 (or enable_metrics() is called before the graphs are built).
+# When off, instrument() returns the builder untouched, so compiled graphs run exactly as before,
+# and a tracked tool pays one attribute check per call.
+#
+# Export formats:
+#   prometheus_text() / write_prometheus(path)   Prometheus text exposition format
+#   serve_prometheus(port)                       the same on http://localhost:<port>/metrics
+#   write_otlp(path)                             one OTLP/JSON ExportMetricsServiceRequest per line, the
+#                                                format of the OpenTelemetry Collector file exporter
+# GRAPH_METRICS_PROMETHEUS=<path> and GRAPH_METRICS_OTLP=<path> write those files when the process exits,
+# and GRAPH_METRICS_PORT=<port> serves the Prometheus endpoint; each of them also turns metrics on.
+
+# Histogram bucket upper bounds in seconds: Prometheus' defaults, plus finer ones for sub-millisecond nodes
+BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+HELP = {
+    "graph_node_duration_seconds": "Time spent in a graph node",
+    "graph_node_calls_total": "Graph node invocations",
+    "graph_edge_duration_seconds": "Time spent in a conditional edge",
+    "graph_edge_calls_total": "Conditional edge decisions, by target",
+    "llm_tokens_total": "LLM tokens reported in the AIMessages returned by a node",
+    "tool_duration_seconds": "Time spent in a tool call",
+    "tool_calls_total": "Tool calls",
+    "llm_single_flight_total": "LLM calls that went upstream or waited for an identical call in flight",
+    "agent_budget_exhausted_total": "Agent requests stopped early because a budget ran out",
+}
+
+
+class Histogram:
+    __slots__ = ("counts", "sum", "count")
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)  # the last one is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(BUCKETS, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self):
+        total, result = 0, []
+        for c in self.counts:
+            total += c
+            result.append(total)
+        return result
+
+    def quantile(self, q):
+        # Upper bound of the bucket holding the q-th quantile, like histogram_quantile() without interpolation
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        for bound, total in zip(BUCKETS + (float("inf"),), self.cumulative()):
+            if total >= rank:
+                return bound
+        return float("inf")
+
+
+class Metrics:
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self.started = time.time()
+        self._counters = {}    # (name, labels) -> value
+        self._histograms = {}  # (name, labels) -> Histogram
+        self._lock = threading.Lock()
+
+    def inc(self, name, value=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, name, value, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram()
+            histogram.observe(value)
+
+    def counter(self, name, **labels):
+        with self._lock:
+            return self._counters.get((name, tuple(sorted(labels.items()))), 0)
+
+    def histogram(self, name, **labels):
+        with self._lock:
+            return self._histograms.get((name, tuple(sorted(labels.items()))))
+
+    def snapshot(self):
+        # {"counters": {name: [(labels, value)]}, "histograms": {name: [(labels, count, sum, p50, p95, p99)]}}
+        with self._lock:
+            counters, histograms = {}, {}
+            for (name, labels), value in sorted(self._counters.items()):
+                counters.setdefault(name, []).append((dict(labels), value))
+            for (name, labels), h in sorted(self._histograms.items()):
+                histograms.setdefault(name, []).append(
+                    (dict(labels), h.count, h.sum, h.quantile(0.5), h.quantile(0.95), h.quantile(0.99))
+                )
+        return {"counters": counters, "histograms": histograms}
+
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+            self.started = time.time()
+
+    def prometheus_text(self):
+        lines = []
+        with self._lock:
+            counters = sorted(self._counters.items())
+            histograms = sorted((key, h.cumulative(), h.sum, h.count) for key, h in self._histograms.items())
+        seen = set()
+        for (name, labels), value in counters:
+            if name not in seen:
+                seen.add(name)
+                lines.append(f"# HELP {name} {HELP.get(name, name)}")
+                lines.append(f"# TYPE {name} counter")
+            lines.append(f"{name}{_labels(labels)} {value}")
+        for (name, labels), cumulative, total, count in histograms:
+            if name not in seen:
+                seen.add(name)
+                lines.append(f"# HELP {name} {HELP.get(name, name)}")
+                lines.append(f"# TYPE {name} histogram")
+            for bound, c in zip(BUCKETS + ("+Inf",), cumulative):
+                lines.append(f"{name}_bucket{_labels(labels + (('le', str(bound)),))} {c}")
+            lines.append(f"{name}_sum{_labels(labels)} {total}")
+            lines.append(f"{name}_count{_labels(labels)} {count}")
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path):
+        # Written under a temporary name first, so a scraper (node_exporter's textfile collector) never reads half a file
+        with open(path + ".tmp", "w") as f:
+            f.write(self.prometheus_text())
+        os.replace(path + ".tmp", path)
+
+    def otlp(self):
+        # Cumulative sums and histograms as an OTLP/JSON ExportMetricsServiceRequest
+        start, now = str(int(self.started * 1e9)), str(time.time_ns())
+        with self._lock:
+            counters = sorted(self._counters.items())
+            histograms = sorted((key, list(h.counts), h.sum, h.count) for key, h in self._histograms.items())
+        metrics = {}
+        for (name, labels), value in counters:
+            metric = metrics.setdefault(name, {
+                "name": name, "description": HELP.get(name, ""),
+                "sum": {"dataPoints": [], "aggregationTemporality": 2, "isMonotonic": True},
+            })
+            point = {"attributes": _attributes(labels), "startTimeUnixNano": start, "timeUnixNano": now}
+            if isinstance(value, int):
+                point["asInt"] = str(value)
+            else:
+                point["asDouble"] = value
+            metric["sum"]["dataPoints"].append(point)
+        for (name, labels), counts, total, count in histograms:
+            metric = metrics.setdefault(name, {
+                "name": name, "description": HELP.get(name, ""), "unit": "s",
+                "histogram": {"dataPoints": [], "aggregationTemporality": 2},
+            })
+            metric["histogram"]["dataPoints"].append({
+                "attributes": _attributes(labels), "startTimeUnixNano": start, "timeUnixNano": now,
+                "count": str(count), "sum": total,
+                "bucketCounts": [str(c) for c in counts], "explicitBounds": list(BUCKETS),
+            })
+        return {"resourceMetrics": [{
+            "resource": {"attributes": _attributes((("service.name", "langgraph-tutorial"),))},
+            "scopeMetrics": [{"scope": {"name": __name__}, "metrics": list(metrics.values())}],
+        }]}
+
+    def write_otlp(self, path):
+        # Appends one line per call, so calling it periodically gives a time series
+        with open(path, "a") as f:
+            f.write(json.dumps(self.otlp(), separators=(",", ":")) + "\n")
+
+
+def _labels(labels):
+    if not labels:
+        return ""
+    escaped = (str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, v in labels)
+    return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(labels, escaped)) + "}"
+
+
+def _attributes(labels):
+    return [{"key": k, "value": {"stringValue": str(v)}} for k, v in labels]
+
+
+# Process-wide metrics, used unless a Metrics instance is passed explicitly
+default_metrics = Metrics(enabled=bool(os.environ.get("GRAPH_METRICS") or os.environ.get("GRAPH_METRICS_PROMETHEUS")
+                                       or os.environ.get("GRAPH_METRICS_OTLP") or os.environ.get("GRAPH_METRICS_PORT")))
+
+
+def enable_metrics(enabled=True):
+    # Graphs built (or taken from graph_registry) before this call stay as they were
+    default_metrics.enabled = enabled
+
+
+def _token_usage(result):
+    # (prompt, completion) tokens of the AIMessages in a node's {"messages": [...]} update
+    messages = result.get("messages") if isinstance(result, dict) else None
+    if not isinstance(messages, list):
+        messages = [messages] if messages is not None else []
+    prompt = completion = 0
+    for m in messages:
+        usage = getattr(m, "usage_metadata", None)
+        if usage:
+            prompt += usage.get("input_tokens", 0)
+            completion += usage.get("output_tokens", 0)
+    return prompt, completion
+
+
+def _timed(func, record):
+    @functools.wraps(func)
+    def timed(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            result = func(*args, **kwargs)
+        except BaseException:
+            record(None, time.perf_counter() - start, True)
+            raise
+        record(result, time.perf_counter() - start, False)
+        return result
+    return timed
+
+
+def _atimed(afunc, record):
+    @functools.wraps(afunc)
+    async def timed(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            result = await afunc(*args, **kwargs)
+        except BaseException:
+            record(None, time.perf_counter() - start, True)
+            raise
+        record(result, time.perf_counter() - start, False)
+        return result
+    return timed
+
+
+def _timed_runnable(runnable, record):
+    # A copy of `runnable` that calls record(result, seconds, error) after every call.
+    # Plain functions, RunnableLambda and ToolNode get their functions wrapped in place on the copy;
+    # an extra Runnable layer would cost more than most of the nodes it measures.
+    if hasattr(runnable, "func") and hasattr(runnable, "afunc"):
+        timed = copy.copy(runnable)
+        if runnable.func is not None:
+            timed.func = _timed(runnable.func, record)
+        if runnable.afunc is not None:
+            timed.afunc = _atimed(runnable.afunc, record)
+        return timed
+    return RunnableLambda(_timed(lambda value, config: runnable.invoke(value, config), record),
+                          afunc=_atimed(lambda value, config: runnable.ainvoke(value, config), record),
+                          name=getattr(runnable, "name", None))
+
+
+def instrument(builder, metrics=None):
+    # Wrap the nodes and conditional edges of a StateGraph (before compile) so they report into `metrics`
+    metrics = default_metrics if metrics is None else metrics
+    if not metrics.enabled:
+        return builder
+
+    for name, spec in builder.nodes.items():
+        def record(result, seconds, error, node=name):
+            metrics.observe("graph_node_duration_seconds", seconds, node=node)
+            metrics.inc("graph_node_calls_total", node=node, status="error" if error else "ok")
+            if not error:
+                prompt, completion = _token_usage(result)
+                if prompt or completion:
+                    metrics.inc("llm_tokens_total", prompt, node=node, type="prompt")
+                    metrics.inc("llm_tokens_total", completion, node=node, type="completion")
+        spec.runnable = _timed_runnable(spec.runnable, record)
+
+    for source, branches in builder.branches.items():
+        for branch_name, branch in branches.items():
+            edge = f"{source}:{branch_name}"
+
+            def record(result, seconds, error, edge=edge):
+                metrics.observe("graph_edge_duration_seconds", seconds, edge=edge)
+                targets = result if isinstance(result, list) else [result]
+                for target in (["error"] if error else targets):
+                    metrics.inc("graph_edge_calls_total", edge=edge, target=getattr(target, "node", target))
+            branches[branch_name] = branch._replace(path=_timed_runnable(branch.path, record))
+    return builder
+
+
+def track_tool(tool=None, *, metrics=None):
+    # Usable as @track_tool or @track_tool(metrics=...), above @tool (and above @pure, to time cache hits too)
+    if tool is None:
+        return lambda t: track_tool(t, metrics=metrics)
+    metrics = default_metrics if metrics is None else metrics
+    name = tool.name
+
+    def record(start, error):
+        metrics.observe("tool_duration_seconds", time.perf_counter() - start, tool=name)
+        metrics.inc("tool_calls_total", tool=name, status="error" if error else "ok")
+
+    if tool.func is not None:
+        func = tool.func
+
+        @functools.wraps(func)
+        def tracked(*args, **kwargs):
+            if not metrics.enabled:
+                return func(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                result = func(*args, **kwargs)
+            except BaseException:
+                record(start, True)
+                raise
+            record(start, False)
+            return result
+
+        tool.func = tracked
+
+    if getattr(tool, "coroutine", None) is not None:
+        coroutine = tool.coroutine
+
+        @functools.wraps(coroutine)
+        async def atracked(*args, **kwargs):
+            if not metrics.enabled:
+                return await coroutine(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                result = await coroutine(*args, **kwargs)
+            except BaseException:
+                record(start, True)
+                raise
+            record(start, False)
+            return result
+
+        tool.coroutine = atracked
+
+    return tool
+
+
+_server = None
+
+
+def serve_prometheus(port=9464, metrics=None):
+    # Serves prometheus_text() on http://localhost:<port>/metrics from a daemon thread
+    global _server
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+    metrics = default_metrics if metrics is None else metrics
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = metrics.prometheus_text().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    _server = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+    threading.Thread(target=_server.serve_forever, daemon=True).start()
+    return _server
+
+
+def _export_at_exit():
+    if os.environ.get("GRAPH_METRICS_PROMETHEUS"):
+        default_metrics.write_prometheus(os.environ["GRAPH_METRICS_PROMETHEUS"])
+    if os.environ.get("GRAPH_METRICS_OTLP"):
+        default_metrics.write_otlp(os.environ["GRAPH_METRICS_OTLP"])
+
+
+if os.environ.get("GRAPH_METRICS_PROMETHEUS") or os.environ.get("GRAPH_METRICS_OTLP"):
+    atexit.register(_export_at_exit)
+if os.environ.get("GRAPH_METRICS_PORT"):
+    serve_prometheus(int(os.environ["GRAPH_METRICS_PORT"]))
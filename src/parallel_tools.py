@@ -0,0 +1,275 @@
+import asyncio
+import inspect
+import threading
+import typing
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+from langchain_core.messages import AIMessage, ToolMessage
+from langgraph.errors import GraphBubbleUp
+from langgraph.prebuilt.tool_node import TOOL_CALL_ERROR_TEMPLATE, ToolInvocationError
+from pydantic import ValidationError
+
+# Tool node that runs all tool calls of one assistant turn at the same time.
+# When the model asks for several independent calls in one AIMessage (say add(1, 2) and multiply(3, 4)),
+# the step takes as long as the slowest call instead of the sum of all of them.
+#   - sync graphs use a thread pool of `max_workers` threads, created once and reused by every step
+#   - async graphs run the calls as tasks, at most `max_concurrency` at a time
+#   - `timeout` (seconds) applies to every call, `timeouts` overrides it per tool name
+# Results are returned in the order of the tool calls. A timed-out call turns into an error ToolMessage.
+# A call that raises is handled like ToolNode does, following `handle_tool_errors`:
+#   None (default)             arguments the tool rejects become an error ToolMessage, anything else is raised
+#   True / False               every exception becomes an error ToolMessage / is raised
+#   a str                      every exception becomes an error ToolMessage with that content
+#   a callable                 the exceptions its first parameter is annotated with (all if unannotated) become
+#                              an error ToolMessage with the callable's return value, others are raised
+#   an exception type or tuple those exceptions become an error ToolMessage, others are raised
+# A timed-out sync call can't be stopped, Python threads can't be killed: it keeps its thread until it
+# returns. So the pool is replaced by a fresh one when a call times out, and the stuck thread only holds
+# up the old pool, which is shut down once its calls are done.
+#
+# Use it in place of ToolNode:
+#   tool_node = ParallelToolNode(tools, max_workers=8, timeout=30)
+#   builder.add_node("tools", RunnableLambda(tool_node, afunc=tool_node.acall))
+#
+# Calls can also be started before the node runs, while the model is still streaming its message
+# (see speculative_tools.py): speculate() / aspeculate() start a call, settle() drops the ones the final
+# message doesn't contain, and the node then takes over the running call instead of starting it again.
+# Only tools in `speculate` are started early: by default the @pure ones (tool_cache.py), since a call
+# that is thrown away must not have done anything. Speculative calls bypass max_concurrency.
+# They are kept per conversation (the thread_id in the config), so two runs that happen to reuse a tool
+# call id never take each other's call, and run with a config of their own: the caller's configurable
+# values, metadata, tags and callbacks, without the graph's internal keys of the node that started them.
+
+
+def _scope(config):
+    # Speculative calls of different conversations are kept apart by thread_id
+    return ((config or {}).get("configurable") or {}).get("thread_id")
+
+
+def speculative_config(config):
+    # The config a call started ahead of the tools node runs with: what the caller passed in, without the
+    # internals (task, checkpoint, channel writers) LangGraph put in for the node that started it
+    config = config or {}
+    configurable = {
+        k: v for k, v in (config.get("configurable") or {}).items()
+        if not k.startswith("__pregel_") and k not in ("checkpoint_id", "checkpoint_map", "checkpoint_ns")
+    }
+    metadata = {k: v for k, v in (config.get("metadata") or {}).items() if not k.startswith("langgraph_")}
+    tool_config = {"configurable": configurable, "metadata": {**metadata, "speculative": True},
+                   "tags": [*(config.get("tags") or []), "speculative"]}
+    if config.get("callbacks") is not None:
+        tool_config["callbacks"] = config["callbacks"]
+    return tool_config
+
+
+def _handled_types(handler):
+    # The exception types an error handler's first parameter is annotated with, like ToolNode infers them
+    params = list(inspect.signature(handler).parameters.values())
+    if not params:
+        return (Exception,)
+    annotation = typing.get_type_hints(handler).get(params[0].name)
+    if annotation is None:
+        return (Exception,)
+    return typing.get_args(annotation) or (annotation,)
+
+
+class ParallelToolNode:
+    def __init__(self, tools, max_workers=8, max_concurrency=None, timeout=None, timeouts=None, speculate=None,
+                 max_speculative=1024, handle_tool_errors=None):
+        self.tools_by_name = {t.name: t for t in tools}
+        self.handle_tool_errors = handle_tool_errors
+        self.max_workers = max_workers
+        self.max_concurrency = max_concurrency or max_workers
+        self.timeout = timeout
+        self.timeouts = timeouts or {}
+        # Names of the tools that may run speculatively: True for all of them, None for the pure ones
+        if speculate is True:
+            speculate = self.tools_by_name
+        elif speculate is None:
+            speculate = [t.name for t in tools if (t.metadata or {}).get("pure")]
+        self.speculate_tools = set(speculate)
+        self.max_speculative = max_speculative
+        self.stats = {"speculated": 0, "used": 0, "discarded": 0}
+        # (thread id, tool call id) -> (name, args, future or task) of calls started early; the oldest are dropped past
+        # max_speculative, which only happens to calls nobody came for (a run that ended after the model call)
+        self._speculative = OrderedDict()
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def _pool(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="tools")
+            return self._executor
+
+    def _tool_calls(self, state):
+        messages = state["messages"]
+        ai_message = next(m for m in reversed(messages) if isinstance(m, AIMessage))
+        return ai_message.tool_calls
+
+    def _timeout(self, name):
+        return self.timeouts.get(name, self.timeout)
+
+    def _error(self, call, content):
+        return ToolMessage(content=content, name=call["name"], tool_call_id=call["id"], status="error")
+
+    def _unknown(self, call):
+        return self._error(
+            call, f"Error: {call['name']} is not a valid tool, try one of [{', '.join(self.tools_by_name)}]."
+        )
+
+    def _failed(self, call, e):
+        # The error ToolMessage for an exception raised by a call, or the exception again if it isn't handled
+        if isinstance(e, ValidationError):
+            e = ToolInvocationError(call["name"], e, call["args"])
+        handle = self.handle_tool_errors
+        if isinstance(e, GraphBubbleUp) or handle is False:
+            raise e
+        if handle is None:
+            if not isinstance(e, ToolInvocationError):
+                raise e
+            return self._error(call, e.message)
+        if isinstance(handle, (type, tuple)):
+            if not isinstance(e, handle):
+                raise e
+            return self._error(call, TOOL_CALL_ERROR_TEMPLATE.format(error=repr(e)))
+        if isinstance(handle, str):
+            return self._error(call, handle)
+        if callable(handle):
+            if not isinstance(e, _handled_types(handle)):
+                raise e
+            return self._error(call, handle(e))
+        return self._error(call, TOOL_CALL_ERROR_TEMPLATE.format(error=repr(e)))
+
+    def _timed_out(self, call):
+        return self._error(call, f"Error: {call['name']} did not finish within {self._timeout(call['name'])} seconds.")
+
+    def _run(self, call, config):
+        try:
+            return self.tools_by_name[call["name"]].invoke({**call, "type": "tool_call"}, config)
+        except Exception as e:
+            return self._failed(call, e)
+
+    # Speculative calls
+
+    @staticmethod
+    def _cancel(future):
+        if isinstance(future, asyncio.Future):
+            # Tasks may only be touched from their own loop's thread
+            future.get_loop().call_soon_threadsafe(future.cancel)
+        else:
+            future.cancel()
+
+    def _remember(self, call, config, future):
+        with self._lock:
+            self._speculative[(_scope(config), call["id"])] = (call["name"], call["args"], future)
+            self.stats["speculated"] += 1
+            while len(self._speculative) > self.max_speculative:
+                self._cancel(self._speculative.popitem(last=False)[1][2])
+                self.stats["discarded"] += 1
+
+    def speculate(self, call, config=None):
+        # Start a call from a message that is still streaming, on the pool
+        if call["name"] in self.speculate_tools and call.get("id"):
+            self._remember(call, config, self._pool().submit(self._run, call, speculative_config(config)))
+
+    def aspeculate(self, call, config=None):
+        # Start a call from a message that is still streaming, as a task of the running loop
+        if call["name"] in self.speculate_tools and call.get("id"):
+            self._remember(call, config, asyncio.ensure_future(
+                self.tools_by_name[call["name"]].ainvoke({**call, "type": "tool_call"}, speculative_config(config))
+            ))
+
+    def settle(self, calls, message=None, config=None):
+        # Drop the speculative `calls` that the final message doesn't make exactly (all of them if it failed)
+        final = {tc["id"]: tc for tc in (message.tool_calls if message is not None else [])}
+        scope = _scope(config)
+        with self._lock:
+            for call in calls:
+                entry = self._speculative.get((scope, call["id"]))
+                kept = final.get(call["id"])
+                if entry is not None and (kept is None or (kept["name"], kept["args"]) != entry[:2]):
+                    del self._speculative[(scope, call["id"])]
+                    self._cancel(entry[2])
+                    self.stats["discarded"] += 1
+
+    def _claim(self, call, config=None, sync=False):
+        # The running speculative call for `call`, if there is one that made exactly the same request.
+        # A task started by an async stream can't be waited on from a sync run: it is dropped and the call made again.
+        with self._lock:
+            entry = self._speculative.pop((_scope(config), call.get("id")), None)
+            if entry is None:
+                return None
+            if (call["name"], call["args"]) != entry[:2] or (sync and isinstance(entry[2], asyncio.Future)):
+                self._cancel(entry[2])
+                self.stats["discarded"] += 1
+                return None
+            self.stats["used"] += 1
+            return entry[2]
+
+    def __call__(self, state, config=None):
+        calls = self._tool_calls(state)
+        started = time.monotonic()
+        futures = [
+            self._claim(call, config, sync=True) or self._pool().submit(self._run, call, config) if call["name"] in self.tools_by_name
+            else None
+            for call in calls
+        ]
+        results = []
+        for call, future in zip(calls, futures):
+            if future is None:
+                results.append(self._unknown(call))
+                continue
+            timeout = self._timeout(call["name"])
+            try:
+                # Timeouts count from when the calls were submitted, not from when we start waiting.
+                # A timed-out call keeps its thread until it returns, Python threads can't be killed.
+                remaining = None if timeout is None else max(0.0, started + timeout - time.monotonic())
+                results.append(future.result(timeout=remaining))
+            except TimeoutError:
+                if not future.cancel():
+                    self._retire_pool()
+                results.append(self._timed_out(call))
+        return {"messages": results}
+
+    async def acall(self, state, config=None):
+        calls = self._tool_calls(state)
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async def run(call):
+            if call["name"] not in self.tools_by_name:
+                return self._unknown(call)
+            task = self._claim(call, config)
+            if task is not None and not isinstance(task, asyncio.Future):
+                # Started from a sync stream on the pool
+                task = asyncio.wrap_future(task)
+            async with semaphore:
+                if task is None:
+                    task = asyncio.ensure_future(
+                        self.tools_by_name[call["name"]].ainvoke({**call, "type": "tool_call"}, config)
+                    )
+                # asyncio.wait, unlike wait_for, doesn't wait for the cancelled task to finish,
+                # which for a sync tool running in a worker thread would be the full call anyway
+                done, _ = await asyncio.wait({task}, timeout=self._timeout(call["name"]))
+                if not done:
+                    task.cancel()
+                    return self._timed_out(call)
+                try:
+                    return task.result()
+                except Exception as e:
+                    return self._failed(call, e)
+
+        return {"messages": list(await asyncio.gather(*(run(call) for call in calls)))}
+
+    def _retire_pool(self):
+        # A call that is stuck in a worker thread: later calls go to a fresh pool instead of waiting behind it
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False)
+                self._executor = None
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
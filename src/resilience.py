@@ -0,0 +1,443 @@
+import asyncio
+import concurrent.futures
+import contextvars
+import random
+import sys
+import threading
+import time
+from collections import deque
+from langchain_core.runnables import Runnable
+
+# Deadlines, hedged requests, retries with jittered backoff and a circuit breaker for the model calls.
+# The Azure client is built with timeout=None, so a stuck call holds its agent turn forever, and its
+# retries only start once a call has failed. A ResiliencePolicy bounds every call instead:
+#
+#   deadline:  total seconds for the call, across every attempt, hedge and backoff sleep
+#   hedging:   if an attempt hasn't answered after the p95 latency of recent calls, the same request is
+#              sent again and the first answer wins. Until `min_samples` calls have been seen the delay
+#              is `initial_hedge_delay`. This costs a few percent extra requests and cuts the tail that
+#              slow backends add.
+#   retries:   failed attempts are retried up to `max_attempts` times, sleeping a random time between 0 and
+#              min(backoff_max, backoff_base * 2**attempt) ("full jitter"), so clients don't retry in lockstep.
+#              Only connection errors, timeouts and HTTP 408, 409, 429 and 5xx are retried and count against the
+#              breaker; other errors (a bad request, a bug in the caller) fail at once.
+#   breaker:   after `failure_threshold` failed attempts in a row, calls fail at once with CircuitOpenError for
+#              `reset_timeout` seconds; then a single probe call decides whether to close it again.
+#
+# Enable it for every client handed out by llm_clients:
+#   llm_clients.set_llm_resilience(ResiliencePolicy(deadline=30))
+# With a policy set, the Azure client's own retries are turned off so the policy is the only one retrying,
+# and its request timeout is the policy's deadline, so no HTTP call outlives the deadline by much.
+#
+# In the sync path each attempt runs on the policy's thread pool (in a copy of the caller's contextvars, so
+# callbacks still see the parent run), so it can be abandoned at the deadline; an abandoned attempt keeps its
+# thread until the HTTP call returns (at the latest at the client's timeout), and an abandoned stream is
+# closed then. In the async path losing attempts are cancelled.
+# stub_server.py runs a local endpoint that injects slow and failing responses to try this on.
+
+
+class DeadlineExceeded(TimeoutError):
+    pass
+
+
+class CircuitOpenError(RuntimeError):
+    pass
+
+
+class _OutOfTime(Exception):
+    # Raised by a hedged attempt that reaches the deadline, kept apart from timeouts raised by the call itself
+    pass
+
+
+RETRYABLE_STATUS = (408, 409, 429)
+
+
+def status_of(error):
+    # HTTP status of an error the backend answered with, or None
+    status = getattr(error, "status_code", None)
+    if status is None:
+        status = getattr(getattr(error, "response", None), "status_code", None)
+    return status if isinstance(status, int) else None
+
+
+def _transport_errors():
+    errors = [ConnectionError, TimeoutError, _OutOfTime]
+    for module, names in (("httpx", ("TransportError",)), ("openai", ("APIConnectionError", "APITimeoutError"))):
+        # Only looked up once imported: an error of a library that was never imported can't have been raised
+        module = sys.modules.get(module)
+        if module is not None:
+            errors.extend(getattr(module, name) for name in names)
+    return tuple(errors)
+
+
+def is_retryable(error):
+    # Connection errors and timeouts are retried, and so are throttling and server errors.
+    # Anything else (a bad request, a bug such as a TypeError or a validation error) fails at once.
+    status = status_of(error)
+    if status is not None:
+        return status in RETRYABLE_STATUS or status >= 500
+    return isinstance(error, _transport_errors())
+
+
+class CircuitBreaker:
+    def __init__(self, failure_threshold=5, reset_timeout=30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = 0.0
+        self.stats = {"opened": 0, "rejected": 0}
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def allow(self):
+        with self._lock:
+            if self.state == "open" and time.monotonic() - self.opened_at >= self.reset_timeout:
+                self.state = "half_open"
+                self._probing = False
+            if self.state == "closed":
+                return True
+            if self.state == "half_open" and not self._probing:
+                # One call goes through to test the backend, the rest keep failing fast until it answers
+                self._probing = True
+                return True
+            self.stats["rejected"] += 1
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.state = "closed"
+            self.failures = 0
+            self._probing = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == "half_open" or self.failures >= self.failure_threshold:
+                if self.state != "open":
+                    self.stats["opened"] += 1
+                self.state = "open"
+                self.opened_at = time.monotonic()
+                self._probing = False
+
+    def release(self):
+        # A call that ended with neither an answer nor an error (cancelled, interrupted, a stream closed
+        # early) says nothing about the backend, but mustn't keep the probe: the next call probes instead
+        with self._lock:
+            if self.state == "half_open":
+                self._probing = False
+
+
+class LatencyWindow:
+    # The latencies of the last `size` successful attempts
+    def __init__(self, size=200):
+        self._samples = deque(maxlen=size)
+        self._lock = threading.Lock()
+
+    def add(self, seconds):
+        with self._lock:
+            self._samples.append(seconds)
+
+    def quantile(self, q):
+        with self._lock:
+            ordered = sorted(self._samples)
+        if not ordered:
+            return None
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+    def __len__(self):
+        return len(self._samples)
+
+
+class ResiliencePolicy:
+    def __init__(self, deadline=60.0, max_attempts=3, backoff_base=0.5, backoff_max=8.0,
+                 hedge=True, hedge_quantile=0.95, initial_hedge_delay=2.0, min_hedge_delay=0.05, min_samples=20,
+                 max_hedges=1, failure_threshold=5, reset_timeout=30.0, max_workers=64, seed=None):
+        self.deadline = deadline
+        self.max_attempts = max_attempts
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.hedge = hedge
+        self.hedge_quantile = hedge_quantile
+        self.initial_hedge_delay = initial_hedge_delay
+        self.min_hedge_delay = min_hedge_delay
+        self.min_samples = min_samples
+        self.max_hedges = max_hedges
+        self.breaker = CircuitBreaker(failure_threshold, reset_timeout)
+        self.latencies = LatencyWindow()
+        self.max_workers = max_workers
+        self.stats = {"calls": 0, "attempts": 0, "hedges": 0, "hedge_wins": 0, "retries": 0,
+                      "timeouts": 0, "failures": 0, "short_circuits": 0}
+        self._random = random.Random(seed)
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def _count(self, key, n=1):
+        with self._lock:
+            self.stats[key] += n
+
+    def hedge_delay(self):
+        if len(self.latencies) < self.min_samples:
+            return self.initial_hedge_delay
+        return max(self.min_hedge_delay, self.latencies.quantile(self.hedge_quantile))
+
+    def backoff(self, attempt):
+        with self._lock:
+            return self._random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+    def executor(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = concurrent.futures.ThreadPoolExecutor(self.max_workers, thread_name_prefix="llm-attempt")
+            return self._executor
+
+    def wrap(self, llm, tool_schemas=None):
+        return ResilientLLM(llm, self)
+
+    def _settle_breaker(self, error):
+        # A failure that isn't retried says nothing against the backend
+        if status_of(error) is not None:
+            # The backend answered, the request itself was bad
+            self.breaker.record_success()
+        else:
+            # Raised on our side, the backend may not even have been reached
+            self.breaker.release()
+
+    # Sync path
+
+    def call(self, fn, hedge=True):
+        # Run fn() under the policy and return its result; hedge=False sends no extra copies
+        self._count("calls")
+        deadline = time.monotonic() + self.deadline
+        error = None
+        for attempt in range(self.max_attempts):
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise DeadlineExceeded(f"model call exceeded its {self.deadline:g} s deadline") from error
+            if not self.breaker.allow():
+                self._count("short_circuits")
+                raise CircuitOpenError("model backend circuit is open") from error
+            if attempt:
+                self._count("retries")
+            try:
+                result = self._hedged(fn, remaining, hedge)
+            except _OutOfTime:
+                self.breaker.record_failure()
+                self._count("timeouts")
+                raise DeadlineExceeded(f"model call exceeded its {self.deadline:g} s deadline") from error
+            except Exception as e:
+                self._count("failures")
+                if not is_retryable(e):
+                    self._settle_breaker(e)
+                    raise
+                self.breaker.record_failure()
+                error = e
+                pause = min(self.backoff(attempt), deadline - time.monotonic())
+                if attempt + 1 < self.max_attempts and pause > 0:
+                    time.sleep(pause)
+                continue
+            except BaseException:
+                self.breaker.release()
+                raise
+            self.breaker.record_success()
+            return result
+        raise error
+
+    def _hedged(self, fn, timeout, hedge=True):
+        # One attempt: fn() on the pool, plus up to max_hedges copies once the hedge delay has passed
+        executor = self.executor()
+        hedge = hedge and self.hedge
+        end = time.monotonic() + timeout
+        started = {}
+
+        def launch():
+            self._count("attempts")
+            # In a copy of the caller's context, so the model call sees the parent run (callbacks, tracing, streaming)
+            future = executor.submit(contextvars.copy_context().run, fn)
+            started[future] = time.monotonic()
+            return future
+
+        first = launch()
+        pending = {first}
+        hedges = failed = 0
+        error = None
+        try:
+            while pending:
+                now = time.monotonic()
+                if now >= end:
+                    raise _OutOfTime()
+                wait = end - now
+                if hedge and hedges < self.max_hedges:
+                    wait = min(wait, max(0.0, started[first] + self.hedge_delay() * (hedges + 1) - now))
+                done, pending = concurrent.futures.wait(pending, timeout=wait, return_when=concurrent.futures.FIRST_COMPLETED)
+                for future in done:
+                    if future.exception() is None:
+                        if hedge:
+                            # Only calls that may be hedged feed the window; a stream's first chunk comes much sooner
+                            self.latencies.add(time.monotonic() - started[future])
+                        if future is not first:
+                            self._count("hedge_wins")
+                        return future.result()
+                    error = future.exception()
+                    failed += 1
+                if not hedge or time.monotonic() >= end:
+                    continue
+                # Hedge once the delay has passed, and replace a copy that failed while another is still running
+                if (not done and hedges < self.max_hedges) or (done and pending and failed <= self.max_hedges):
+                    hedges += 1
+                    self._count("hedges")
+                    pending.add(launch())
+            raise error
+        finally:
+            for future in pending:
+                future.cancel()
+
+    # Async path
+
+    async def acall(self, fn, hedge=True):
+        # Await fn() under the policy and return its result; hedge=False sends no extra copies
+        self._count("calls")
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.deadline
+        error = None
+        for attempt in range(self.max_attempts):
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                raise DeadlineExceeded(f"model call exceeded its {self.deadline:g} s deadline") from error
+            if not self.breaker.allow():
+                self._count("short_circuits")
+                raise CircuitOpenError("model backend circuit is open") from error
+            if attempt:
+                self._count("retries")
+            try:
+                result = await self._ahedged(fn, remaining, hedge)
+            except _OutOfTime:
+                self.breaker.record_failure()
+                self._count("timeouts")
+                raise DeadlineExceeded(f"model call exceeded its {self.deadline:g} s deadline") from error
+            except Exception as e:
+                self._count("failures")
+                if not is_retryable(e):
+                    self._settle_breaker(e)
+                    raise
+                self.breaker.record_failure()
+                error = e
+                pause = min(self.backoff(attempt), deadline - loop.time())
+                if attempt + 1 < self.max_attempts and pause > 0:
+                    await asyncio.sleep(pause)
+                continue
+            except BaseException:
+                self.breaker.release()
+                raise
+            self.breaker.record_success()
+            return result
+        raise error
+
+    async def _ahedged(self, fn, timeout, hedge=True):
+        loop = asyncio.get_running_loop()
+        hedge = hedge and self.hedge
+        end = loop.time() + timeout
+        started = {}
+
+        def launch():
+            self._count("attempts")
+            task = asyncio.ensure_future(fn())
+            started[task] = loop.time()
+            return task
+
+        first = launch()
+        pending = {first}
+        hedges = failed = 0
+        error = None
+        try:
+            while pending:
+                now = loop.time()
+                if now >= end:
+                    raise _OutOfTime()
+                wait = end - now
+                if hedge and hedges < self.max_hedges:
+                    wait = min(wait, max(0.0, started[first] + self.hedge_delay() * (hedges + 1) - now))
+                done, pending = await asyncio.wait(pending, timeout=wait, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if hedge:
+                            self.latencies.add(loop.time() - started[task])
+                        if task is not first:
+                            self._count("hedge_wins")
+                        return task.result()
+                    error = task.exception()
+                    failed += 1
+                if not hedge or loop.time() >= end:
+                    continue
+                # Hedge once the delay has passed, and replace a copy that failed while another is still running
+                if (not done and hedges < self.max_hedges) or (done and pending and failed <= self.max_hedges):
+                    hedges += 1
+                    self._count("hedges")
+                    pending.add(launch())
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
+
+
+class ResilientLLM(Runnable):
+    # Wraps a chat model (or a model with bound tools) so every call runs under a ResiliencePolicy
+
+    def __init__(self, llm, policy):
+        self.llm = llm
+        self.policy = policy
+
+    def invoke(self, input, config=None, **kwargs):
+        return self.policy.call(lambda: self.llm.invoke(input, config, **kwargs))
+
+    async def ainvoke(self, input, config=None, **kwargs):
+        return await self.policy.acall(lambda: self.llm.ainvoke(input, config, **kwargs))
+
+    def stream(self, input, config=None, **kwargs):
+        # Up to its first chunk a stream runs under the policy like invoke: deadline, retries and the breaker,
+        # but no hedging (only one stream can be handed on). Once chunks flow it can no longer be retried or
+        # abandoned, so the deadline covers the wait for the first chunk, not the whole stream.
+        abandoned = threading.Event()
+
+        def first():
+            chunks = iter(self.llm.stream(input, config, **kwargs))
+            chunk = next(chunks, None)
+            if abandoned.is_set():
+                # The caller gave up at the deadline while this attempt waited: close its connection
+                chunks.close()
+            return chunk, chunks
+
+        try:
+            chunk, chunks = self.policy.call(first, hedge=False)
+        except BaseException:
+            abandoned.set()
+            raise
+        if chunk is None:
+            return
+        yield chunk
+        try:
+            yield from chunks
+        except Exception as e:
+            if is_retryable(e):
+                self.policy.breaker.record_failure()
+            raise
+
+    async def astream(self, input, config=None, **kwargs):
+        async def first():
+            chunks = aiter(self.llm.astream(input, config, **kwargs))
+            try:
+                return await anext(chunks), chunks
+            except StopAsyncIteration:
+                return None, chunks
+
+        chunk, chunks = await self.policy.acall(first, hedge=False)
+        if chunk is None:
+            return
+        yield chunk
+        try:
+            async for chunk in chunks:
+                yield chunk
+        except Exception as e:
+            if is_retryable(e):
+                self.policy.breaker.record_failure()
+            raise
@@ -0,0 +1,368 @@
+import argparse
+import asyncio
+import bisect
+import collections
+import concurrent.futures
+import hashlib
+import itertools
+import json
+import multiprocessing
+import os
+import queue
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+os.environ.setdefault("AZURE_OPENAI_API_KEY", "api_key")
+os.environ.setdefault("AZURE_OPENAI_ENDPOINT", "endpoint")
+
+# Serves the memory agent from several worker processes behind one local HTTP front end.
+#
+#   python serve_pool.py --workers 4 --port 8080
+#   curl -d '{"thread_id": "1", "message": "Add 3 and 4."}' localhost:8080/turn
+#   curl -d '{"thread_id": "1", "message": "Multiply that by 2."}' localhost:8080/turn
+#   curl localhost:8080/stats
+#
+# Each worker builds its own graph and checkpointer (BoundedMemorySaver, see batch_runner.load_graph), and
+# checkpoints never leave the process. So every turn of a conversation has to land on the same worker:
+# the front end places workers on a consistent-hash ring and sends each thread_id to the worker that owns
+# its point on the ring. Within a worker, turns run concurrently on an event loop (SessionDriver).
+#
+# When a worker dies, it is taken off the ring, so only the conversations it owned move (to the next
+# worker on the ring, with their history lost along with the process) and everyone else stays put.
+# Its in-flight turns are sent to their new owner. With respawn on (the default) a replacement starts with
+# the same name and takes its place on the ring again once it is ready. That takes back every conversation
+# that moved to a neighbor during the outage, and those lose their history a second time: the front end
+# doesn't remember where threads went, the ring alone decides.
+#
+# GET /stats reports, per worker: pid, state, restarts, turns, errors, turns in flight, turns/s over the
+# last STATS_WINDOW seconds and since the current process started, mean latency, and the share of the ring
+# it owns. turns, errors and mean latency add up all of a worker's processes.
+
+STATS_WINDOW = 10.0
+
+
+def _hash(value):
+    return int.from_bytes(hashlib.blake2b(value.encode("utf-8"), digest_size=8).digest(), "big")
+
+
+class HashRing:
+    # Consistent hashing with `replicas` points per node, so load spreads evenly and removing a node
+    # only moves the keys that node owned
+    def __init__(self, nodes=(), replicas=100):
+        self.replicas = replicas
+        self._points = []   # sorted hashes
+        self._owners = {}   # hash -> node
+        for node in nodes:
+            self.add(node)
+
+    def add(self, node):
+        for i in range(self.replicas):
+            point = _hash(f"{node}#{i}")
+            if point not in self._owners:
+                bisect.insort(self._points, point)
+                self._owners[point] = node
+
+    def remove(self, node):
+        self._points = [p for p in self._points if self._owners[p] != node]
+        self._owners = {p: self._owners[p] for p in self._points}
+
+    def get(self, key):
+        if not self._points:
+            return None
+        index = bisect.bisect(self._points, _hash(key)) % len(self._points)
+        return self._owners[self._points[index]]
+
+    def nodes(self):
+        return set(self._owners.values())
+
+    def shares(self):
+        # node -> fraction of the hash space it owns
+        space = 2 ** 64
+        shares = collections.defaultdict(float)
+        for i, point in enumerate(self._points):
+            previous = self._points[i - 1] if i else self._points[-1] - space
+            shares[self._owners[point]] += (point - previous) / space
+        return dict(shares)
+
+    def __len__(self):
+        return len(self.nodes())
+
+
+def worker_main(name, module, max_concurrency, requests, responses):
+    # Runs in the worker process: build the graph, then serve (request id, thread id, message) items
+    # until a None arrives
+    from async_driver import SessionDriver
+    from batch_runner import load_graph
+    driver = SessionDriver(load_graph(module, memory=True), max_concurrency=max_concurrency)
+
+    async def handle(request_id, thread_id, message):
+        start = time.perf_counter()
+        try:
+            state = await driver.turn(thread_id, message)
+            responses.put((request_id, state["messages"][-1].content, None, time.perf_counter() - start))
+        except Exception as e:
+            responses.put((request_id, None, repr(e), time.perf_counter() - start))
+
+    async def main():
+        loop = asyncio.get_running_loop()
+        tasks = set()
+        responses.put(("ready", os.getpid()))
+        while True:
+            item = await loop.run_in_executor(None, requests.get)
+            if item is None:
+                break
+            task = asyncio.create_task(handle(*item))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+        if tasks:
+            await asyncio.gather(*tasks)
+
+    asyncio.run(main())
+
+
+class Worker:
+    # The front end's handle on one worker process
+    def __init__(self, name):
+        self.name = name
+        self.process = None
+        self.requests = None
+        self.responses = None
+        self.state = "starting"
+        self.restarts = 0
+        self.pending = {}   # request id -> (future, thread id, message, dispatches)
+        self.turns = 0
+        self.process_turns = 0   # turns answered by the current process
+        self.errors = 0
+        self.latency = 0.0
+        self.started = time.monotonic()
+        self.recent = collections.deque()  # completion times within STATS_WINDOW
+
+
+class WorkerPool:
+    def __init__(self, workers=4, module="5_agent_memory", max_concurrency=64, respawn=True, replicas=100, window=STATS_WINDOW):
+        self.module = module
+        self.max_concurrency = max_concurrency
+        self.respawn = respawn
+        self.window = window
+        self.ring = HashRing(replicas=replicas)
+        self.workers = {f"worker-{i}": Worker(f"worker-{i}") for i in range(workers)}
+        # Spawned rather than forked: the front end runs threads, and forking those is unsafe
+        self._context = multiprocessing.get_context("spawn")
+        self._ids = itertools.count()
+        self._lock = threading.RLock()
+        self._stopping = False
+        self._monitor = None
+
+    def start(self, timeout=60.0):
+        for worker in self.workers.values():
+            self._spawn(worker)
+        deadline = time.monotonic() + timeout
+        while any(w.state != "ready" for w in self.workers.values()):
+            if time.monotonic() > deadline:
+                raise RuntimeError("workers did not start in time")
+            time.sleep(0.05)
+        self._monitor = threading.Thread(target=self._watch, daemon=True)
+        self._monitor.start()
+        return self
+
+    def _spawn(self, worker):
+        requests, responses = self._context.Queue(), self._context.Queue()
+        process = self._context.Process(
+            target=worker_main, args=(worker.name, self.module, self.max_concurrency, requests, responses),
+            name=worker.name, daemon=True,
+        )
+        # Swapped under the lock, so a dispatch never sees the old queue after the worker was declared dead
+        with self._lock:
+            worker.requests, worker.responses, worker.process = requests, responses, process
+            worker.state = "starting"
+            worker.started = time.monotonic()
+            worker.process_turns = 0
+        process.start()
+        threading.Thread(target=self._read, args=(worker, process, responses), daemon=True).start()
+
+    def _read(self, worker, process, responses):
+        # One reader per worker process: resolves the futures of the turns it answers
+        while True:
+            try:
+                item = responses.get(timeout=0.2)
+            except queue.Empty:
+                if not process.is_alive():
+                    return
+                continue
+            except (EOFError, OSError):
+                return
+            if item[0] == "ready":
+                with self._lock:
+                    worker.state = "ready"
+                    self.ring.add(worker.name)
+                continue
+            request_id, output, error, latency = item
+            with self._lock:
+                entry = worker.pending.pop(request_id, None)
+                if entry is None:
+                    continue
+                now = time.monotonic()
+                worker.turns += 1
+                worker.process_turns += 1
+                worker.errors += error is not None
+                worker.latency += latency
+                worker.recent.append(now)
+            future = entry[0]
+            future.set_result({"worker": worker.name, "output": output, "error": error, "latency": latency})
+
+    def _watch(self):
+        while not self._stopping:
+            for worker in list(self.workers.values()):
+                if worker.state != "dead" and worker.process is not None and not worker.process.is_alive():
+                    self._on_death(worker)
+            time.sleep(0.2)
+
+    def _on_death(self, worker):
+        with self._lock:
+            if self._stopping:
+                return
+            worker.state = "dead"
+            self.ring.remove(worker.name)
+            orphans = list(worker.pending.items())
+            worker.pending.clear()
+        # Turns the worker never answered go to the conversation's new owner, once
+        for request_id, (future, thread_id, message, dispatches) in orphans:
+            if dispatches > 1:
+                future.set_result({"worker": worker.name, "output": None, "error": "worker died", "latency": None})
+            else:
+                self._dispatch(request_id, future, thread_id, message, dispatches + 1)
+        if self.respawn:
+            with self._lock:
+                worker.restarts += 1
+            self._spawn(worker)
+
+    def _dispatch(self, request_id, future, thread_id, message, dispatches=1):
+        with self._lock:
+            name = self.ring.get(thread_id)
+            if name is None:
+                future.set_result({"worker": None, "output": None, "error": "no workers available", "latency": None})
+                return
+            worker = self.workers[name]
+            worker.pending[request_id] = (future, thread_id, message, dispatches)
+            # Still under the lock: if the worker dies after this, _on_death finds the turn in pending and
+            # re-dispatches it, and the put has gone to the dead process's queue, not to its replacement's.
+            # Queue.put doesn't block, a feeder thread does the writing.
+            worker.requests.put((request_id, thread_id, message))
+
+    def submit(self, thread_id, message):
+        # Returns a concurrent.futures.Future with {"worker", "output", "error", "latency"}
+        future = concurrent.futures.Future()
+        self._dispatch(next(self._ids), future, str(thread_id), message)
+        return future
+
+    def owner(self, thread_id):
+        with self._lock:
+            return self.ring.get(str(thread_id))
+
+    def stats(self):
+        now = time.monotonic()
+        with self._lock:
+            shares = self.ring.shares()
+            result = {}
+            for name, w in self.workers.items():
+                while w.recent and now - w.recent[0] > self.window:
+                    w.recent.popleft()
+                result[name] = {
+                    "pid": w.process.pid if w.process else None,
+                    "state": w.state,
+                    "restarts": w.restarts,
+                    "turns": w.turns,
+                    "errors": w.errors,
+                    "in_flight": len(w.pending),
+                    "turns_per_second": len(w.recent) / min(self.window, max(now - w.started, 1e-9)),
+                    "turns_per_second_total": w.process_turns / max(now - w.started, 1e-9),
+                    "mean_latency": w.latency / w.turns if w.turns else None,
+                    "ring_share": shares.get(name, 0.0),
+                }
+        return result
+
+    def stop(self):
+        with self._lock:
+            self._stopping = True
+        for worker in self.workers.values():
+            if worker.process is not None and worker.process.is_alive():
+                worker.requests.put(None)
+        for worker in self.workers.values():
+            if worker.process is not None:
+                worker.process.join(timeout=5)
+                if worker.process.is_alive():
+                    worker.process.terminate()
+
+
+def make_server(pool, host="127.0.0.1", port=8080, timeout=300.0):
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            if self.path != "/turn":
+                return self._reply(404, {"error": "not found"})
+            try:
+                body = json.loads(self.rfile.read(int(self.headers.get("Content-Length") or 0)))
+                thread_id, message = body["thread_id"], body["message"]
+            except (ValueError, KeyError, TypeError):
+                return self._reply(400, {"error": 'expected {"thread_id": ..., "message": ...}'})
+            try:
+                result = pool.submit(thread_id, message).result(timeout)
+            except concurrent.futures.TimeoutError:
+                return self._reply(504, {"thread_id": thread_id, "error": "timed out"})
+            self._reply(200 if result["error"] is None else 502, {"thread_id": thread_id, **result})
+
+        def do_GET(self):
+            if self.path == "/stats":
+                return self._reply(200, pool.stats())
+            self._reply(404, {"error": "not found"})
+
+        def _reply(self, status, payload):
+            data = json.dumps(payload).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    return server
+
+
+def format_stats(stats):
+    return "  ".join(
+        f"{name}={s['state']}:{s['turns_per_second']:.1f}/s({s['turns']}" + (f", {s['restarts']} restarts)" if s["restarts"] else ")")
+        for name, s in stats.items()
+    )
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Serve an agent graph from several processes with thread_id-sticky routing")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--graph", default="5_agent_memory", help="module with a build_graph(checkpointer=...) factory")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--max-concurrency", type=int, default=64, help="turns in flight per worker")
+    parser.add_argument("--no-respawn", action="store_true", help="don't replace workers that die")
+    parser.add_argument("--report-every", type=float, default=10.0, help="seconds between per-worker throughput lines, 0 for none")
+    args = parser.parse_args()
+
+    pool = WorkerPool(args.workers, args.graph, args.max_concurrency, respawn=not args.no_respawn).start()
+    server = make_server(pool, args.host, args.port)
+    print(f"serving {args.graph} with {args.workers} workers on http://{args.host}:{server.server_address[1]}", flush=True)
+    if args.report_every:
+        def report():
+            while True:
+                time.sleep(args.report_every)
+                print(format_stats(pool.stats()), flush=True)
+        threading.Thread(target=report, daemon=True).start()
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        pool.stop()
@@ -0,0 +1,129 @@
+import asyncio
+import concurrent.futures
+import threading
+from langchain_core.runnables import Runnable
+from llm_cache import request_key
+from metrics import default_metrics
+
+# Single-flight coalescing of identical model calls that are in flight at the same time.
+# When many users send the same prompt at once (the canned "What do you know about LangGraph?" of
+# 0_simple_agent, a retried batch, a burst after a deploy), each of them pays for its own model call
+# although every node calls the model with temperature=0 and would get the same answer. With single-flight,
+# the first caller of a request (keyed like llm_cache: deployment + messages + bound tools, ids left out)
+# makes the call, and every identical request that arrives before it returns waits for that answer instead
+# of sending its own.
+# Unlike the cache nothing is kept afterwards: a request that arrives once the call has returned goes upstream.
+#
+# Enable it for every client handed out by llm_clients:
+#   llm_clients.set_llm_single_flight(SingleFlight())
+#
+# Sync and async callers are coalesced separately (a thread can't await a task of another event loop), and
+# async callers only with callers on the same loop. Waiters share the caller's outcome, errors included, and
+# only the caller that went upstream sees the call in its callbacks, so a waiter gets its answer as a whole
+# message even under stream_mode="messages".
+# stats counts "calls", "upstream" (calls that reached the model) and "collapsed" (calls that waited for
+# another); with metrics on they are also recorded as llm_single_flight_total{result="upstream"|"collapsed"}.
+
+
+class SingleFlight:
+    def __init__(self, metrics=None):
+        self.metrics = default_metrics if metrics is None else metrics
+        self.stats = {"calls": 0, "upstream": 0, "collapsed": 0}
+        self._flights = {}  # key -> concurrent.futures.Future of the sync call in flight
+        self._tasks = {}    # (event loop, key) -> asyncio.Task of the async call in flight
+        self._lock = threading.Lock()
+
+    def _count(self, result):
+        # Called with the lock held
+        self.stats["calls"] += 1
+        self.stats[result] += 1
+        if self.metrics.enabled:
+            self.metrics.inc("llm_single_flight_total", result=result)
+
+    def collapse_rate(self):
+        calls = self.stats["calls"]
+        return self.stats["collapsed"] / calls if calls else 0.0
+
+    def in_flight(self):
+        with self._lock:
+            return len(self._flights) + len(self._tasks)
+
+    def call(self, key, fn):
+        # fn() if no call with this key is in flight, otherwise the result of the one that is
+        with self._lock:
+            future = self._flights.get(key)
+            if future is None:
+                future = self._flights[key] = concurrent.futures.Future()
+                self._count("upstream")
+                leader = True
+            else:
+                self._count("collapsed")
+                leader = False
+        if not leader:
+            return _copy(future.result())
+        try:
+            result = fn()
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                del self._flights[key]
+
+    async def acall(self, key, fn):
+        # Await fn() if no call with this key is in flight on this loop, otherwise the one that is.
+        # The call runs as a task of its own, so a caller that is cancelled doesn't cancel it for the others.
+        loop = asyncio.get_running_loop()
+        flight = (loop, key)
+        with self._lock:
+            task = self._tasks.get(flight)
+            if task is None:
+                task = self._tasks[flight] = loop.create_task(fn())
+                task.add_done_callback(lambda _: self._land(flight))
+                self._count("upstream")
+                leader = True
+            else:
+                self._count("collapsed")
+                leader = False
+        result = await asyncio.shield(task)
+        return result if leader else _copy(result)
+
+    def _land(self, flight):
+        with self._lock:
+            self._tasks.pop(flight, None)
+
+    def wrap(self, llm, tool_schemas=None, deployment=None):
+        return CoalescedLLM(llm, self, tool_schemas, deployment)
+
+
+def _copy(message):
+    # Every waiter gets a message of its own, with a fresh id so add_messages appends it (as for a cache hit)
+    message = message.model_copy(deep=True)
+    message.id = None
+    return message
+
+
+class CoalescedLLM(Runnable):
+    # Wraps a chat model (or a model with bound tools) so identical concurrent calls share one model call
+
+    def __init__(self, llm, single_flight, tool_schemas=None, deployment=None):
+        self.llm = llm
+        self.single_flight = single_flight
+        self.tool_schemas = tool_schemas
+        self.deployment = deployment
+
+    def invoke(self, input, config=None, **kwargs):
+        if kwargs:
+            # Per-call options (stop words, ...) aren't part of the key, so such calls always go upstream
+            return self.llm.invoke(input, config, **kwargs)
+        key = request_key(input, self.tool_schemas, self.deployment)
+        return self.single_flight.call(key, lambda: self.llm.invoke(input, config))
+
+    async def ainvoke(self, input, config=None, **kwargs):
+        if kwargs:
+            return await self.llm.ainvoke(input, config, **kwargs)
+        key = request_key(input, self.tool_schemas, self.deployment)
+        return await self.single_flight.acall(key, lambda: self.llm.ainvoke(input, config))
@@ -0,0 +1,92 @@
+import json
+from langchain_core.messages import AIMessage, AIMessageChunk, message_chunk_to_message
+from langchain_core.messages.ai import add_ai_message_chunks
+
+# Speculative tool execution: start each tool call while the model is still streaming the rest of its message.
+# A model that asks for several tool calls in one turn streams them one after another, arguments JSON a few
+# characters at a time, and the tools node normally starts only once the whole message is in. Here the
+# assistant streams the model instead of invoking it, and as soon as the arguments of a call parse as a
+# complete JSON object the call is started on the tool node (ParallelToolNode.speculate), so its latency
+# overlaps with the generation of the calls after it. Once the message is complete, every speculative call
+# whose name and arguments don't match the final message is discarded (ParallelToolNode.settle), and the
+# tools node picks up the running or finished calls that do instead of starting them again.
+#
+#   message = stream_and_speculate(llm_with_tools, prompt, tool_node, config)            # in place of invoke
+#   message = await astream_and_speculate(llm_with_tools, prompt, tool_node, config)     # in place of ainvoke
+#
+# A JSON object can't be the prefix of a longer JSON object, so the first prefix of the arguments that parses
+# as an object is the whole of them. With a client that doesn't stream (a cached or coalesced model, see
+# llm_clients) the message arrives as one chunk and nothing is gained, but nothing breaks either.
+# Speculative calls that are thrown away aren't counted against the agent's tool-call budget (budget.py),
+# which is why only side-effect free tools are started early.
+# Under a resilience policy (llm_clients.set_llm_resilience) a stream isn't covered like invoke: the deadline,
+# retries and breaker apply until the first chunk, after that a stalled stream isn't cut short, and it's
+# never hedged (ResilientLLM.stream).
+
+
+class ToolCallWatcher:
+    # Follows the tool_call_chunks of a streamed message and reports each tool call once its arguments are complete
+
+    def __init__(self):
+        self._calls = {}  # index -> {"name", "id", "args", "done"}
+
+    def feed(self, chunk):
+        ready = []
+        for piece in getattr(chunk, "tool_call_chunks", ()):
+            call = self._calls.setdefault(piece.get("index"), {"name": "", "id": "", "args": "", "done": False})
+            # Pieces are concatenated the way AIMessageChunk merges them
+            for key in ("name", "id", "args"):
+                if piece.get(key):
+                    call[key] += piece[key]
+            if call["done"] or not (call["name"] and call["id"] and call["args"]):
+                continue
+            try:
+                args = json.loads(call["args"])
+            except ValueError:
+                continue
+            if isinstance(args, dict):
+                call["done"] = True
+                ready.append({"name": call["name"], "args": args, "id": call["id"], "type": "tool_call"})
+        return ready
+
+
+def _final(chunks):
+    if not chunks:
+        # A stream that ended without a chunk, answered like an empty reply
+        return AIMessage(content="")
+    if len(chunks) == 1 and not isinstance(chunks[0], AIMessageChunk):
+        # A runnable without its own stream() yields its invoke() result
+        return chunks[0]
+    return message_chunk_to_message(add_ai_message_chunks(chunks[0], *chunks[1:]))
+
+
+def stream_and_speculate(llm, input, tool_node, config=None):
+    watcher, chunks, started = ToolCallWatcher(), [], []
+    try:
+        for chunk in llm.stream(input):
+            chunks.append(chunk)
+            for call in watcher.feed(chunk):
+                tool_node.speculate(call, config)
+                started.append(call)
+        message = _final(chunks)
+    except BaseException:
+        tool_node.settle(started, config=config)
+        raise
+    tool_node.settle(started, message, config)
+    return message
+
+
+async def astream_and_speculate(llm, input, tool_node, config=None):
+    watcher, chunks, started = ToolCallWatcher(), [], []
+    try:
+        async for chunk in llm.astream(input):
+            chunks.append(chunk)
+            for call in watcher.feed(chunk):
+                tool_node.aspeculate(call, config)
+                started.append(call)
+        message = _final(chunks)
+    except BaseException:
+        tool_node.settle(started, config=config)
+        raise
+    tool_node.settle(started, message, config)
+    return message
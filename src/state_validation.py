@@ -0,0 +1,120 @@
+import functools
+from typing_extensions import TypedDict
+
+# Cheaper validation for graphs whose state is a Pydantic model.
+# With StateGraph(PydanticState), LangGraph builds a full model instance from all channels as the input
+# of every node, so every field is validated again at every super-step, however little changed.
+# StateValidator keeps the Pydantic model as the source of truth but runs the graph on a TypedDict with
+# the same fields, and validates only what is written:
+#
+#   mode="updates":    the graph input and the keys each node returns, field by field.
+#                      Every value in the state has been validated once, when it was written.
+#   mode="boundaries": the graph input on the way in and the full final state on the way out.
+#                      Nodes are trusted in between, which is the cheapest option for hot loops.
+#
+#   validator = StateValidator(PydanticState, mode="updates")
+#   builder = StateGraph(validator.schema)
+#   builder.add_node("node_1", validator.node(node_1))
+#   graph = validator.wrap(builder.compile())
+#
+# Nodes receive a plain dict instead of a model instance, so they read state["name"], not state.name.
+# Field validators see one field at a time: info.data holds only the fields validated before it in the
+# same update (or input), never the rest of the state. Validators that need other fields, and model
+# validators (@model_validator), need the full model, i.e. plain StateGraph(PydanticState); a model with
+# model validators is refused.
+
+MODES = ("updates", "boundaries")
+
+
+class StateValidator:
+    def __init__(self, model, mode="updates"):
+        if mode not in MODES:
+            raise ValueError(f"mode must be one of {MODES}, got {mode!r}")
+        if model.__pydantic_decorators__.model_validators:
+            # Validating by assignment would run them against an instance holding a single update
+            raise ValueError(f"{model.__name__} has model validators, which need the full state: "
+                             f"use StateGraph({model.__name__}) instead")
+        self.model = model
+        self.mode = mode
+        self._validator = model.__pydantic_validator__
+        # Same fields and annotations (including reducers) as the model, without the per-step validation
+        self.schema = TypedDict(f"{model.__name__}Dict", {
+            name: field.rebuild_annotation() for name, field in model.model_fields.items()
+        })
+
+    def validate_update(self, update):
+        # Validate (and coerce) only the keys present in `update`
+        if not isinstance(update, dict):
+            return update
+        instance = self._blank()
+        validated = {}
+        for key, value in update.items():
+            # Assigning a single field runs that field's type checks and validators, and nothing else
+            self._validator.validate_assignment(instance, key, value)
+            validated[key] = getattr(instance, key)
+        return validated
+
+    def _blank(self):
+        # A fresh instance with no fields set, for one update: nothing carries over from the previous one.
+        # Cheaper than model_construct(), which fills in every default.
+        instance = self.model.__new__(self.model)
+        object.__setattr__(instance, "__dict__", {})
+        object.__setattr__(instance, "__pydantic_fields_set__", set())
+        object.__setattr__(instance, "__pydantic_extra__", None)
+        object.__setattr__(instance, "__pydantic_private__", None)
+        return instance
+
+    def validate_state(self, state):
+        # Validate the full state against the model, and return it as a dict again
+        if isinstance(state, self.model):
+            state = dict(state)
+        instance = self.model.model_validate(state)
+        return {key: getattr(instance, key) for key in state}
+
+    def node(self, func):
+        # In "updates" mode, validate what the node returns; in "boundaries" mode, leave it alone
+        if self.mode != "updates":
+            return func
+
+        @functools.wraps(func)
+        def wrapper(state, *args, **kwargs):
+            return self.validate_update(func(state, *args, **kwargs))
+        return wrapper
+
+    def wrap(self, graph):
+        return ValidatedGraph(graph, self)
+
+
+class ValidatedGraph:
+    # A compiled graph that validates its input, and in "boundaries" mode its final output.
+    # Anything other than invoke / ainvoke / stream / astream goes straight to the compiled graph.
+
+    def __init__(self, graph, validator):
+        self.graph = graph
+        self.validator = validator
+
+    def __getattr__(self, name):
+        return getattr(self.graph, name)
+
+    def _input(self, inputs):
+        if isinstance(inputs, self.validator.model):
+            inputs = dict(inputs)
+        return self.validator.validate_update(inputs)
+
+    def _output(self, state):
+        if self.validator.mode == "boundaries" and isinstance(state, dict):
+            return self.validator.validate_state(state)
+        return state
+
+    def invoke(self, inputs, config=None, **kwargs):
+        return self._output(self.graph.invoke(self._input(inputs), config, **kwargs))
+
+    async def ainvoke(self, inputs, config=None, **kwargs):
+        return self._output(await self.graph.ainvoke(self._input(inputs), config, **kwargs))
+
+    def stream(self, inputs, config=None, **kwargs):
+        # Streamed updates are partial states, only the input is validated here
+        return self.graph.stream(self._input(inputs), config, **kwargs)
+
+    def astream(self, inputs, config=None, **kwargs):
+        return self.graph.astream(self._input(inputs), config, **kwargs)
@@ -0,0 +1,227 @@
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from langchain_core.messages import convert_to_messages, convert_to_openai_messages
+from fake_llm import FakeArithmeticChatModel
+
+# A local stand-in for the Azure OpenAI chat completions endpoint that misbehaves on purpose.
+# Answers come from the fake arithmetic model (fake_llm.py), so the tutorial agents run end to end
+# through the real AzureChatOpenAI client, and every request is, independently:
+#   failed: with probability fail_rate, answered at once with HTTP fail_status (500 by default)
+#   slow:   with probability slow_rate, answered after slow_latency seconds instead of latency
+# Streaming requests get server-sent events: the first chunk after `latency` (or slow_latency) seconds, and
+# one more every `token_latency` seconds, split like the fake model streams (text word by word, tool call
+# arguments a few characters at a time). A non-streamed answer takes as long as the whole stream would.
+#
+#   python stub_server.py --port 8011 --latency 0.05 --slow-rate 0.05 --slow-latency 10 --fail-rate 0.1
+#
+# or in-process, pointing llm_clients at it:
+#   with StubLLMServer(slow_rate=0.05, fail_rate=0.1) as server:
+#       llm_clients.set_llm_factory(stub_llm_factory(server.url))
+#
+# Any POST path ending in /chat/completions is served, so the Azure (/openai/deployments/<name>/...)
+# and plain OpenAI (/v1/...) clients both work.
+
+
+class StubLLMServer:
+    def __init__(self, port=0, latency=0.05, slow_rate=0.0, slow_latency=5.0, fail_rate=0.0, fail_status=500, seed=None,
+                 token_latency=0.0):
+        self.latency = latency
+        self.token_latency = token_latency
+        self.slow_rate = slow_rate
+        self.slow_latency = slow_latency
+        self.fail_rate = fail_rate
+        self.fail_status = fail_status
+        self.model = FakeArithmeticChatModel()
+        self.stats = {"requests": 0, "slow": 0, "failed": 0}
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", port), self._handler())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def _draw(self):
+        # (fail, slow) for the next request
+        with self._lock:
+            self.stats["requests"] += 1
+            fail = self._random.random() < self.fail_rate
+            slow = not fail and self._random.random() < self.slow_rate
+            if fail:
+                self.stats["failed"] += 1
+            if slow:
+                self.stats["slow"] += 1
+            return fail, slow
+
+    def answer(self, request):
+        return self.model.respond(convert_to_messages(request["messages"]), request.get("tools"))
+
+    def complete(self, request, message):
+        # An OpenAI chat.completion response for an OpenAI chat request
+        answer = convert_to_openai_messages(message)
+        usage = message.usage_metadata
+        return {
+            "id": f"chatcmpl-stub-{self.model.calls}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": request.get("model") or "stub",
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": answer.get("content") or None,
+                            **({"tool_calls": answer["tool_calls"]} if answer.get("tool_calls") else {})},
+                "finish_reason": "tool_calls" if message.tool_calls else "stop",
+            }],
+            "usage": self._usage(usage),
+        }
+
+    def _usage(self, usage):
+        return {"prompt_tokens": usage["input_tokens"], "completion_tokens": usage["output_tokens"],
+                "total_tokens": usage["total_tokens"]}
+
+    def stream(self, request, message):
+        # The chat.completion.chunk events of a streamed answer
+        base = {"id": f"chatcmpl-stub-{self.model.calls}", "object": "chat.completion.chunk",
+                "created": int(time.time()), "model": request.get("model") or "stub"}
+
+        def event(delta, finish_reason=None):
+            return dict(base, choices=[{"index": 0, "delta": delta, "finish_reason": finish_reason}])
+
+        yield event({"role": "assistant", "content": ""})
+        for chunk in self.model.chunks(message):
+            if chunk.content:
+                yield event({"content": chunk.content})
+            for piece in chunk.tool_call_chunks:
+                call = {"index": piece["index"], "function": {"arguments": piece["args"]}}
+                if piece["id"]:
+                    call.update(id=piece["id"], type="function")
+                    call["function"]["name"] = piece["name"]
+                yield event({"tool_calls": [call]})
+        yield event({}, "tool_calls" if message.tool_calls else "stop")
+        if (request.get("stream_options") or {}).get("include_usage"):
+            yield dict(base, choices=[], usage=self._usage(message.usage_metadata))
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+                if not self.path.split("?")[0].endswith("/chat/completions"):
+                    return self._reply(404, {"error": {"message": "not found", "type": "invalid_request_error"}})
+                request = json.loads(body or b"{}")
+                fail, slow = server._draw()
+                if fail:
+                    return self._reply(server.fail_status, {"error": {"message": "injected failure", "type": "server_error"}})
+                message = server.answer(request)
+                time.sleep(server.slow_latency if slow else server.latency)
+                if request.get("stream"):
+                    return self._stream(server.stream(request, message))
+                if server.token_latency:
+                    time.sleep(server.token_latency * (sum(1 for _ in server.model.chunks(message)) - 1))
+                self._reply(200, server.complete(request, message))
+
+            def _stream(self, events):
+                try:
+                    self.send_response(200)
+                    self.send_header("Content-Type", "text/event-stream")
+                    self.send_header("Transfer-Encoding", "chunked")
+                    self.end_headers()
+                    for i, event in enumerate(events):
+                        if i > 1 and server.token_latency:
+                            # The role chunk and the first token go out together, like a real endpoint
+                            time.sleep(server.token_latency)
+                        self._chunk(f"data: {json.dumps(event)}\n\n".encode("utf-8"))
+                    self._chunk(b"data: [DONE]\n\n")
+                    self.wfile.write(b"0\r\n\r\n")
+                except (BrokenPipeError, ConnectionResetError):
+                    pass
+
+            def _chunk(self, data):
+                self.wfile.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+                self.wfile.flush()
+
+            def _reply(self, status, payload):
+                data = json.dumps(payload).encode("utf-8")
+                try:
+                    self.send_response(status)
+                    self.send_header("Content-Type", "application/json")
+                    self.send_header("Content-Length", str(len(data)))
+                    self.end_headers()
+                    self.wfile.write(data)
+                except (BrokenPipeError, ConnectionResetError):
+                    # The client gave up on a slow answer (a deadline, or a hedge won)
+                    pass
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def stub_llm_factory(url, timeout=None, max_retries=0):
+    # llm_clients.set_llm_factory(stub_llm_factory(server.url)): the real Azure client, talking to the stub
+    import httpx
+    from langchain_openai import AzureChatOpenAI
+    from llm_clients import API_VERSION, HTTP_LIMITS
+    http_client = httpx.Client(limits=HTTP_LIMITS, timeout=timeout)
+    http_async_client = httpx.AsyncClient(limits=HTTP_LIMITS, timeout=timeout)
+
+    def factory(deployment):
+        return AzureChatOpenAI(
+            azure_endpoint=url,
+            api_key="stub",
+            azure_deployment=deployment,
+            api_version=API_VERSION,
+            temperature=0,
+            timeout=timeout,
+            max_retries=max_retries,
+            stream_usage=True,
+            http_client=http_client,
+            http_async_client=http_async_client,
+        )
+    return factory
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Serve a local chat completions endpoint that injects slow and failing responses")
+    parser.add_argument("--port", type=int, default=8011)
+    parser.add_argument("--latency", type=float, default=0.05, help="seconds per normal answer")
+    parser.add_argument("--slow-rate", type=float, default=0.0, help="fraction of requests answered slowly")
+    parser.add_argument("--slow-latency", type=float, default=5.0, help="seconds per slow answer")
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="fraction of requests failed")
+    parser.add_argument("--fail-status", type=int, default=500)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--token-latency", type=float, default=0.0, help="seconds between streamed chunks")
+    args = parser.parse_args()
+
+    server = StubLLMServer(args.port, args.latency, args.slow_rate, args.slow_latency, args.fail_rate, args.fail_status, args.seed,
+                           args.token_latency)
+    print(f"serving on {server.url}", flush=True)
+    try:
+        server._server.serve_forever()
+    except KeyboardInterrupt:
+        pass
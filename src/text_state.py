@@ -0,0 +1,109 @@
+from langgraph.channels.binop import BinaryOperatorAggregate
+
+# Text state that grows by appending fragments.
+# `state["graph_state"] + " I am"` in a node copies everything written so far into the update, and the
+# update is what gets written to the checkpointer for that step. With a TextChannel nodes return only the
+# fragment to append, and the channel keeps the text as a Rope: an immutable chain of chunks that is
+# appended to in O(1) and joined only when the text is read (once per value, then cached).
+#
+#   class State(TypedDict):
+#       graph_state: Annotated[str, TextChannel]
+#
+#   def node_1(state):
+#       return {"graph_state": " I am"}   # appends " I am"
+#
+# Nodes read the state value as a plain str (json.dumps, re, slicing all work), and Overwrite("...")
+# replaces it. Returning `state["graph_state"] + "..."` appends the whole text again, return the fragment.
+# The channel checkpoints its list of chunks. On its own that is still the whole text at every step:
+# storage only grows linearly with DeltaMemorySaver (delta_checkpoint.py) listing the channel in
+# delta_channels, which stores just the chunks appended since the parent checkpoint. With MemorySaver
+# it stays quadratic, like a plain str.
+
+
+class Rope:
+    # Ropes are never changed: append() links a new Rope on top of the old one, so any number of
+    # values (checkpoints, branches) can share their common prefix
+    __slots__ = ("_parent", "_chunks", "_text")
+
+    def __init__(self, chunks=(), _parent=None):
+        self._parent = _parent
+        self._chunks = tuple(str(c) for c in chunks if c)
+        self._text = None
+
+    @property
+    def chunks(self):
+        links = []
+        rope = self
+        while rope is not None:
+            links.append(rope._chunks)
+            rope = rope._parent
+        return [chunk for link in reversed(links) for chunk in link]
+
+    def append(self, text):
+        # Returns a new Rope; the old one is unchanged
+        text = str(text)
+        return Rope((text,), self) if text else self
+
+    def __str__(self):
+        if self._text is None:
+            parent = self._parent
+            if parent is not None and parent._text is not None:
+                self._text = parent._text + "".join(self._chunks)
+            else:
+                self._text = "".join(self.chunks)
+        return self._text
+
+    def __len__(self):
+        return len(str(self))
+
+    def __eq__(self, other):
+        if isinstance(other, (Rope, str)):
+            return str(self) == str(other)
+        return NotImplemented
+
+    def __hash__(self):
+        return hash(str(self))
+
+    def __repr__(self):
+        return f"Rope({str(self)!r})"
+
+
+def append_text(current, update):
+    # Reducer: every update is a fragment appended to the text so far
+    return current.append(update)
+
+
+class TextChannel(BinaryOperatorAggregate):
+    # Annotated[str, TextChannel]: a Rope value, appended to by every update, read as a str, checkpointed as its chunks
+
+    def __init__(self, typ=None, operator=append_text):
+        super().__init__(Rope, operator)
+
+    def copy(self):
+        empty = self.__class__()
+        empty.key = self.key
+        empty.value = self.value
+        return empty
+
+    def from_checkpoint(self, checkpoint):
+        empty = self.__class__()
+        empty.key = self.key
+        if isinstance(checkpoint, list):
+            empty.value = Rope(checkpoint)
+        elif isinstance(checkpoint, str):
+            empty.value = Rope([checkpoint])
+        return empty
+
+    def update(self, values):
+        changed = super().update(values)
+        # Overwrite("...") sets the value directly, keep it a Rope
+        if not isinstance(self.value, Rope):
+            self.value = Rope([self.value])
+        return changed
+
+    def get(self):
+        # Nodes see the joined text, a real str
+        return str(super().get())
+
+    def checkpoint(self):
+        return self.value.chunks
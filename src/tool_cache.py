@@ -0,0 +1,135 @@
+import functools
+import json
+import threading
+import time
+from collections import OrderedDict
+
+# Memoization for pure tools, the ones whose result depends only on their arguments (add, multiply, divide).
+# A tool marked with @pure serves repeated calls from a bounded cache keyed by (tool name, arguments),
+# whichever node, graph or thread makes the call:
+#
+#   @pure
+#   @tool
+#   def add(a: int, b: int) -> int: ...
+#
+# The cache sits under the tool's argument validation, so add(a=3, b=4) and add(a="3", b=4) share an entry,
+# and it works unchanged with ToolNode, ParallelToolNode or a direct tool.invoke().
+# Entries are evicted least-recently-used past `max_entries` and expire after `ttl` seconds.
+# Exceptions aren't cached, and cached results are shared, so a pure tool should return immutable values.
+# Concurrent first calls with the same arguments may all run the tool; only one result is kept.
+
+
+class ToolCache:
+    def __init__(self, max_entries=10_000, ttl=None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.stats = {"evictions": 0, "expired": 0}
+        self._tools = {}  # tool name -> {"hits": ..., "misses": ...}
+        self._entries = OrderedDict()  # (tool name, arguments) -> (stored at, result)
+        self._lock = threading.Lock()
+
+    def _counter(self, name):
+        counter = self._tools.get(name)
+        if counter is None:
+            counter = self._tools[name] = {"hits": 0, "misses": 0}
+        return counter
+
+    def get(self, key):
+        # Returns (found, result)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if self.ttl is None or time.monotonic() - entry[0] <= self.ttl:
+                    self._entries.move_to_end(key)
+                    self._counter(key[0])["hits"] += 1
+                    return True, entry[1]
+                del self._entries[key]
+                self.stats["expired"] += 1
+            self._counter(key[0])["misses"] += 1
+            return False, None
+
+    def put(self, key, result):
+        with self._lock:
+            self._entries[key] = (time.monotonic(), result)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.stats["evictions"] += 1
+
+    def hit_rate(self, name=None):
+        with self._lock:
+            if name is None:
+                counters = list(self._tools.values())
+            else:
+                counters = [self._tools[name]] if name in self._tools else []
+            hits = sum(c["hits"] for c in counters)
+            total = hits + sum(c["misses"] for c in counters)
+        return hits / total if total else 0.0
+
+    def tool_stats(self):
+        # tool name -> {"hits", "misses", "hit_rate"}
+        with self._lock:
+            return {
+                name: {**c, "hit_rate": c["hits"] / (c["hits"] + c["misses"]) if c["hits"] + c["misses"] else 0.0}
+                for name, c in self._tools.items()
+            }
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._tools.clear()
+            self.stats = {"evictions": 0, "expired": 0}
+
+    def __len__(self):
+        return len(self._entries)
+
+    def wrap(self, tool):
+        # Put the cache in front of the tool's function (and coroutine, if it has one)
+        name = tool.name
+
+        def key(args, kwargs):
+            # Callbacks and run managers are injected per call, they're not arguments
+            kwargs = {k: v for k, v in kwargs.items() if k not in ("callbacks", "run_manager", "config")}
+            return name, json.dumps([args, kwargs], sort_keys=True, separators=(",", ":"), default=repr)
+
+        if tool.func is not None:
+            func = tool.func
+
+            @functools.wraps(func)
+            def cached(*args, **kwargs):
+                k = key(args, kwargs)
+                found, result = self.get(k)
+                if not found:
+                    result = func(*args, **kwargs)
+                    self.put(k, result)
+                return result
+
+            tool.func = cached
+
+        if getattr(tool, "coroutine", None) is not None:
+            coroutine = tool.coroutine
+
+            @functools.wraps(coroutine)
+            async def acached(*args, **kwargs):
+                k = key(args, kwargs)
+                found, result = self.get(k)
+                if not found:
+                    result = await coroutine(*args, **kwargs)
+                    self.put(k, result)
+                return result
+
+            tool.coroutine = acached
+
+        tool.metadata = {**(tool.metadata or {}), "pure": True}
+        return tool
+
+
+# Shared by every @pure tool in the process unless a tool is given its own cache
+default_tool_cache = ToolCache()
+
+
+def pure(tool=None, *, cache=None):
+    # Usable as @pure or @pure(cache=ToolCache(ttl=60)), above @tool
+    if tool is None:
+        return lambda t: pure(t, cache=cache)
+    return (default_tool_cache if cache is None else cache).wrap(tool)
@@ -0,0 +1,10 @@
+import os
+import sys
+
+# The modules live side by side in src/ and import each other by name, the way the scripts run
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+# Every graph runs against the local fake model (fake_llm.py), no endpoint needed
+os.environ.setdefault("LLM_BACKEND", "fake")
+os.environ.setdefault("AZURE_OPENAI_API_KEY", "api_key")
+os.environ.setdefault("AZURE_OPENAI_ENDPOINT", "endpoint")
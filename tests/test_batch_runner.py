@@ -0,0 +1,107 @@
+import asyncio
+import io
+import json
+import os
+import subprocess
+import sys
+import pytest
+from langchain_core.messages import AIMessage
+import batch_runner
+from batch_runner import BatchRunner, Progress, load_graph, load_progress
+
+PROMPTS = ["Add 3 and 4.", "Multiply 2 and 3.", None, "Divide 9 by 3.", "Add 1 and 1.", "Multiply 5 and 5."]
+
+
+class FlakyGraph:
+    # Answers like the agent would, but fails the prompts listed in `failing`
+    def __init__(self, failing=()):
+        self.failing = set(failing)
+        self.seen = []
+
+    async def ainvoke(self, inputs, config=None):
+        prompt = inputs["messages"][-1].content
+        self.seen.append(prompt)
+        if prompt in self.failing:
+            raise RuntimeError("upstream failed")
+        return {"messages": [AIMessage(content=f"answer to {prompt}")]}
+
+
+def write_input(path):
+    path.write_text("".join((json.dumps({"prompt": p, "id": i}) if p else "") + "\n" for i, p in enumerate(PROMPTS)))
+
+
+def records(path):
+    return [json.loads(line) for line in path.read_text().splitlines()]
+
+
+def run(graph, input_path, output_path):
+    runner = BatchRunner(graph, concurrency=4, report_every=0, out=io.StringIO())
+    return asyncio.run(runner.run(str(input_path), str(output_path)))
+
+
+def test_progress_watermark():
+    progress = Progress()
+    for line in (0, 2, 3, 1, 5):
+        progress.add(line)
+    progress.add(4, failed=True)
+    assert progress.watermark == 6
+    assert not progress.done
+    assert [line for line in range(7) if line in progress] == [0, 1, 2, 3, 5]
+    progress.add(4)
+    assert 4 in progress
+
+
+def test_resume_skips_done_lines_and_retries_failed_ones(tmp_path):
+    input_path, output_path = tmp_path / "in.jsonl", tmp_path / "out.jsonl"
+    write_input(input_path)
+    summary = run(FlakyGraph(failing={"Divide 9 by 3."}), input_path, output_path)
+    assert summary["done"] == 5 and summary["errors"] == 1
+
+    # A crash in the middle of writing a result leaves half a line behind
+    with open(output_path, "a") as f:
+        f.write('{"line": 4, "output": "ans')
+    graph = FlakyGraph()
+    summary = run(graph, input_path, output_path)
+    assert graph.seen == ["Divide 9 by 3."]
+    assert summary["skipped"] == 4
+
+    results = records(output_path)
+    succeeded = sorted(r["line"] for r in results if "output" in r)
+    assert succeeded == [0, 1, 3, 4, 5]
+    assert [r["line"] for r in results if "error" in r] == [3]
+    assert run(FlakyGraph(), input_path, output_path)["done"] == 0
+
+
+def test_load_progress_cuts_a_partial_last_line(tmp_path):
+    output_path = tmp_path / "out.jsonl"
+    output_path.write_text('{"line": 0, "output": "x", "latency": 0}\n{"line": 1, "out')
+    progress = load_progress(str(output_path))
+    assert 0 in progress and 1 not in progress
+    assert output_path.read_text().endswith("}\n")
+
+
+@pytest.mark.parametrize("memory", [False, True])
+def test_runs_the_agent_graph(tmp_path, memory):
+    input_path, output_path = tmp_path / "in.jsonl", tmp_path / "out.jsonl"
+    input_path.write_text(
+        json.dumps({"prompt": "Add 3 and 4.", "thread_id": "a"}) + "\n"
+        + json.dumps({"prompt": "Multiply that by 2.", "thread_id": "a"}) + "\n"
+    )
+    summary = run(load_graph("5_agent_memory", memory=memory), input_path, output_path)
+    assert summary["errors"] == 0
+    outputs = {r["line"]: r["output"] for r in records(output_path)}
+    assert outputs[0] == "The result is 7."
+    if memory:
+        # The second line continues the first one's conversation
+        assert outputs[1] == "The result is 14."
+
+
+def test_memory_run_refuses_to_resume(tmp_path):
+    input_path, output_path = tmp_path / "in.jsonl", tmp_path / "out.jsonl"
+    write_input(input_path)
+    output_path.write_text('{"line": 0, "output": "x", "latency": 0}\n')
+    script = os.path.join(os.path.dirname(batch_runner.__file__), "batch_runner.py")
+    result = subprocess.run([sys.executable, script, str(input_path), str(output_path), "--memory"],
+                            capture_output=True, text=True)
+    assert result.returncode == 2
+    assert "already has results" in result.stderr
@@ -0,0 +1,74 @@
+import asyncio
+import importlib
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+from langgraph.checkpoint.memory import MemorySaver
+from budget import Budget
+from metrics import Metrics
+
+REQUEST = "Add 3 and 4. Multiply the output by 2. Divide the output by 5"
+
+agent = importlib.import_module("4_agent")
+
+
+def run(budget, checkpointer=None, thread_id="t"):
+    graph = agent.build_graph(checkpointer=checkpointer)
+    config = {"configurable": {"budget": budget, "thread_id": thread_id}}
+    return graph.invoke({"messages": [HumanMessage(content=REQUEST)]}, config)
+
+
+def test_unlimited_budget_finishes():
+    result = run(Budget())
+    assert result["messages"][-1].content == "The result is 2.8."
+    assert result["budget"]["tool_calls"] == 3
+    assert result["budget"]["prompt_tokens"] > 0
+
+
+@pytest.mark.parametrize("budget, name", [
+    (Budget(max_tool_calls=1), "tool_calls"),
+    (Budget(max_seconds=0), "seconds"),
+    (Budget(max_prompt_tokens=1), "prompt_tokens"),
+    (Budget(max_completion_tokens=1), "completion_tokens"),
+    ({"max_tool_calls": 0}, "tool_calls"),
+])
+def test_stops_with_the_budget_that_ran_out(budget, name):
+    result = run(budget)
+    answer = result["messages"][-1]
+    assert result["budget"]["exhausted"] == name
+    assert f"used up its {name.replace('_', ' ')} budget" in answer.content
+    assert not answer.tool_calls
+
+
+def test_tool_call_budget_is_never_exceeded():
+    result = run(Budget(max_tool_calls=2))
+    ran = [m for m in result["messages"] if isinstance(m, ToolMessage) and m.status != "error"]
+    assert len(ran) == 2
+    assert "The latest result was 14." in result["messages"][-1].content
+
+
+def test_pending_calls_are_answered_and_the_next_turn_starts_fresh():
+    checkpointer = MemorySaver()
+    result = run(Budget(max_tool_calls=0), checkpointer)
+    calls = [tc["id"] for m in result["messages"] if isinstance(m, AIMessage) for tc in m.tool_calls]
+    answered = [m.tool_call_id for m in result["messages"] if isinstance(m, ToolMessage)]
+    assert calls and calls == answered
+    result = run(Budget(), checkpointer)
+    assert result["messages"][-1].content == "The result is 2.8."
+    assert "exhausted" not in result["budget"]
+
+
+def test_async_run_stops_the_same_way():
+    graph = agent.build_graph()
+    config = {"configurable": {"budget": Budget(max_tool_calls=1)}}
+    result = asyncio.run(graph.ainvoke({"messages": [HumanMessage(content=REQUEST)]}, config))
+    assert result["budget"]["exhausted"] == "tool_calls"
+
+
+def test_stops_are_counted():
+    metrics = Metrics(enabled=True)
+    previous, agent.budget_guard.metrics = agent.budget_guard.metrics, metrics
+    try:
+        run(Budget(max_tool_calls=1))
+    finally:
+        agent.budget_guard.metrics = previous
+    assert metrics.counter("agent_budget_exhausted_total", budget="tool_calls") == 1
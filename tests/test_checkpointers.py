@@ -0,0 +1,99 @@
+import time
+from typing import Annotated
+import pytest
+from typing_extensions import TypedDict
+from langchain_core.messages import AIMessage, HumanMessage, RemoveMessage
+from langgraph.checkpoint.memory import MemorySaver
+from langgraph.graph import END, START, StateGraph
+from langgraph.graph.message import add_messages
+from bounded_memory import BoundedMemorySaver
+from delta_checkpoint import DeltaMemorySaver
+
+
+class State(TypedDict):
+    messages: Annotated[list, add_messages]
+    step: int
+
+
+def reply(state):
+    # Appends an answer with a stable id; every third step also edits and removes earlier messages
+    step = state.get("step", 0) + 1
+    update = [AIMessage(content=f"answer {step}", id=f"a{step}")]
+    if step % 3 == 0:
+        update.append(AIMessage(content=f"edited {step}", id=f"a{step - 1}"))
+        update.append(RemoveMessage(id=f"a{step - 2}"))
+    return {"messages": update, "step": step}
+
+
+def build(checkpointer):
+    builder = StateGraph(State)
+    builder.add_node("reply", reply)
+    builder.add_edge(START, "reply")
+    builder.add_edge("reply", END)
+    return builder.compile(checkpointer=checkpointer)
+
+
+def converse(graph, thread_id="t", turns=20):
+    config = {"configurable": {"thread_id": thread_id}}
+    for i in range(turns):
+        graph.invoke({"messages": [HumanMessage(content=f"question {i}", id=f"h{i}")]}, config)
+    return config
+
+
+def history(graph, config):
+    return [(s.values, s.next, s.metadata["step"]) for s in graph.get_state_history(config)]
+
+
+@pytest.mark.parametrize("snapshot_every", [1, 3, 16])
+def test_delta_saver_matches_memory_saver(snapshot_every):
+    expected = build(MemorySaver())
+    actual = build(DeltaMemorySaver(snapshot_every=snapshot_every, cache_size=4))
+    config = converse(expected)
+    converse(actual)
+    assert history(actual, config) == history(expected, config)
+
+
+def test_delta_saver_reads_are_detached():
+    graph = build(DeltaMemorySaver())
+    config = converse(graph, turns=3)
+    graph.get_state(config).values["messages"][0].content = "changed"
+    graph.get_state(config).values["messages"].clear()
+    assert graph.get_state(config).values["messages"][0].content == "question 0"
+
+
+def test_delta_saver_delete_thread():
+    saver = DeltaMemorySaver()
+    graph = build(saver)
+    config = converse(graph, turns=3)
+    saver.delete_thread("t")
+    assert graph.get_state(config).values == {}
+    converse(graph, turns=2)
+    assert len(graph.get_state(config).values["messages"]) == 4
+
+
+def test_bounded_saver_keeps_the_latest_state():
+    expected = build(MemorySaver())
+    actual = build(BoundedMemorySaver(max_checkpoints_per_thread=3))
+    config = converse(expected)
+    converse(actual)
+    assert actual.get_state(config).values == expected.get_state(config).values
+    assert len(list(actual.get_state_history(config))) == 3
+
+
+def test_bounded_saver_evicts_least_recently_used_threads():
+    saver = BoundedMemorySaver(max_threads=2)
+    graph = build(saver)
+    for thread_id in ("a", "b", "c"):
+        converse(graph, thread_id, turns=1)
+    assert graph.get_state({"configurable": {"thread_id": "a"}}).values == {}
+    assert graph.get_state({"configurable": {"thread_id": "c"}}).values["step"] == 1
+    assert saver.evictions["lru"] == 1
+
+
+def test_bounded_saver_expires_idle_threads_on_read():
+    saver = BoundedMemorySaver(idle_ttl=0.05)
+    graph = build(saver)
+    config = converse(graph, turns=1)
+    time.sleep(0.1)
+    assert graph.get_state(config).values == {}
+    assert saver.evictions["idle_ttl"] == 1
@@ -0,0 +1,59 @@
+import datetime
+import uuid
+from langchain_core.messages import AIMessage, AIMessageChunk, HumanMessage, SystemMessage, ToolMessage
+from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
+from langgraph.types import Send
+from compact_serde import CompactSerializer
+
+MESSAGES = [
+    SystemMessage(content="You are a helpful assistant."),
+    HumanMessage(content="Add 3 and 4.", id="h1"),
+    AIMessage(content="", id="a1", tool_calls=[{"name": "add", "args": {"a": 3, "b": 4}, "id": "call_1", "type": "tool_call"}],
+              usage_metadata={"input_tokens": 10, "output_tokens": 5, "total_tokens": 15}),
+    ToolMessage(content="7", name="add", tool_call_id="call_1", id="t1"),
+    ToolMessage(content="boom", tool_call_id="call_2", status="error", artifact={"trace": [1, 2]}),
+    AIMessage(content=[{"type": "text", "text": "The result is 7."}], response_metadata={"finish_reason": "stop"}),
+    AIMessageChunk(content="The", id="c1"),
+    HumanMessage(content="extra", custom_field="kept"),
+]
+
+
+def test_messages_round_trip():
+    serde = CompactSerializer()
+    type_, data = serde.dumps_typed({"messages": MESSAGES})
+    assert type_ == "compact"
+    loaded = serde.loads_typed((type_, data))["messages"]
+    assert loaded == MESSAGES
+    assert [type(m) for m in loaded] == [type(m) for m in MESSAGES]
+    assert loaded[-1].custom_field == "kept"
+
+
+def test_other_values_round_trip():
+    serde = CompactSerializer()
+    value = {
+        "when": datetime.datetime(2024, 5, 1, 12, 30),
+        "id": uuid.UUID(int=7),
+        "ids": {1, 2},
+        "send": Send("tools", {"x": 1}),
+        "nested": [{"message": MESSAGES[2]}],
+    }
+    assert serde.loads_typed(serde.dumps_typed(value)) == value
+
+
+def test_smaller_than_the_default_serializer():
+    compact = CompactSerializer().dumps_typed({"messages": MESSAGES * 10})[1]
+    default = JsonPlusSerializer().dumps_typed({"messages": MESSAGES * 10})[1]
+    assert len(compact) < len(default) / 2
+
+
+def test_reads_what_the_default_serializer_wrote():
+    stored = JsonPlusSerializer().dumps_typed({"messages": MESSAGES})
+    assert CompactSerializer().loads_typed(stored)["messages"] == MESSAGES
+
+
+def test_falls_back_to_the_default_format():
+    serde = CompactSerializer()
+    serde.compact = False
+    type_, data = serde.dumps_typed({"messages": MESSAGES})
+    assert type_ == "msgpack"
+    assert JsonPlusSerializer().loads_typed((type_, data))["messages"] == MESSAGES
@@ -0,0 +1,97 @@
+import asyncio
+import time
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage, ToolMessage
+from llm_cache import LLMCache, request_key
+
+TOOLS = [{"type": "function", "function": {"name": "add", "parameters": {}}}]
+
+
+class CountingModel:
+    def __init__(self):
+        self.calls = 0
+
+    def invoke(self, input, config=None, **kwargs):
+        self.calls += 1
+        return AIMessage(
+            content="", id=f"run-{self.calls}",
+            tool_calls=[{"name": "add", "args": {"a": 3, "b": 4}, "id": "call_1", "type": "tool_call"}],
+            additional_kwargs={"tool_calls": [{"id": "call_1", "type": "function",
+                                               "function": {"name": "add", "arguments": '{"a": 3, "b": 4}'}}]},
+            usage_metadata={"input_tokens": 10, "output_tokens": 5, "total_tokens": 15},
+        )
+
+    async def ainvoke(self, input, config=None, **kwargs):
+        return self.invoke(input, config, **kwargs)
+
+
+def conversation(ids):
+    return [
+        SystemMessage(content="sys"),
+        HumanMessage(content="Add 3 and 4.", id=ids[0]),
+        AIMessage(content="", id=ids[1], tool_calls=[{"name": "add", "args": {"a": 3, "b": 4}, "id": ids[2]}]),
+        ToolMessage(content="7", tool_call_id=ids[2], id=ids[3]),
+    ]
+
+
+def test_key_ignores_generated_ids():
+    assert request_key(conversation("abcd")) == request_key(conversation("wxyz"))
+
+
+def test_key_covers_everything_the_model_sees():
+    base = request_key(conversation("abcd"))
+    assert request_key(conversation("abcd"), TOOLS) != base
+    assert request_key(conversation("abcd"), deployment="gpt-4o-mini") != base
+    assert request_key(conversation("abcd"), options={"stop": ["\n"]}) != base
+    assert request_key(conversation("abcd")[:-1]) != base
+
+
+def test_hit_is_a_replay():
+    model = CountingModel()
+    llm = LLMCache().wrap(model, TOOLS)
+    first = llm.invoke(conversation("abcd"))
+    second = llm.invoke(conversation("wxyz"))
+    assert model.calls == 1
+    assert first.usage_metadata["total_tokens"] == 15
+    assert second.usage_metadata is None
+    assert second.id is None
+    assert second.tool_calls[0]["args"] == first.tool_calls[0]["args"]
+    assert second.tool_calls[0]["id"] != first.tool_calls[0]["id"]
+    assert second.additional_kwargs["tool_calls"][0]["id"] == second.tool_calls[0]["id"]
+
+
+def test_per_call_options_are_part_of_the_key():
+    model = CountingModel()
+    llm = LLMCache().wrap(model)
+    llm.invoke(conversation("abcd"))
+    llm.invoke(conversation("abcd"), stop=["."])
+    assert model.calls == 2
+
+
+def test_disk_tier_is_shared_between_caches(tmp_path):
+    path = str(tmp_path / "cache.sqlite")
+    model = CountingModel()
+    LLMCache(path=path).wrap(model).invoke(conversation("abcd"))
+    cache = LLMCache(path=path)
+    assert asyncio.run(cache.wrap(model).ainvoke(conversation("abcd"))).tool_calls[0]["name"] == "add"
+    assert model.calls == 1
+    assert cache.stats["disk_hits"] == 1
+
+
+def test_entries_expire():
+    model = CountingModel()
+    cache = LLMCache(ttl=0.01)
+    llm = cache.wrap(model)
+    llm.invoke(conversation("abcd"))
+    time.sleep(0.05)
+    llm.invoke(conversation("abcd"))
+    assert model.calls == 2
+    assert cache.stats["expired"] == 1
+
+
+def test_memory_tier_is_bounded():
+    cache = LLMCache(max_entries=2)
+    for i in range(3):
+        cache.put(f"key-{i}", AIMessage(content=str(i)))
+    assert cache.get("key-0") is None
+    assert cache.get("key-2").content == "2"
+    assert cache.stats["evictions"] == 1
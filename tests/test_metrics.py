@@ -0,0 +1,109 @@
+import importlib
+import re
+import urllib.request
+from typing_extensions import TypedDict
+from langchain_core.messages import HumanMessage
+from langgraph.graph import END, START, StateGraph
+from metrics import BUCKETS, Metrics, default_metrics, enable_metrics, instrument, serve_prometheus
+
+
+class State(TypedDict):
+    value: int
+
+
+def build(metrics):
+    builder = StateGraph(State)
+    builder.add_node("double", lambda state: {"value": state["value"] * 2})
+    builder.add_node("fail", lambda state: 1 / 0)
+    builder.add_edge(START, "double")
+    builder.add_conditional_edges("double", lambda state: "fail" if state["value"] > 10 else END, ["fail", END])
+    builder.add_edge("fail", END)
+    return instrument(builder, metrics).compile()
+
+
+def parse(text):
+    # {(name, labels): value} for every sample line, checking that each family is announced before its samples
+    samples, announced = {}, set()
+    for line in text.splitlines():
+        if line.startswith("# TYPE "):
+            announced.add(line.split()[2])
+            continue
+        if line.startswith("#"):
+            continue
+        match = re.fullmatch(r'([a-z_]+)(\{.*\})? (\S+)', line)
+        assert match, line
+        name, labels, value = match.groups()
+        assert re.sub(r"_(bucket|sum|count)$", "", name) in announced or name in announced, line
+        samples[(name, labels or "")] = float(value)
+    return samples
+
+
+def test_instrumented_graph_reports_nodes_and_edges():
+    metrics = Metrics(enabled=True)
+    graph = build(metrics)
+    graph.invoke({"value": 1})
+    try:
+        graph.invoke({"value": 6})
+    except ZeroDivisionError:
+        pass
+    samples = parse(metrics.prometheus_text())
+    assert samples[("graph_node_calls_total", '{node="double",status="ok"}')] == 2
+    assert samples[("graph_node_calls_total", '{node="fail",status="error"}')] == 1
+    assert samples[("graph_edge_calls_total", '{edge="double:condition",target="__end__"}')] == 1
+    assert samples[("graph_edge_calls_total", '{edge="double:condition",target="fail"}')] == 1
+    assert samples[("graph_node_duration_seconds_count", '{node="double"}')] == 2
+
+
+def test_histogram_buckets_are_cumulative():
+    metrics = Metrics(enabled=True)
+    for seconds in (0.00005, 0.003, 0.003, 0.2, 30.0):
+        metrics.observe("tool_duration_seconds", seconds, tool="add")
+    samples = parse(metrics.prometheus_text())
+    buckets = [samples[("tool_duration_seconds_bucket", f'{{tool="add",le="{bound}"}}')] for bound in BUCKETS + ("+Inf",)]
+    assert buckets == sorted(buckets)
+    assert buckets[0] == 1 and buckets[-2] == 4 and buckets[-1] == 5
+    assert samples[("tool_duration_seconds_count", '{tool="add"}')] == 5
+    assert samples[("tool_duration_seconds_sum", '{tool="add"}')] == sum((0.00005, 0.003, 0.003, 0.2, 30.0))
+
+
+def test_label_values_are_escaped():
+    metrics = Metrics(enabled=True)
+    metrics.inc("tool_calls_total", tool='say "hi"\\\n', status="ok")
+    assert 'tool_calls_total{status="ok",tool="say \\"hi\\"\\\\\\n"} 1' in metrics.prometheus_text()
+
+
+def test_disabled_metrics_leave_the_graph_alone():
+    builder = StateGraph(State)
+    builder.add_node("double", lambda state: {"value": state["value"] * 2})
+    runnable = builder.nodes["double"].runnable
+    instrument(builder, Metrics(enabled=False))
+    assert builder.nodes["double"].runnable is runnable
+
+
+def test_agent_reports_tools_and_tokens():
+    agent = importlib.import_module("4_agent")
+    default_metrics.reset()
+    enable_metrics()
+    try:
+        agent.build_graph().invoke({"messages": [HumanMessage(content="Add 3 and 4. Multiply the output by 2.")]})
+    finally:
+        enable_metrics(False)
+    samples = parse(default_metrics.prometheus_text())
+    default_metrics.reset()
+    assert samples[("tool_calls_total", '{status="ok",tool="add"}')] == 1
+    assert samples[("tool_calls_total", '{status="ok",tool="multiply"}')] == 1
+    assert samples[("graph_node_calls_total", '{node="assistant",status="ok"}')] == 3
+    assert samples[("llm_tokens_total", '{node="assistant",type="prompt"}')] > 0
+
+
+def test_prometheus_endpoint():
+    metrics = Metrics(enabled=True)
+    metrics.inc("tool_calls_total", tool="add", status="ok")
+    server = serve_prometheus(0, metrics)
+    try:
+        with urllib.request.urlopen(f"http://127.0.0.1:{server.server_address[1]}/metrics") as response:
+            assert response.headers["Content-Type"].startswith("text/plain; version=0.0.4")
+            assert parse(response.read().decode())[("tool_calls_total", '{status="ok",tool="add"}')] == 1
+    finally:
+        server.shutdown()
+        server.server_close()
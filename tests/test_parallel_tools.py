@@ -0,0 +1,96 @@
+import asyncio
+import threading
+import time
+import pytest
+from langchain_core.messages import AIMessage
+from langchain_core.tools import tool
+from parallel_tools import ParallelToolNode
+
+release = threading.Event()
+
+
+@tool
+def add(a: int, b: int) -> int:
+    """Adds a and b."""
+    return a + b
+
+
+@tool
+def divide(a: int, b: int) -> float:
+    """Divides a by b."""
+    return a / b
+
+
+@tool
+def hang(a: int) -> int:
+    """Waits until the test lets it go."""
+    release.wait(5)
+    return a
+
+
+def state(*calls):
+    return {"messages": [AIMessage(content="", tool_calls=[
+        {"name": name, "args": args, "id": f"call_{i}", "type": "tool_call"} for i, (name, args) in enumerate(calls)
+    ])]}
+
+
+def test_results_come_back_in_call_order():
+    node = ParallelToolNode([add, divide])
+    messages = node(state(("divide", {"a": 8, "b": 2}), ("add", {"a": 1, "b": 2}), ("nope", {})))["messages"]
+    assert [m.content for m in messages[:2]] == ["4.0", "3"]
+    assert [m.tool_call_id for m in messages] == ["call_0", "call_1", "call_2"]
+    assert messages[2].status == "error" and "not a valid tool" in messages[2].content
+
+
+def test_errors_are_raised_like_tool_node_by_default():
+    node = ParallelToolNode([add, divide])
+    with pytest.raises(ZeroDivisionError):
+        node(state(("divide", {"a": 1, "b": 0})))
+    with pytest.raises(ZeroDivisionError):
+        asyncio.run(node.acall(state(("divide", {"a": 1, "b": 0}))))
+    # Arguments the tool rejects are the model's mistake, and go back to it
+    [message] = node(state(("add", {"a": "x", "b": 2})))["messages"]
+    assert message.status == "error"
+
+
+@pytest.mark.parametrize("handle, content", [
+    (True, "ZeroDivisionError"),
+    ("could not divide", "could not divide"),
+    (ZeroDivisionError, "ZeroDivisionError"),
+    (lambda e: f"handled {type(e).__name__}", "handled ZeroDivisionError"),
+])
+def test_handle_tool_errors(handle, content):
+    node = ParallelToolNode([divide], handle_tool_errors=handle)
+    [message] = node(state(("divide", {"a": 1, "b": 0})))["messages"]
+    assert message.status == "error" and content in message.content
+
+
+def test_unhandled_types_are_raised():
+    node = ParallelToolNode([divide], handle_tool_errors=ValueError)
+    with pytest.raises(ZeroDivisionError):
+        node(state(("divide", {"a": 1, "b": 0})))
+
+
+def test_a_hung_call_times_out_without_blocking_the_next_ones():
+    release.clear()
+    node = ParallelToolNode([add, hang], max_workers=1, timeout=0.1)
+    try:
+        [message] = node(state(("hang", {"a": 1})))["messages"]
+        assert message.status == "error" and "did not finish" in message.content
+        started = time.monotonic()
+        [message] = node(state(("add", {"a": 1, "b": 2})))["messages"]
+        assert message.content == "3" and time.monotonic() - started < 1
+    finally:
+        release.set()
+        node.shutdown()
+
+
+def test_speculative_calls_are_kept_per_thread():
+    node = ParallelToolNode([add], speculate=True)
+    call = {"name": "add", "args": {"a": 1, "b": 2}, "id": "call_0", "type": "tool_call"}
+    node.speculate(call, {"configurable": {"thread_id": "a"}})
+    node(state(("add", {"a": 1, "b": 2})), {"configurable": {"thread_id": "b"}})
+    assert node.stats["used"] == 0
+    node(state(("add", {"a": 1, "b": 2})), {"configurable": {"thread_id": "a"}})
+    assert node.stats["used"] == 1
+    node.shutdown()
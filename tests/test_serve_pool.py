@@ -0,0 +1,37 @@
+import pytest
+from serve_pool import HashRing
+
+KEYS = [f"thread-{i}" for i in range(2000)]
+
+
+def test_placement_is_deterministic():
+    assert [HashRing(["a", "b", "c"]).get(k) for k in KEYS] == [HashRing(["c", "a", "b"]).get(k) for k in KEYS]
+
+
+def test_removing_a_node_only_moves_its_keys():
+    ring = HashRing(["a", "b", "c", "d"])
+    before = {k: ring.get(k) for k in KEYS}
+    ring.remove("b")
+    after = {k: ring.get(k) for k in KEYS}
+    assert "b" not in after.values()
+    assert all(after[k] == before[k] for k in KEYS if before[k] != "b")
+    ring.add("b")
+    assert {k: ring.get(k) for k in KEYS} == before
+
+
+def test_load_spreads_evenly():
+    ring = HashRing(["a", "b", "c", "d"])
+    shares = ring.shares()
+    assert sum(shares.values()) == pytest.approx(1.0)
+    assert all(0.15 < share < 0.35 for share in shares.values())
+    counts = {node: 0 for node in ring.nodes()}
+    for k in KEYS:
+        counts[ring.get(k)] += 1
+    assert all(300 < count < 700 for count in counts.values())
+
+
+def test_empty_ring():
+    ring = HashRing(["a"])
+    ring.remove("a")
+    assert ring.get("thread-1") is None
+    assert len(ring) == 0
@@ -0,0 +1,58 @@
+import json
+import re
+from typing import Annotated
+from typing_extensions import TypedDict
+from langgraph.checkpoint.memory import MemorySaver
+from langgraph.graph import END, START, StateGraph
+from langgraph.types import Overwrite
+from delta_checkpoint import DeltaMemorySaver
+from text_state import Rope, TextChannel
+
+
+class State(TypedDict):
+    text: Annotated[str, TextChannel]
+
+
+def build(checkpointer=None, steps=3):
+    seen = []
+
+    def step(state):
+        # Nodes get a real str
+        assert isinstance(state["text"], str)
+        seen.append(json.dumps(state["text"]))
+        re.search("step", state["text"])
+        return {"text": f" step {len(seen)}"}
+
+    builder = StateGraph(State)
+    previous = START
+    for i in range(steps):
+        builder.add_node(f"step_{i}", step)
+        builder.add_edge(previous, f"step_{i}")
+        previous = f"step_{i}"
+    builder.add_edge(previous, END)
+    return builder.compile(checkpointer=checkpointer)
+
+
+def test_rope_is_immutable():
+    base = Rope(["a", "b"])
+    left, right = base.append("c"), base.append("d")
+    assert (str(base), str(left), str(right)) == ("ab", "abc", "abd")
+    assert left.chunks == ["a", "b", "c"]
+    assert base.append("") is base
+    assert left == "abc" and len(right) == 3
+
+
+def test_updates_append_and_overwrite_replaces():
+    graph = build(MemorySaver())
+    config = {"configurable": {"thread_id": "t"}}
+    assert graph.invoke({"text": "Hi"}, config)["text"] == "Hi step 1 step 2 step 3"
+    assert graph.invoke({"text": Overwrite("New")}, config)["text"] == "New step 4 step 5 step 6"
+
+
+def test_history_matches_across_savers():
+    config = {"configurable": {"thread_id": "t"}}
+    expected, actual = build(MemorySaver()), build(DeltaMemorySaver(delta_channels=("text",), snapshot_every=2))
+    for graph in (expected, actual):
+        for _ in range(3):
+            graph.invoke({"text": "Hi"}, config)
+    assert [s.values for s in actual.get_state_history(config)] == [s.values for s in expected.get_state_history(config)]